@@ -0,0 +1,92 @@
+#!/usr/bin/env python3
+"""
+Cold-start benchmark: import time of src.main and time to the first
+successful GET /health from a freshly spawned uvicorn.
+
+Each round runs in a new process with a throwaway SQLite file, so module
+caches (but not the OS page cache or .pyc files) start cold:
+
+  import   - `python -c "import src.main"`, wall time
+  health   - spawn `uvicorn src.main:app`, poll /health until it answers 200
+
+    python benchmarks/cold_start.py
+"""
+import os
+import socket
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+import httpx
+
+ROUNDS = int(os.environ.get("ROUNDS", "5"))
+TIMEOUT = float(os.environ.get("TIMEOUT", "60"))
+
+BACKEND = os.path.join(os.path.dirname(__file__), "..")
+
+
+def _env(db_path: str) -> dict:
+    return dict(
+        os.environ,
+        DATABASE_URL=f"sqlite:///{db_path}",
+        API_KEY="bench",
+        INDEXER_ENABLED="false",
+    )
+
+
+def _free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def _time_import(db_path: str) -> float:
+    start = time.perf_counter()
+    subprocess.run([sys.executable, "-c", "import src.main"], cwd=BACKEND, env=_env(db_path), check=True)
+    return time.perf_counter() - start
+
+
+def _time_first_health(db_path: str) -> float:
+    port = _free_port()
+    start = time.perf_counter()
+    server = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "src.main:app", "--port", str(port), "--log-level", "warning"],
+        cwd=BACKEND,
+        env=_env(db_path),
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.DEVNULL,
+    )
+    try:
+        while time.perf_counter() - start < TIMEOUT:
+            try:
+                if httpx.get(f"http://127.0.0.1:{port}/health", timeout=TIMEOUT).status_code == 200:
+                    return time.perf_counter() - start
+            except httpx.TransportError:
+                pass
+            time.sleep(0.01)
+        raise TimeoutError(f"/health did not answer within {TIMEOUT}s")
+    finally:
+        server.terminate()
+        server.wait()
+
+
+def main() -> None:
+    # One untimed import so .pyc files exist for every round
+    with tempfile.TemporaryDirectory() as tmp:
+        _time_import(os.path.join(tmp, "warm.db"))
+
+    imports, healths = [], []
+    for i in range(ROUNDS):
+        with tempfile.TemporaryDirectory() as tmp:
+            imports.append(_time_import(os.path.join(tmp, f"import{i}.db")))
+            healths.append(_time_first_health(os.path.join(tmp, f"health{i}.db")))
+
+    print(f"{ROUNDS} rounds (median / min)")
+    print(f"  {'import src.main':<24} {statistics.median(imports) * 1000:8.0f} ms  {min(imports) * 1000:8.0f} ms")
+    print(f"  {'spawn -> first /health':<24} {statistics.median(healths) * 1000:8.0f} ms  {min(healths) * 1000:8.0f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,104 @@
+#!/usr/bin/env python3
+"""
+Load test: read-endpoint latency while /payment/confirm calls are in flight.
+
+Measures p50/p99 of GET /health and GET /api/v1/cards twice - once on an idle
+server, once while CONFIRM_CONCURRENCY confirm requests are continuously in
+flight. Each confirm runs against a freshly initiated session with a random
+tx hash, so it passes the session check and still pays the full receipt
+round trip to the RPC node before failing with 400. If the confirm
+path blocked the event loop, the second run's p99 would jump to roughly the
+RPC latency; on the async path it should stay flat.
+
+Run against a server started with: uvicorn src.main:app
+    python benchmarks/confirm_load.py
+"""
+import asyncio
+import os
+import secrets
+import statistics
+import time
+from typing import Dict, List
+
+import httpx
+
+API_BASE = os.environ.get("API_BASE", "http://localhost:8000")
+API_KEY = os.environ.get("API_KEY", "changeme")
+CONFIRM_CONCURRENCY = int(os.environ.get("CONFIRM_CONCURRENCY", "32"))
+PROBE_REQUESTS = int(os.environ.get("PROBE_REQUESTS", "200"))
+
+headers = {"X-API-Key": API_KEY, "Content-Type": "application/json"}
+
+
+def _percentile(samples: List[float], pct: float) -> float:
+    ordered = sorted(samples)
+    index = min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))
+    return ordered[index]
+
+
+async def _probe(client: httpx.AsyncClient, path: str) -> List[float]:
+    """Sequentially hit a read endpoint and record per-request latency (ms)."""
+    samples = []
+    for _ in range(PROBE_REQUESTS):
+        start = time.perf_counter()
+        await client.get(path, headers=headers)
+        samples.append((time.perf_counter() - start) * 1000)
+    return samples
+
+
+async def _confirm_forever(client: httpx.AsyncClient, stop: asyncio.Event, counter: Dict[str, int]) -> None:
+    while not stop.is_set():
+        wallet = "0x" + secrets.token_hex(20)
+        try:
+            session = await client.post(
+                "/api/v1/payment/initiate",
+                json={"amount_usd": 1.0, "user_wallet_address": wallet},
+                headers=headers,
+            )
+            payload = {
+                "session_id": session.json()["session_id"],
+                "tx_hash": "0x" + secrets.token_hex(32),
+                "user_wallet_address": wallet,
+            }
+            await client.post("/api/v1/payment/confirm", json=payload, headers=headers)
+            counter["confirms"] += 1
+        except httpx.HTTPError:
+            counter["errors"] += 1
+
+
+def _report(label: str, path: str, samples: List[float]) -> None:
+    print(
+        f"  {label:<14} {path:<16} "
+        f"p50={statistics.median(samples):7.1f}ms  "
+        f"p99={_percentile(samples, 99):7.1f}ms  "
+        f"max={max(samples):7.1f}ms"
+    )
+
+
+async def main() -> None:
+    limits = httpx.Limits(max_connections=CONFIRM_CONCURRENCY + 8)
+    async with httpx.AsyncClient(base_url=API_BASE, timeout=60.0, limits=limits) as client:
+        print(f"Idle baseline ({PROBE_REQUESTS} requests per endpoint)...")
+        idle = {path: await _probe(client, path) for path in ("/health", "/api/v1/cards")}
+
+        print(f"Under load ({CONFIRM_CONCURRENCY} concurrent confirms)...")
+        stop = asyncio.Event()
+        counter = {"confirms": 0, "errors": 0}
+        confirmers = [
+            asyncio.create_task(_confirm_forever(client, stop, counter))
+            for _ in range(CONFIRM_CONCURRENCY)
+        ]
+        await asyncio.sleep(1.0)  # let the confirms saturate the RPC path
+        loaded = {path: await _probe(client, path) for path in ("/health", "/api/v1/cards")}
+        stop.set()
+        await asyncio.gather(*confirmers)
+
+    print()
+    for path in ("/health", "/api/v1/cards"):
+        _report("idle", path, idle[path])
+        _report("under load", path, loaded[path])
+    print(f"\n  confirms completed: {counter['confirms']}, transport errors: {counter['errors']}")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,134 @@
+#!/usr/bin/env python3
+"""
+Micro-benchmark: PaymentReceived decoding, web3 process_receipt vs services.events.
+
+Builds receipts shaped like the ones the RPC node returns (AttributeDict with
+HexBytes fields): one escrow PaymentReceived log buried among NOISE_LOGS
+ERC-20 Transfer / Approval logs from other contracts, which is what a deposit
+routed through an aggregator or a multicall looks like. Both decoders must
+agree on every receipt before anything is timed.
+
+To benchmark against real receipts instead, dump them with
+    w3.to_json(await w3.eth.get_transaction_receipt(h))
+one JSON object per line into a file and set RECEIPTS_FILE.
+
+    python benchmarks/decode_events.py
+"""
+import json
+import os
+import secrets
+import sys
+import time
+from typing import Callable, List
+
+from eth_abi import encode
+from hexbytes import HexBytes
+from web3 import Web3
+from web3.datastructures import AttributeDict
+from web3.logs import DISCARD
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from src.services.bnb import ESCROW_ABI  # noqa: E402
+from src.services.events import (  # noqa: E402
+    PAYMENT_RECEIVED_TOPIC,
+    decode_payment_received,
+    payment_received_logs,
+)
+
+ESCROW = Web3.to_checksum_address(os.environ.get("ESCROW", "0x" + "e5" * 20))
+RECEIPTS = int(os.environ.get("RECEIPTS", "200"))
+NOISE_LOGS = int(os.environ.get("NOISE_LOGS", "50"))
+ROUNDS = int(os.environ.get("ROUNDS", "5"))
+RECEIPTS_FILE = os.environ.get("RECEIPTS_FILE")
+
+TRANSFER_TOPIC = Web3.keccak(text="Transfer(address,address,uint256)")
+APPROVAL_TOPIC = Web3.keccak(text="Approval(address,address,uint256)")
+
+
+def _word(address: bytes) -> HexBytes:
+    return HexBytes(b"\x00" * 12 + address)
+
+
+def _log(address: str, topics: List[bytes], data: bytes, index: int) -> AttributeDict:
+    return AttributeDict(
+        {
+            "address":          address,
+            "topics":           [HexBytes(t) for t in topics],
+            "data":             HexBytes(data),
+            "logIndex":         index,
+            "blockNumber":      1,
+            "blockHash":        HexBytes(b"\x11" * 32),
+            "transactionHash":  HexBytes(b"\x22" * 32),
+            "transactionIndex": 0,
+            "removed":          False,
+        }
+    )
+
+
+def _synthetic_receipt() -> AttributeDict:
+    logs = []
+    for i in range(NOISE_LOGS):
+        token = Web3.to_checksum_address(secrets.token_bytes(20))
+        topic = TRANSFER_TOPIC if i % 2 else APPROVAL_TOPIC
+        logs.append(
+            _log(token, [topic, _word(secrets.token_bytes(20)), _word(secrets.token_bytes(20))],
+                 encode(["uint256"], [i]), i)
+        )
+    payer = secrets.token_bytes(20)
+    data = encode(["uint256", "string", "uint256"], [52_500_000, secrets.token_hex(18), 1_700_000_000])
+    logs.insert(NOISE_LOGS // 2, _log(ESCROW, [HexBytes(PAYMENT_RECEIVED_TOPIC), _word(payer)], data, NOISE_LOGS))
+    return AttributeDict({"status": 1, "to": ESCROW, "blockNumber": 1, "logs": logs})
+
+
+def _load_receipts() -> List[AttributeDict]:
+    with open(RECEIPTS_FILE) as fh:
+        return [
+            AttributeDict(
+                dict(
+                    r,
+                    logs=[
+                        AttributeDict(dict(log, topics=[HexBytes(t) for t in log["topics"]], data=HexBytes(log["data"])))
+                        for log in r["logs"]
+                    ],
+                )
+            )
+            for r in map(json.loads, fh)
+        ]
+
+
+def _time(label: str, fn: Callable[[AttributeDict], dict], receipts: List[AttributeDict]) -> float:
+    best = float("inf")
+    for _ in range(ROUNDS):
+        start = time.perf_counter()
+        for receipt in receipts:
+            fn(receipt)
+        best = min(best, time.perf_counter() - start)
+    per_receipt_us = best / len(receipts) * 1e6
+    print(f"  {label:<18} {per_receipt_us:9.1f} µs/receipt  (best of {ROUNDS})")
+    return per_receipt_us
+
+
+def main() -> None:
+    receipts = _load_receipts() if RECEIPTS_FILE else [_synthetic_receipt() for _ in range(RECEIPTS)]
+    event = Web3().eth.contract(address=ESCROW, abi=ESCROW_ABI).events.PaymentReceived()
+
+    def web3_path(receipt):
+        # DISCARD skips the per-mismatch warning, the cheapest the web3 path gets
+        return dict(event.process_receipt(receipt, errors=DISCARD)[0]["args"])
+
+    def fast_path(receipt):
+        return decode_payment_received(payment_received_logs(receipt["logs"], ESCROW)[0])
+
+    for receipt in receipts:
+        assert web3_path(receipt) == fast_path(receipt), "decoders disagree"
+
+    logs = sum(len(r["logs"]) for r in receipts)
+    print(f"{len(receipts)} receipts, {logs / len(receipts):.0f} logs each on average")
+    slow = _time("process_receipt", web3_path, receipts)
+    fast = _time("services.events", fast_path, receipts)
+    print(f"  speed-up: {slow / fast:.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,110 @@
+#!/usr/bin/env python3
+"""
+Micro-benchmark: GET /api/v1/cards page latency, offset vs keyset cursor.
+
+Fills a throwaway SQLite database with CARDS virtual_cards rows (spread
+over a few hundred wallets, with created_at collisions so the id
+tie-breaker matters), then fetches one page of PAGE_SIZE at increasing
+depths both ways through the real endpoint. Offset paging has to walk and
+discard every skipped row, so its latency grows with depth; a cursor page
+is an index seek and should stay flat. Both must return the same rows.
+
+    python benchmarks/list_cards.py
+    CARDS=2000000 python benchmarks/list_cards.py
+"""
+import os
+import statistics
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta, timezone
+from typing import Dict, List
+from uuid import uuid4
+
+DB_PATH = os.environ.get("DB_PATH") or os.path.join(tempfile.mkdtemp(), "list_cards.db")
+os.environ["DATABASE_URL"] = f"sqlite:///{DB_PATH}"
+os.environ.setdefault("API_KEY", "bench")
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from fastapi.testclient import TestClient  # noqa: E402
+from sqlmodel import SQLModel  # noqa: E402
+
+from src.database import engine  # noqa: E402
+from src.main import _encode_cursor, app  # noqa: E402
+from src.models import VirtualCard  # noqa: E402
+
+CARDS = int(os.environ.get("CARDS", "500000"))
+PAGE_SIZE = int(os.environ.get("PAGE_SIZE", "100"))
+ROUNDS = int(os.environ.get("ROUNDS", "5"))
+WALLETS = 300
+BATCH = 20_000
+
+headers = {"X-API-Key": os.environ["API_KEY"]}
+
+
+def _populate() -> None:
+    SQLModel.metadata.create_all(engine)
+    start = datetime(2025, 1, 1, tzinfo=timezone.utc)
+    table = VirtualCard.__table__
+    with engine.begin() as conn:
+        for base in range(0, CARDS, BATCH):
+            rows: List[Dict] = []
+            for i in range(base, min(base + BATCH, CARDS)):
+                created = start + timedelta(seconds=i // 3)  # three cards per second
+                rows.append({
+                    "id": str(uuid4()),
+                    "tx_hash": f"0x{i:064x}",
+                    "user_wallet_address": f"0x{i % WALLETS:040x}",
+                    "amount_cents": 1000,
+                    "card_state": "OPEN" if i % 4 else "CLOSED",
+                    "created_at": created,
+                    "updated_at": created,
+                })
+            conn.execute(table.insert(), rows)
+
+
+def _time(client: TestClient, params: Dict) -> float:
+    samples = []
+    for _ in range(ROUNDS):
+        start = time.perf_counter()
+        response = client.get("/api/v1/cards", params=params, headers=headers)
+        samples.append((time.perf_counter() - start) * 1000)
+        response.raise_for_status()
+    return statistics.median(samples)
+
+
+def main() -> None:
+    print(f"populating {CARDS:,} cards in {DB_PATH} ...")
+    _populate()
+    client = TestClient(app)
+
+    print(f"{'depth':>10} {'offset ms':>10} {'cursor ms':>10}")
+    depth = PAGE_SIZE
+    while depth < CARDS:
+        offset_page = client.get(
+            "/api/v1/cards", params={"limit": PAGE_SIZE, "offset": depth}, headers=headers
+        ).json()
+        # The cursor for this page is the row just before it - look it up untimed
+        previous = client.get(
+            "/api/v1/cards", params={"limit": 1, "offset": depth - 1}, headers=headers
+        ).json()[0]
+        cursor = _encode_cursor(
+            VirtualCard(id=previous["id"], created_at=datetime.fromisoformat(previous["created_at"]), tx_hash="", amount_cents=0)
+        )
+        cursor_page = client.get(
+            "/api/v1/cards", params={"limit": PAGE_SIZE, "cursor": cursor}, headers=headers
+        ).json()
+        assert [c["id"] for c in offset_page] == [c["id"] for c in cursor_page], "pages differ"
+
+        offset_ms = _time(client, {"limit": PAGE_SIZE, "offset": depth})
+        cursor_ms = _time(client, {"limit": PAGE_SIZE, "cursor": cursor})
+        print(f"{depth:>10,} {offset_ms:>10.2f} {cursor_ms:>10.2f}")
+        depth *= 10
+
+    wallet = f"0x{7:040x}"
+    print(f"wallet filter, first page: {_time(client, {'limit': PAGE_SIZE, 'wallet': wallet}):.2f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,150 @@
+#!/usr/bin/env python3
+"""
+Micro-benchmark: serializing a page of cards, Pydantic models vs the fast path.
+
+Both routes below serve the same ROWS in-memory rows (shaped like
+_card_query results, so the database is out of the picture):
+
+  models  - the previous path: nested Pydantic models per row, returned
+            with response_model=List[VirtualCardResponse], so FastAPI
+            validates and serializes them again
+  fast    - main._card_dict + responses.json_response (orjson, no
+            response-model pass), uncompressed and with gzip
+
+Bodies must decode to the same JSON before anything is timed.
+
+    python benchmarks/serialize_cards.py
+"""
+import json
+import os
+import statistics
+import sys
+import time
+from datetime import datetime, timedelta, timezone
+from types import SimpleNamespace
+from typing import List
+
+os.environ.setdefault("API_KEY", "bench")
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from fastapi import FastAPI, Request  # noqa: E402
+from fastapi.testclient import TestClient  # noqa: E402
+
+from src.main import (  # noqa: E402
+    AuthorizationInfo,
+    CardInfoResponse,
+    ClearingInfo,
+    VirtualCardResponse,
+    _card_dict,
+)
+from src.responses import json_response  # noqa: E402
+
+ROWS = int(os.environ.get("ROWS", "10000"))
+ROUNDS = int(os.environ.get("ROUNDS", "5"))
+
+
+def _rows() -> List[SimpleNamespace]:
+    start = datetime(2025, 1, 1, tzinfo=timezone.utc)
+    rows = []
+    for i in range(ROWS):
+        created = start + timedelta(seconds=i)
+        authorized = i % 2 == 0
+        rows.append(SimpleNamespace(
+            id=f"{i:08x}-0000-4000-8000-000000000000",
+            tx_hash=f"0x{i:064x}",
+            session_id=f"{i:032x}",
+            amount_cents=1_000 + i,
+            spend_limit_cents=1_050 + i,
+            merchant_name="Example Merchant",
+            lithic_card_token=f"{i:08x}-card",
+            last_four=f"{i % 10_000:04d}",
+            exp_month="03",
+            exp_year="2030",
+            card_state="OPEN",
+            created_at=created,
+            updated_at=created,
+            authorization_token=f"auth-{i}" if authorized else None,
+            authorization_amount_cents=1_000 if authorized else None,
+            authorized_at=created if authorized else None,
+            cleared=authorized,
+            cleared_amount_cents=1_000 if authorized else None,
+            cleared_at=created if authorized else None,
+            clearing_debug_id=None,
+        ))
+    return rows
+
+
+def _model(row) -> VirtualCardResponse:
+    """The per-row model construction the card routes used before the fast path."""
+    return VirtualCardResponse(
+        id=row.id,
+        tx_hash=row.tx_hash,
+        session_id=row.session_id,
+        amount_cents=row.amount_cents,
+        spend_limit_cents=row.spend_limit_cents,
+        merchant_name=row.merchant_name,
+        card=CardInfoResponse(
+            token=row.lithic_card_token,
+            last_four=row.last_four,
+            exp_month=row.exp_month,
+            exp_year=row.exp_year,
+            state=row.card_state,
+        ) if row.lithic_card_token else None,
+        authorization=AuthorizationInfo(
+            token=row.authorization_token,
+            amount_cents=row.authorization_amount_cents,
+            authorized_at=row.authorized_at,
+        ) if row.authorization_token else None,
+        clearing=ClearingInfo(
+            cleared=row.cleared,
+            amount_cents=row.cleared_amount_cents,
+            cleared_at=row.cleared_at,
+            debug_id=row.clearing_debug_id,
+        ),
+        created_at=row.created_at,
+        updated_at=row.updated_at,
+    )
+
+
+def _app(rows) -> FastAPI:
+    app = FastAPI()
+
+    @app.get("/models", response_model=List[VirtualCardResponse])
+    def models():
+        return [_model(row) for row in rows]
+
+    @app.get("/fast", response_model=List[VirtualCardResponse])
+    def fast(request: Request):
+        return json_response(request, [_card_dict(row) for row in rows])
+
+    return app
+
+
+def _time(client: TestClient, path: str, encoding: str) -> float:
+    samples = []
+    for _ in range(ROUNDS):
+        start = time.perf_counter()
+        client.get(path, headers={"Accept-Encoding": encoding}).raise_for_status()
+        samples.append((time.perf_counter() - start) * 1000)
+    return statistics.median(samples)
+
+
+def main() -> None:
+    client = TestClient(_app(_rows()))
+
+    identity = client.get("/fast", headers={"Accept-Encoding": "identity"})
+    gzipped = client.get("/fast", headers={"Accept-Encoding": "gzip"})
+    assert json.loads(identity.content) == client.get("/models").json(), "bodies differ"
+    wire = int(gzipped.headers.get("content-length", 0))
+
+    print(f"{ROWS:,} cards, {len(identity.content) / 1024:.0f} KiB JSON ({wire / 1024:.0f} KiB gzipped)")
+    slow = _time(client, "/models", "identity")
+    fast = _time(client, "/fast", "identity")
+    print(f"  {'pydantic + response_model':<28} {slow:8.1f} ms")
+    print(f"  {'_card_dict + orjson':<28} {fast:8.1f} ms   ({slow / fast:.1f}x)")
+    print(f"  {'_card_dict + orjson + gzip':<28} {_time(client, '/fast', 'gzip'):8.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,5 +1,5 @@
 """Application configuration using Pydantic Settings."""
-from typing import Literal
+from typing import List, Literal
 
 from pydantic_settings import BaseSettings, SettingsConfigDict
 
@@ -9,14 +9,27 @@ class Settings(BaseSettings):
 
     # API Security
     api_key: str = "changeme"
+    # X-Admin-Key for /admin/* and X-Profile; empty = admin endpoints disabled
+    admin_api_key: str = ""
 
     # Lithic Configuration
     lithic_api_key: str = ""
     lithic_environment: Literal["sandbox", "production"] = "sandbox"
     lithic_webhook_secret: str = ""
+    lithic_timeout_seconds: float = 15.0
+    lithic_max_connections: int = 50
+    lithic_max_keepalive_connections: int = 20
+    lithic_max_retries: int = 4                  # on 429 / 5xx / connection errors
+    lithic_backoff_base_seconds: float = 0.25    # full jitter: sleep U(0, base * 2^attempt)
+    lithic_backoff_max_seconds: float = 8.0
+    # Client-side token bucket, kept just under the account's API ceiling (0 = off)
+    lithic_rate_limit_per_second: float = 20.0
+    lithic_rate_limit_burst: int = 20
 
     # Arbitrum Sepolia Configuration
     arb_rpc_url: str = "https://arbitrum-sepolia-testnet.api.pocket.network"
+    # Comma-separated RPC URLs for the failover pool; empty = just arb_rpc_url
+    arb_rpc_urls: str = ""
     arb_chain_id: int = 421614
     # Platform wallet private key (hex, with or without 0x) - used to send refunds
     arb_platform_private_key: str = ""
@@ -25,13 +38,125 @@ class Settings(BaseSettings):
     # Deployed MockUSDC contract address (0x...)
     usdc_contract: str = ""
 
+    # RPC pool (see services/rpc.py)
+    rpc_timeout_seconds: float = 10.0
+    rpc_max_connections_per_endpoint: int = 32
+    rpc_hedge_reads: bool = True
+    rpc_hedge_min_delay_seconds: float = 0.05   # floor under the primary's p95
+    rpc_failure_cooldown_seconds: float = 30.0
+
+    # Blocks a deposit must be under, its own included, before confirm accepts
+    # it - on the live receipt path and the indexed path alike (1 = mined)
+    deposit_min_confirmations: int = 1
+
+    # Receipt cache for verify_payment (finalized deposits only)
+    receipt_cache_max_entries: int = 4_096
+    receipt_cache_ttl_seconds: float = 3_600.0
+    finalized_block_ttl_seconds: float = 10.0
+
+    # Payment sessions
+    session_ttl_seconds: int = 600
+    session_cache_max_entries: int = 10_000
+    session_sweep_interval_seconds: float = 60.0
+    session_retention_seconds: int = 86_400    # expired, unused sessions are deleted after this
+
+    # Warm pool of PAUSED Lithic cards claimed by confirm (0 = disabled)
+    card_pool_target_size: int = 0
+    card_pool_refill_concurrency: int = 4
+    card_pool_refill_interval_seconds: float = 5.0
+
+    # POST /payment/confirm/batch
+    confirm_batch_max_items: int = 50
+    confirm_batch_card_concurrency: int = 8    # Lithic card creations in flight per batch
+
+    # Escrow event indexer (PaymentReceived / Refunded -> local tables)
+    indexer_enabled: bool = True
+    indexer_start_block: int = 0           # 0 = start indexer_initial_lookback_blocks behind head
+    indexer_initial_lookback_blocks: int = 20_000
+    indexer_block_range: int = 2_000       # max blocks per eth_getLogs call
+    indexer_reorg_depth: int = 64          # blocks to rewind when the cursor's block hash changes
+    indexer_poll_interval_seconds: float = 1.0
+
+    # Lithic webhook inbox
+    webhook_workers: int = 8                  # cards processed concurrently
+    webhook_poll_interval_seconds: float = 1.0
+    webhook_max_attempts: int = 5
+    webhook_backoff_max_seconds: float = 300.0
+
+    # Fast JSON responses (src/responses.py) - list endpoints
+    response_compress_min_bytes: int = 1_024
+    response_gzip_level: int = 6
+    response_brotli_quality: int = 4          # br needs the optional brotli package
+
+    # GET /api/v1/cards/export
+    export_batch_rows: int = 1_000            # rows fetched + encoded per chunk
+
+    # Tracing (src/tracing.py) - needs the optional `tracing` extra
+    tracing_exporter: Literal["", "otlp", "file", "console"] = ""   # "" = off
+    tracing_otlp_endpoint: str = "http://localhost:4318/v1/traces"
+    tracing_file_path: str = "traces.jsonl"
+    tracing_service_name: str = "clawpay-backend"
+    tracing_sample_ratio: float = 1.0          # of new traces; incoming sampled traces are always kept
+
+    # Health prober - GET /readyz serves its last result (src/services/health.py)
+    health_probe_interval_seconds: float = 10.0
+    health_probe_timeout_seconds: float = 5.0      # per check
+    health_stale_after_seconds: float = 30.0       # /readyz fails when the last probe is older
+
+    # Sampling profiler (src/profiler.py)
+    profile_interval_ms: float = 5.0
+    profile_max_seconds: float = 60.0
+    profile_keep: int = 32                     # per-request profiles kept for GET /admin/profiles/{id}
+    profile_keep_seconds: float = 900.0
+
     # Database
     database_url: str = "sqlite:///./clawpay.db"
+    # Async routes use the same database through an asyncio driver
+    # (aiosqlite / asyncpg); set this only to override the derived URL
+    async_database_url: str = ""
+    # Optional read replica for read-only routes (card listings, export, stats)
+    database_replica_url: str = ""
+    # Connection pool - applied to each engine (sync, async, replica), not SQLite
+    db_pool_size: int = 10
+    db_max_overflow: int = 20
+    db_pool_timeout_seconds: float = 30.0
+    db_pool_recycle_seconds: int = 1_800
+    db_pool_pre_ping: bool = True
+    # SQLite pragmas, applied to every new connection
+    sqlite_journal_mode: str = "wal"
+    sqlite_synchronous: str = "normal"          # safe with WAL; "full" to fsync every commit
+    sqlite_busy_timeout_ms: int = 5_000
+    sqlite_mmap_size_bytes: int = 268_435_456   # 256 MiB, 0 = off
+    sqlite_cache_size_kib: int = 65_536
+
+    # Refund worker (drains refund jobs queued by the settlement webhook)
+    refund_workers: int = 16
+    refund_poll_interval_seconds: float = 2.0
+    refund_receipt_timeout_seconds: float = 60.0
+    refund_max_attempts: int = 6
+    refund_backoff_base_seconds: float = 5.0
+    refund_backoff_max_seconds: float = 600.0
+    # >1 aggregates refunds into one escrow batchRefund() tx (needs the
+    # contract version that has batchRefund deployed)
+    refund_batch_max_size: int = 1
+    refund_batch_window_seconds: float = 3.0
+
+    # Platform wallet nonce management
+    nonce_stuck_after_seconds: float = 90.0
+    nonce_fee_bump_percent: int = 15
+    nonce_gap_fill_after_seconds: float = 30.0
+    nonce_maintenance_interval_seconds: float = 15.0
+    gas_price_ttl_seconds: float = 2.0
 
     # Server
     host: str = "0.0.0.0"
     port: int = 8000
 
+    @property
+    def rpc_urls(self) -> List[str]:
+        urls = [url.strip() for url in self.arb_rpc_urls.split(",") if url.strip()]
+        return urls or [self.arb_rpc_url]
+
     model_config = SettingsConfigDict(
         env_file=".env",
         env_file_encoding="utf-8",
@@ -0,0 +1,129 @@
+"""Database engines and session dependencies (sync and asyncio)."""
+from functools import lru_cache
+from typing import Any, AsyncIterator, Callable, Dict, TypeVar, Union
+
+from fastapi.concurrency import run_in_threadpool
+from sqlalchemy import event
+from sqlalchemy.engine import Engine, make_url
+from sqlalchemy.ext.asyncio import AsyncEngine, create_async_engine
+from sqlmodel import Session, create_engine
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+from . import tracing
+from .config import settings
+
+T = TypeVar("T")
+
+# What the session-taking helpers accept: a request's sync or async session
+AnySession = Union[Session, AsyncSession]
+
+
+def _is_sqlite(url: str) -> bool:
+    return make_url(url).get_backend_name() == "sqlite"
+
+
+def _engine_options(url: str) -> Dict[str, Any]:
+    """Pool sizing for server databases; SQLite keeps SQLAlchemy's defaults and gets pragmas instead."""
+    if _is_sqlite(url):
+        return {"connect_args": {"check_same_thread": False}}
+    return {
+        "pool_size": settings.db_pool_size,
+        "max_overflow": settings.db_max_overflow,
+        "pool_timeout": settings.db_pool_timeout_seconds,
+        "pool_recycle": settings.db_pool_recycle_seconds,
+        "pool_pre_ping": settings.db_pool_pre_ping,
+    }
+
+
+def _sqlite_pragmas(dbapi_connection: Any, _connection_record: Any) -> None:
+    """
+    Per-connection SQLite tuning. WAL lets readers run alongside the single
+    writer, and busy_timeout makes a writer wait for the lock instead of
+    failing with "database is locked" when the webhook inbox, the refund
+    worker and confirms commit at the same time.
+    """
+    cursor = dbapi_connection.cursor()
+    for pragma in (
+        f"PRAGMA journal_mode={settings.sqlite_journal_mode}",
+        f"PRAGMA synchronous={settings.sqlite_synchronous}",
+        f"PRAGMA busy_timeout={int(settings.sqlite_busy_timeout_ms)}",
+        f"PRAGMA mmap_size={int(settings.sqlite_mmap_size_bytes)}",
+        f"PRAGMA cache_size=-{int(settings.sqlite_cache_size_kib)}",  # negative = KiB
+    ):
+        cursor.execute(pragma)
+    cursor.close()
+
+
+def _create_engine(url: str) -> Engine:
+    created = create_engine(url, echo=False, **_engine_options(url))
+    if _is_sqlite(url):
+        event.listen(created, "connect", _sqlite_pragmas)
+    return created
+
+
+engine = _create_engine(settings.database_url)
+
+# Read-only routes (card listings, export, stats) can go to a replica; without
+# one configured this is the primary engine. Replicas lag - anything that
+# must see a write it just made reads from `engine`.
+read_engine = _create_engine(settings.database_replica_url) if settings.database_replica_url else engine
+
+
+def async_database_url() -> str:
+    """DATABASE_URL with its asyncio driver: aiosqlite for SQLite, asyncpg for Postgres."""
+    if settings.async_database_url:
+        return settings.async_database_url
+    url = make_url(settings.database_url)
+    backend = url.get_backend_name()
+    if backend == "sqlite":
+        url = url.set(drivername="sqlite+aiosqlite")
+    elif backend == "postgresql":
+        url = url.set(drivername="postgresql+asyncpg")
+    return url.render_as_string(hide_password=False)
+
+
+@lru_cache(maxsize=None)
+def get_async_engine() -> AsyncEngine:
+    """Created on first use, so processes that never touch the async routes don't load the driver."""
+    url = async_database_url()
+    created = create_async_engine(url, echo=False, **_engine_options(url))
+    if _is_sqlite(url):
+        event.listen(created.sync_engine, "connect", _sqlite_pragmas)
+    tracing.instrument_engine(created.sync_engine)
+    return created
+
+
+def get_db():
+    with Session(engine) as session:
+        yield session
+
+
+def get_read_db():
+    with Session(read_engine) as session:
+        yield session
+
+
+async def get_async_db() -> AsyncIterator[AsyncSession]:
+    # expire_on_commit=False: attribute access after commit must not trigger IO
+    async with AsyncSession(get_async_engine(), expire_on_commit=False) as session:
+        yield session
+
+
+async def run_db(db: AnySession, fn: Callable[..., T], *args: Any, **kwargs: Any) -> T:
+    """
+    Run a sync DB helper fn(session, *args) from async code without blocking
+    the event loop - on the async driver via AsyncSession.run_sync, or in
+    the threadpool for a plain Session. Lets one helper serve sync routes,
+    async routes and background workers alike.
+    """
+    if isinstance(db, AsyncSession):
+        return await db.run_sync(fn, *args, **kwargs)
+    return await run_in_threadpool(fn, db, *args, **kwargs)
+
+
+async def dispose_engines() -> None:
+    if get_async_engine.cache_info().currsize:
+        await get_async_engine().dispose()
+    engine.dispose()
+    if read_engine is not engine:
+        read_engine.dispose()
@@ -0,0 +1,61 @@
+"""Keyed serial executor - concurrent across keys, strictly ordered within one."""
+import asyncio
+import logging
+from collections import deque
+from typing import Awaitable, Callable, Deque, Dict, Hashable
+
+logger = logging.getLogger(__name__)
+
+
+class KeyedSerialExecutor:
+    """
+    Runs submitted coroutines so that jobs with the same key run one at a
+    time in submission order, while jobs with different keys run
+    concurrently - at most `concurrency` of them at once.
+
+    Each key with work has one drain task; it exits when the key's queue is
+    empty, so idle keys cost nothing. A job that raises is logged and the
+    key moves on to its next job. Event loop only.
+    """
+
+    def __init__(self, concurrency: int) -> None:
+        self._slots = asyncio.Semaphore(concurrency)
+        self._queues: Dict[Hashable, Deque[Callable[[], Awaitable[None]]]] = {}
+        self._drains: Dict[Hashable, asyncio.Task] = {}
+
+    def submit(self, key: Hashable, job: Callable[[], Awaitable[None]]) -> None:
+        self._queues.setdefault(key, deque()).append(job)
+        if key not in self._drains:
+            self._drains[key] = asyncio.create_task(self._drain(key))
+
+    @property
+    def pending(self) -> int:
+        """Jobs submitted but not finished (queued + running)."""
+        return sum(len(queue) for queue in self._queues.values())
+
+    @property
+    def active_keys(self) -> int:
+        return len(self._drains)
+
+    async def shutdown(self) -> None:
+        tasks = list(self._drains.values())
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        self._drains.clear()
+        self._queues.clear()
+
+    async def _drain(self, key: Hashable) -> None:
+        queue = self._queues[key]
+        try:
+            while queue:
+                async with self._slots:
+                    try:
+                        await queue[0]()
+                    except Exception:
+                        logger.exception(f"Job for key {key!r} failed")
+                queue.popleft()
+        finally:
+            self._drains.pop(key, None)
+            if not queue:
+                self._queues.pop(key, None)
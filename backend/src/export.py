@@ -0,0 +1,106 @@
+"""Streaming card-ledger export (NDJSON / CSV) for GET /api/v1/cards/export."""
+import csv
+import io
+from datetime import datetime
+from typing import Any, Dict, Iterator, List, Optional
+
+from sqlalchemy import select
+
+from .config import settings
+from .database import read_engine
+from .models import CardLifecycle, RefundJob, VirtualCard, as_utc
+from .responses import dumps
+
+# Exportable columns, in default order. PAN / CVV are never exported.
+EXPORT_COLUMNS: Dict[str, Any] = {
+    "id":                         VirtualCard.id,
+    "created_at":                 VirtualCard.created_at,
+    "updated_at":                 VirtualCard.updated_at,
+    "tx_hash":                    VirtualCard.tx_hash,
+    "session_id":                 VirtualCard.session_id,
+    "user_wallet_address":        VirtualCard.user_wallet_address,
+    "merchant_name":              VirtualCard.merchant_name,
+    "amount_cents":               VirtualCard.amount_cents,
+    "spend_limit_cents":          VirtualCard.spend_limit_cents,
+    "usdc_paid":                  VirtualCard.usdc_paid,
+    "lithic_card_token":          VirtualCard.lithic_card_token,
+    "last_four":                  VirtualCard.last_four,
+    "card_state":                 VirtualCard.card_state,
+    "authorization_token":        CardLifecycle.authorization_token,
+    "authorization_amount_cents": CardLifecycle.authorization_amount_cents,
+    "authorized_at":              CardLifecycle.authorized_at,
+    "cleared":                    CardLifecycle.cleared,
+    "cleared_amount_cents":       CardLifecycle.cleared_amount_cents,
+    "cleared_at":                 CardLifecycle.cleared_at,
+    "actual_charged_cents":       VirtualCard.actual_charged_cents,
+    "refund_amount_cents":        VirtualCard.refund_amount_cents,
+    "refund_status":              RefundJob.status,
+    "refund_tx":                  VirtualCard.refund_tx,
+    "refunded_at":                VirtualCard.refunded_at,
+}
+
+MEDIA_TYPES = {"ndjson": "application/x-ndjson", "csv": "text/csv"}
+
+
+def parse_columns(columns: Optional[str]) -> List[str]:
+    """Comma-separated column names -> list; raises ValueError on an unknown name."""
+    if not columns:
+        return list(EXPORT_COLUMNS)
+    names = [name.strip() for name in columns.split(",") if name.strip()]
+    unknown = [name for name in names if name not in EXPORT_COLUMNS]
+    if unknown or not names:
+        raise ValueError(f"Unknown columns: {', '.join(unknown) or '(none given)'}")
+    return names
+
+
+def export_cards(
+    columns: List[str],
+    fmt: str,
+    created_after: Optional[datetime] = None,
+    created_before: Optional[datetime] = None,
+) -> Iterator[bytes]:
+    """
+    Yield the card ledger as NDJSON or CSV, oldest first.
+
+    Rows come from a server-side cursor (stream_results) EXPORT_BATCH_ROWS
+    at a time and each batch is encoded and yielded before the next is
+    fetched, so memory stays flat however many cards there are. The
+    generator owns its connection (on the read replica, if configured) - it
+    outlives the request's DB session - and is meant to be consumed from a
+    thread (StreamingResponse does that for sync iterators).
+    """
+    stmt = (
+        select(*(EXPORT_COLUMNS[name] for name in columns))
+        .select_from(VirtualCard)
+        .outerjoin(CardLifecycle, CardLifecycle.card_id == VirtualCard.id)
+        .outerjoin(RefundJob, RefundJob.card_id == VirtualCard.id)
+        .order_by(VirtualCard.created_at, VirtualCard.id)
+    )
+    if created_after:
+        stmt = stmt.where(VirtualCard.created_at >= created_after)
+    if created_before:
+        stmt = stmt.where(VirtualCard.created_at < created_before)
+
+    encode = _ndjson_batch if fmt == "ndjson" else _csv_batch
+    if fmt == "csv":
+        yield _csv_batch(columns, [columns])
+
+    with read_engine.connect() as conn:
+        result = conn.execution_options(stream_results=True).execute(stmt)
+        for batch in result.partitions(settings.export_batch_rows):
+            yield encode(columns, batch)
+
+
+def _ndjson_batch(columns: List[str], rows: List[Any]) -> bytes:
+    return b"".join(dumps(dict(zip(columns, row))) + b"\n" for row in rows)
+
+
+def _csv_batch(columns: List[str], rows: List[Any]) -> bytes:
+    buffer = io.StringIO()
+    writer = csv.writer(buffer, lineterminator="\n")
+    for row in rows:
+        writer.writerow(
+            as_utc(value).isoformat().replace("+00:00", "Z") if isinstance(value, datetime) else value
+            for value in row
+        )
+    return buffer.getvalue().encode()
@@ -7,47 +7,57 @@ Payment flow:
   3. POST /api/v1/payment/confirm   → verifies PaymentReceived event, issues Lithic card
   4. Lithic webhook fires on settlement → unused buffer refunded as MockUSDC
 """
+import asyncio
+import base64
 import hashlib
 import hmac
+import json
 import logging
 import os
+from contextlib import asynccontextmanager, suppress
 from datetime import datetime, timedelta, timezone
-from typing import Any, Dict, List, Optional
+from typing import TYPE_CHECKING, Any, AsyncIterator, Dict, List, Literal, Optional, Tuple
 from uuid import uuid4
 
-from fastapi import Depends, FastAPI, HTTPException, Request, status
+from fastapi import Depends, FastAPI, HTTPException, Query, Request, Response, status
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import FileResponse
+from fastapi.responses import FileResponse, JSONResponse, StreamingResponse
 from fastapi.security import APIKeyHeader
 from fastapi.staticfiles import StaticFiles
 from pydantic import BaseModel, Field
-from sqlmodel import Session, SQLModel, create_engine, select
+from sqlalchemy import tuple_
+from sqlmodel import Session, SQLModel, select
+from sqlmodel.ext.asyncio.session import AsyncSession
 
+from . import export, metrics, profiler, tracing
 from .config import settings
-from .models import VirtualCard
-from .services.lithic import lithic_service
-from .services.bnb import arb_service, usd_to_usdc, usdc_to_usd, cents_to_usdc
-
-logger = logging.getLogger(__name__)
-
-# ─────────────────────────────────────────────
-# Database
-# ─────────────────────────────────────────────
-
-engine = create_engine(
-    settings.database_url,
-    echo=False,
-    connect_args=(
-        {"check_same_thread": False}
-        if settings.database_url.startswith("sqlite")
-        else {}
-    ),
+from .database import AnySession, dispose_engines, engine, get_async_db, get_read_db, read_engine, run_db
+from .metrics import CARDS_ISSUED, STAGE_SECONDS, VERIFICATION_FAILURES
+from .models import (
+    CardLifecycle,
+    CardSecret,
+    PaymentEvent,
+    PaymentSession,
+    SessionStatus,
+    VirtualCard,
+    as_utc,
+    utc_now,
 )
+from .responses import json_response
+from .services import arb_service, escrow_indexer, lithic_service, rollups
+from .services.card_pool import card_pool
+from .services.health import health_prober
+from .services.refunds import refund_worker
+from .services.sessions import session_store
+from .services.usdc import usd_to_usdc, usdc_to_usd
+from .services.webhooks import webhook_inbox
+
+if TYPE_CHECKING:
+    from .services.bnb import ArbitrumService
+    from .services.indexer import EscrowIndexer
+    from .services.lithic import LithicService
 
-
-def get_db():
-    with Session(engine) as session:
-        yield session
+logger = logging.getLogger(__name__)
 
 
 # ─────────────────────────────────────────────
@@ -62,6 +72,16 @@ def verify_api_key(x_api_key: Optional[str] = Depends(api_key_header)) -> None:
         raise HTTPException(status.HTTP_401_UNAUTHORIZED, detail="Invalid or missing API key")
 
 
+admin_key_header = APIKeyHeader(name="X-Admin-Key", auto_error=False)
+
+
+def verify_admin_key(x_admin_key: Optional[str] = Depends(admin_key_header)) -> None:
+    if not settings.admin_api_key:
+        raise HTTPException(status.HTTP_404_NOT_FOUND, detail="Not Found")  # admin endpoints off
+    if not x_admin_key or not hmac.compare_digest(x_admin_key, settings.admin_api_key):
+        raise HTTPException(status.HTTP_401_UNAUTHORIZED, detail="Invalid or missing admin key")
+
+
 # ─────────────────────────────────────────────
 # Pydantic schemas
 # ─────────────────────────────────────────────
@@ -90,6 +110,15 @@ class ConfirmPaymentRequest(BaseModel):
     user_wallet_address: str = Field(..., description="User's EVM wallet address (for refunds)")
 
 
+class ConfirmPaymentBatchRequest(BaseModel):
+    items: List[ConfirmPaymentRequest] = Field(
+        ...,
+        min_length=1,
+        max_length=settings.confirm_batch_max_items,
+        description="Deposits to confirm - one card is issued per item",
+    )
+
+
 class CardInfoResponse(BaseModel):
     token: Optional[str] = None
     last_four: Optional[str] = None
@@ -151,10 +180,71 @@ class SimulateClearingResponse(BaseModel):
 # App
 # ─────────────────────────────────────────────
 
+
+def _build_services() -> None:
+    for service in (arb_service, lithic_service, escrow_indexer):
+        service.get()
+
+
+async def _start_services() -> None:
+    """Build the chain / Lithic services off the event loop, then start the workers that use them."""
+    try:
+        await asyncio.to_thread(_build_services)
+    except Exception:
+        logger.exception("Service startup failed - routes will retry on first use")
+        return
+    card_pool.start()
+    refund_worker.start()
+    escrow_indexer.get().start()
+    health_prober.wake()
+    logger.info(
+        f"ClawPay services ready - chain: Arbitrum Sepolia ({settings.arb_chain_id}), "
+        f"escrow: {settings.arb_escrow_contract or 'NOT SET'}, "
+        f"usdc: {settings.usdc_contract or 'NOT SET'}"
+    )
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI) -> AsyncIterator[None]:
+    """
+    Startup does only what /health needs - tables, tracing, the session and
+    webhook workers - then builds the web3 / Lithic services in the
+    background, so the first response doesn't wait on them.
+    """
+    SQLModel.metadata.create_all(engine)
+    if tracing.setup():
+        tracing.instrument_engine(engine)
+        tracing.instrument_engine(read_engine)
+    session_store.start()
+    webhook_inbox.start()
+    health_prober.start()
+    services = asyncio.create_task(_start_services())
+
+    yield
+
+    services.cancel()
+    with suppress(asyncio.CancelledError):
+        await services
+    await health_prober.stop()
+    indexer = escrow_indexer.peek()
+    if indexer is not None:
+        await indexer.stop()
+    await webhook_inbox.stop()
+    await refund_worker.stop()
+    await session_store.stop()
+    await card_pool.stop()
+    arb = arb_service.peek()
+    if arb is not None:
+        await arb.close()
+    await dispose_engines()
+    tracing.shutdown()
+
+
 app = FastAPI(
     title="ClawPay API",
     description="Arbitrum Sepolia → Lithic virtual card bridge",
     version="2.0.0",
+    lifespan=lifespan,
 )
 
 app.add_middleware(
@@ -163,23 +253,16 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["X-Next-Cursor", "X-Profile-Id"],
 )
+app.add_middleware(profiler.ProfileRequestMiddleware)   # X-Profile: 1 + X-Admin-Key
+app.add_middleware(tracing.TracingMiddleware)   # no-op unless TRACING_EXPORTER is set
 
 static_path = os.path.join(os.path.dirname(os.path.dirname(__file__)), "static")
 if os.path.exists(static_path):
     app.mount("/static", StaticFiles(directory=static_path), name="static")
 
 
-@app.on_event("startup")
-def on_startup() -> None:
-    SQLModel.metadata.create_all(engine)
-    logger.info(
-        f"ClawPay started - chain: Arbitrum Sepolia ({settings.arb_chain_id}), "
-        f"escrow: {settings.arb_escrow_contract or 'NOT SET'}, "
-        f"usdc: {settings.usdc_contract or 'NOT SET'}"
-    )
-
-
 # ─────────────────────────────────────────────
 # Health
 # ─────────────────────────────────────────────
@@ -191,19 +274,91 @@ def root():
     return FileResponse(p) if os.path.exists(p) else {"message": "ClawPay API", "docs": "/docs"}
 
 
+@app.get("/livez", tags=["Health"])
+async def liveness() -> Dict[str, str]:
+    """Liveness: the process is serving requests. No dependency is checked."""
+    return {"status": "ok"}
+
+
+@app.get("/readyz", tags=["Health"])
+async def readiness() -> JSONResponse:
+    """
+    Readiness from the background prober's last result - no I/O per call.
+    200 while ready (status ok or degraded), 503 while starting, stale or
+    without a database.
+    """
+    result = health_prober.status()
+    return JSONResponse(result, status_code=200 if result["ready"] else 503)
+
+
 @app.get("/health", tags=["Health"])
-def health_check():
+async def health_check():
+    # Chain / Lithic fields stay null until the lifespan has built those services;
+    # rpc_connected is the prober's last result, not a live call
+    arb, lithic = arb_service.peek(), lithic_service.peek()
     return {
         "status": "ok",
+        "services_ready": arb is not None and lithic is not None,
         "chain": f"Arbitrum Sepolia ({settings.arb_chain_id})",
-        "rpc_connected": arb_service.is_connected(),
+        "rpc_connected": health_prober.rpc_connected(),
         "escrow_contract": settings.arb_escrow_contract or "not configured",
         "usdc_contract": settings.usdc_contract or "not configured",
         "lithic_environment": settings.lithic_environment,
+        "rpc": arb.rpc.stats() if arb else None,
+        "receipt_cache": arb.receipt_cache.stats() if arb else None,
+        "card_pool": card_pool.stats() if lithic else None,
+        "lithic": lithic.stats() if lithic else None,
+        "webhook_inbox": webhook_inbox.stats(),
+        "readiness": health_prober.status(),
         "timestamp": datetime.utcnow().isoformat(),
     }
 
 
+@app.get("/metrics", tags=["Health"], include_in_schema=False)
+async def prometheus_metrics() -> Response:
+    """Stage / outbound-call latency histograms and flow counters, Prometheus text format."""
+    return Response(metrics.render(), media_type=metrics.CONTENT_TYPE)
+
+
+# ─────────────────────────────────────────────
+# Admin - profiling
+# ─────────────────────────────────────────────
+
+
+@app.get(
+    "/admin/profile",
+    tags=["Admin"],
+    include_in_schema=False,
+    dependencies=[Depends(verify_admin_key)],
+)
+async def profile_process(
+    seconds: float = Query(10.0, gt=0, le=settings.profile_max_seconds),
+    interval_ms: float = Query(settings.profile_interval_ms, ge=1, le=1_000),
+) -> Response:
+    """
+    Sample every thread of this worker for `seconds` and return collapsed
+    stacks (feed them to flamegraph.pl or speedscope).
+    """
+    stacks = await profiler.profile_process(seconds, interval_ms / 1000)
+    if stacks is None:
+        raise HTTPException(status.HTTP_409_CONFLICT, detail="A profile is already running")
+    return Response(stacks, media_type="text/plain; charset=utf-8")
+
+
+@app.get(
+    "/admin/profiles/{profile_id}",
+    tags=["Admin"],
+    include_in_schema=False,
+    dependencies=[Depends(verify_admin_key)],
+)
+async def get_request_profile(profile_id: str) -> Response:
+    """Collapsed stacks of a request sent with X-Profile: 1 (id from its X-Profile-Id header)."""
+    stacks = profiler.profiles.get(profile_id)
+    if stacks is None:
+        raise HTTPException(status.HTTP_404_NOT_FOUND, detail="Profile not found or expired")
+    return Response(stacks, media_type="text/plain; charset=utf-8")
+
+
 # ─────────────────────────────────────────────
 # Payment - Initiate
 # ─────────────────────────────────────────────
@@ -215,7 +370,10 @@ def health_check():
     tags=["Payment"],
     dependencies=[Depends(verify_api_key)],
 )
-async def initiate_payment(req: InitiatePaymentRequest) -> InitiatePaymentResponse:
+async def initiate_payment(
+    req: InitiatePaymentRequest,
+    db: AsyncSession = Depends(get_async_db),
+) -> InitiatePaymentResponse:
     """
     Start a new payment session.
 
@@ -234,21 +392,28 @@ async def initiate_payment(req: InitiatePaymentRequest) -> InitiatePaymentRespon
 
     amount_with_buffer = req.amount_usd * 1.05
     usdc_amount = usd_to_usdc(amount_with_buffer)
-    session_id = str(uuid4())
+    session = await session_store.create(
+        db,
+        session_id=str(uuid4()),
+        user_wallet_address=req.user_wallet_address,
+        usdc_amount=usdc_amount,
+        amount_usd=req.amount_usd,
+        merchant_name=req.merchant_name,
+    )
 
     logger.info(
-        f"Payment initiated: session={session_id}, "
+        f"Payment initiated: session={session.id}, "
         f"${req.amount_usd} → {amount_with_buffer:.2f} USDC ({usdc_amount} units)"
     )
 
     return InitiatePaymentResponse(
-        session_id=session_id,
+        session_id=session.id,
         contract_address=settings.arb_escrow_contract,
         usdc_contract=settings.usdc_contract,
         usdc_amount=str(usdc_amount),
         usdc_amount_display=f"{amount_with_buffer:.2f} USDC",
         amount_usd_with_buffer=round(amount_with_buffer, 2),
-        expires_at=datetime.now(timezone.utc) + timedelta(minutes=10),
+        expires_at=as_utc(session.expires_at),
         chain_id=settings.arb_chain_id,
     )
 
@@ -258,6 +423,38 @@ async def initiate_payment(req: InitiatePaymentRequest) -> InitiatePaymentRespon
 # ─────────────────────────────────────────────
 
 
+async def _open_session(db: AnySession, session_id: str, wallet: str) -> PaymentSession:
+    """The session a confirm refers to, or the HTTP error that rejects it - no RPC involved."""
+    session = await session_store.get(db, session_id)
+    if session is None:
+        raise HTTPException(status.HTTP_404_NOT_FOUND, detail=f"Unknown session {session_id}")
+    if session.status == SessionStatus.CONSUMED:
+        raise HTTPException(status.HTTP_409_CONFLICT, detail="Session already used")
+    if session.is_expired():
+        raise HTTPException(status.HTTP_410_GONE, detail="Session expired")
+    if session.user_wallet_address.lower() != wallet.lower():
+        raise HTTPException(status.HTTP_400_BAD_REQUEST, detail="Wallet does not match the session")
+    return session
+
+
+async def _claim_session(db: AnySession, session_id: str) -> None:
+    """Claim a verified session: 410 if it expired since it was read, 409 if another confirm got it."""
+    if await session_store.claim(db, session_id):
+        return
+    session = await session_store.get(db, session_id)
+    if session is not None and session.status == SessionStatus.OPEN and session.is_expired():
+        raise HTTPException(status.HTTP_410_GONE, detail="Session expired")
+    raise HTTPException(status.HTTP_409_CONFLICT, detail="Session already used")
+
+
+def _deposit_lookups(
+    db: Session, indexer: "EscrowIndexer", tx_hash: str
+) -> Tuple[bool, Optional[PaymentEvent]]:
+    """Anti-replay check plus the indexed PaymentReceived event, in one threadpool hop."""
+    used = db.exec(select(VirtualCard.id).where(VirtualCard.tx_hash == tx_hash)).first() is not None
+    return used, (None if used else indexer.find_payment(db, tx_hash))
+
+
 @app.post(
     "/api/v1/payment/confirm",
     tags=["Payment"],
@@ -265,141 +462,433 @@ async def initiate_payment(req: InitiatePaymentRequest) -> InitiatePaymentRespon
 )
 async def confirm_payment(
     req: ConfirmPaymentRequest,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
+    arb: "ArbitrumService" = Depends(arb_service.dependency),
+    lithic: "LithicService" = Depends(lithic_service.dependency),
+    indexer: "EscrowIndexer" = Depends(escrow_indexer.dependency),
 ) -> Dict[str, Any]:
     """
     Verify an on-chain deposit and issue a Lithic virtual card.
 
-    1. Checks the tx_hash hasn't been used before (anti-replay).
-    2. Verifies the PaymentReceived event on Arbitrum Sepolia matches the session_id.
-    3. Converts paid USDC units → USD (1:1).
-    4. Creates a Lithic SINGLE_USE card with a 5 % spend-limit buffer.
-    5. Saves to DB and returns full card details.
+    1. Rejects unknown, expired or already-consumed sessions, and wallets
+       that don't match the one the session was initiated for.
+    2. Checks the tx_hash hasn't been used before (anti-replay).
+    3. Verifies the PaymentReceived event matches the session_id and pays at
+       least the session's USDC amount - from the local event index when the
+       indexer has reached the tx, otherwise from a live receipt fetch.
+    4. Converts paid USDC units → USD (1:1).
+    5. Claims the session and issues a Lithic SINGLE_USE card with a 5 %
+       spend-limit buffer - a pre-created one from the card pool if it has
+       any, otherwise a new one.
+    6. Saves to DB and returns full card details.
     """
-    # Anti-replay: ensure tx_hash not already used
-    existing = db.exec(select(VirtualCard).where(VirtualCard.tx_hash == req.tx_hash)).first()
-    if existing:
+    with STAGE_SECONDS.time(flow="confirm", stage="session"):
+        session = await _open_session(db, req.session_id, req.user_wallet_address)
+    min_usdc = int(session.usdc_amount)
+
+    with STAGE_SECONDS.time(flow="confirm", stage="lookup"):
+        used, indexed = await run_db(db, _deposit_lookups, indexer, req.tx_hash)
+    if used:
+        VERIFICATION_FAILURES.inc(reason="replayed")
         raise HTTPException(status.HTTP_409_CONFLICT, detail="Transaction already used")
 
-    # Verify on-chain
     try:
-        payment = arb_service.verify_payment(
-            tx_hash=req.tx_hash,
-            session_id=req.session_id,
-        )
+        with STAGE_SECONDS.time(flow="confirm", stage="verify_indexed" if indexed is not None else "verify_rpc"):
+            if indexed is not None:
+                payment = indexer.verify_indexed(indexed, session_id=req.session_id, min_usdc=min_usdc)
+            else:
+                payment = await arb.verify_payment(
+                    tx_hash=req.tx_hash,
+                    session_id=req.session_id,
+                    min_usdc=min_usdc,
+                )
     except ValueError as exc:
+        VERIFICATION_FAILURES.inc(reason="invalid")
         raise HTTPException(status.HTTP_400_BAD_REQUEST, detail=str(exc))
 
-    # USDC is 1:1 with USD - no price oracle needed
     amount_usd = payment["paid_usd"]
-    amount_cents = int(amount_usd * 100)
-    spend_limit_cents = int(amount_cents * 1.05)
+    _, spend_limit_cents = _card_amounts(payment)
 
     logger.info(
         f"Payment verified: session={req.session_id}, "
         f"{payment['paid_usdc']} USDC units = ${amount_usd:.2f}"
     )
 
+    with STAGE_SECONDS.time(flow="confirm", stage="claim"):
+        await _claim_session(db, req.session_id)
+
     # Create Lithic card
     try:
-        card_data = lithic_service.create_virtual_card(
-            memo=f"ClawPay {req.session_id[:8]}",
+        with STAGE_SECONDS.time(flow="confirm", stage="card"):
+            card_data = await _create_card(lithic, req.session_id, spend_limit_cents)
+    except HTTPException:
+        await session_store.release(db, req.session_id)
+        raise
+
+    # Persist
+    record, secret = _card_record(req, session, payment, card_data)
+    try:
+        with STAGE_SECONDS.time(flow="confirm", stage="persist"):
+            await run_db(db, _save_cards, [(record, secret)])
+    except Exception as exc:
+        logger.error(f"Saving card for session {req.session_id} failed: {exc}", exc_info=True)
+        await _unissue(db, lithic, req.session_id, record.lithic_card_token)
+        raise HTTPException(status.HTTP_500_INTERNAL_SERVER_ERROR, detail="Card could not be saved")
+
+    logger.info(f"Card issued: ...{record.last_four} for session {req.session_id}")
+
+    return _confirm_result(req.tx_hash, amount_usd, record, secret)
+
+
+def _card_amounts(payment: Dict[str, Any]) -> Tuple[int, int]:
+    """(amount_cents, spend_limit_cents) for a verified payment - 5 % spend-limit buffer."""
+    # USDC is 1:1 with USD - no price oracle needed
+    amount_cents = int(payment["paid_usd"] * 100)
+    return amount_cents, int(amount_cents * 1.05)
+
+
+async def _create_card(lithic: "LithicService", session_id: str, spend_limit_cents: int) -> Dict[str, Any]:
+    """A card from the warm pool if one is available, else a freshly created one."""
+    card_data = await card_pool.claim(session_id, spend_limit_cents)
+    if card_data is not None:
+        CARDS_ISSUED.inc(source="pool")
+        return card_data
+    try:
+        card_data = await lithic.create_virtual_card(
+            memo=f"ClawPay {session_id[:8]}",
             spend_limit_cents=spend_limit_cents,
         )
     except Exception as exc:
+        from lithic import RateLimitError  # already loaded - the service imported the SDK
+
+        if isinstance(exc, RateLimitError):
+            logger.error(f"Lithic card creation rate limited after retries: {exc}")
+            raise HTTPException(
+                status.HTTP_503_SERVICE_UNAVAILABLE,
+                detail="Card issuer is rate limiting - retry shortly",
+                headers={"Retry-After": "5"},
+            )
         logger.error(f"Lithic card creation failed: {exc}", exc_info=True)
         raise HTTPException(
             status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail=f"Card creation failed: {exc}",
         )
+    CARDS_ISSUED.inc(source="lithic")
+    return card_data
 
-    # Persist
+
+async def _unissue(db: AnySession, lithic: "LithicService", session_id: str, card_token: Optional[str]) -> None:
+    """Undo a card issue whose row couldn't be saved: re-open the session and close the card."""
+    await session_store.release(db, session_id)
+    if card_token is None:
+        return
+    try:
+        await lithic.close_card(card_token)
+    except Exception as exc:
+        logger.error(f"Closing unsaved card {card_token} failed: {exc}")
+
+
+def _card_record(
+    req: ConfirmPaymentRequest,
+    session: PaymentSession,
+    payment: Dict[str, Any],
+    card_data: Dict[str, Any],
+) -> Tuple[VirtualCard, CardSecret]:
+    """The card row and its PAN/CVV row, ready to be saved together."""
+    amount_cents, spend_limit_cents = _card_amounts(payment)
     record = VirtualCard(
         tx_hash=req.tx_hash,
         session_id=req.session_id,
         user_wallet_address=req.user_wallet_address,
         amount_cents=amount_cents,
         spend_limit_cents=spend_limit_cents,
+        merchant_name=session.merchant_name,
         usdc_paid=str(payment["paid_usdc"]),
         lithic_card_token=card_data.get("token"),
         last_four=card_data.get("last_four"),
         exp_month=str(card_data.get("exp_month", "")).zfill(2),
         exp_year=str(card_data.get("exp_year", "")),
         card_state=card_data.get("state"),
-        card_pan=card_data.get("pan"),
-        card_cvv=card_data.get("cvv"),
+        trace_parent=tracing.current_traceparent(),
     )
-    db.add(record)
-    db.commit()
-    db.refresh(record)
+    return record, CardSecret(card_id=record.id, pan=card_data.get("pan"), cvv=card_data.get("cvv"))
 
-    logger.info(f"Card issued: ...{record.last_four} for session {req.session_id}")
 
+def _confirm_result(tx_hash: str, amount_usd: float, record: VirtualCard, secret: CardSecret) -> Dict[str, Any]:
     return {
         "success": True,
-        "tx_hash": req.tx_hash,
+        "tx_hash": tx_hash,
         "amount_usd": round(amount_usd, 2),
         "card": {
-            "pan":       card_data.get("pan"),
-            "cvv":       card_data.get("cvv"),
+            "pan":       secret.pan,
+            "cvv":       secret.cvv,
             "exp_month": record.exp_month,
             "exp_year":  record.exp_year,
-            "last_four": card_data.get("last_four"),
-            "token":     card_data.get("token"),
-            "state":     card_data.get("state"),
+            "last_four": record.last_four,
+            "token":     record.lithic_card_token,
+            "state":     record.card_state,
         },
     }
 
 
+def _batch_lookups(db: Session, indexer: "EscrowIndexer", tx_hashes: List[str]) -> Tuple[set, Dict[str, PaymentEvent]]:
+    """_deposit_lookups for a whole batch: used tx hashes + indexed events, two queries."""
+    used = set(db.exec(select(VirtualCard.tx_hash).where(VirtualCard.tx_hash.in_(tx_hashes))).all())
+    return used, indexer.find_payments(db, [h for h in tx_hashes if h not in used])
+
+
+def _save_cards(db: Session, cards: List[Tuple[VirtualCard, CardSecret]]) -> None:
+    """New cards, their secrets and their rollup increments, in one transaction."""
+    try:
+        for record, secret in cards:
+            db.add(record)
+            db.add(secret)
+            rollups.record(db, record)
+        db.commit()
+    except Exception:
+        # Leave the session usable for releasing the claims
+        db.rollback()
+        raise
+    for record, _ in cards:
+        db.refresh(record)
+
+
+def _batch_error(exc: HTTPException) -> Dict[str, Any]:
+    return {"success": False, "status_code": exc.status_code, "error": exc.detail}
+
+
+@app.post(
+    "/api/v1/payment/confirm/batch",
+    tags=["Payment"],
+    dependencies=[Depends(verify_api_key)],
+)
+async def confirm_payment_batch(
+    req: ConfirmPaymentBatchRequest,
+    db: AsyncSession = Depends(get_async_db),
+    arb: "ArbitrumService" = Depends(arb_service.dependency),
+    lithic: "LithicService" = Depends(lithic_service.dependency),
+    indexer: "EscrowIndexer" = Depends(escrow_indexer.dependency),
+) -> Dict[str, Any]:
+    """
+    Confirm many deposits in one call - same checks and result as
+    /payment/confirm, once per item.
+
+    Sessions are checked first; deposits the indexer hasn't stored are then
+    verified from one JSON-RPC batch of receipt fetches; cards are created
+    concurrently (CONFIRM_BATCH_CARD_CONCURRENCY at a time); all new
+    card rows are written in one transaction.
+
+    Items fail independently. The response has one entry per item, in
+    request order, each either a /payment/confirm result or
+    {"success": false, "status_code": ..., "error": "..."}.
+    """
+    items = req.items
+    results: List[Optional[Dict[str, Any]]] = [None] * len(items)
+    sessions: Dict[int, PaymentSession] = {}
+
+    # 1. Sessions, and duplicates within the batch
+    seen_tx, seen_sessions = set(), set()
+    for i, item in enumerate(items):
+        if item.tx_hash in seen_tx or item.session_id in seen_sessions:
+            results[i] = _batch_error(HTTPException(status.HTTP_409_CONFLICT, "Duplicate item in batch"))
+            continue
+        seen_tx.add(item.tx_hash)
+        seen_sessions.add(item.session_id)
+        try:
+            sessions[i] = await _open_session(db, item.session_id, item.user_wallet_address)
+        except HTTPException as exc:
+            results[i] = _batch_error(exc)
+
+    # 2. Anti-replay + indexed events
+    used, indexed = await run_db(db, _batch_lookups, indexer, [items[i].tx_hash for i in sessions])
+    payments: Dict[int, Dict[str, Any]] = {}
+    live: List[int] = []
+    for i in list(sessions):
+        item = items[i]
+        if item.tx_hash in used:
+            VERIFICATION_FAILURES.inc(reason="replayed")
+            results[i] = _batch_error(HTTPException(status.HTTP_409_CONFLICT, "Transaction already used"))
+            del sessions[i]
+            continue
+        event = indexed.get(item.tx_hash.lower())
+        if event is None:
+            live.append(i)
+            continue
+        try:
+            payments[i] = indexer.verify_indexed(
+                event, session_id=item.session_id, min_usdc=int(sessions[i].usdc_amount)
+            )
+        except ValueError as exc:
+            VERIFICATION_FAILURES.inc(reason="invalid")
+            results[i] = _batch_error(HTTPException(status.HTTP_400_BAD_REQUEST, str(exc)))
+            del sessions[i]
+
+    # 3. Everything else from one receipt batch
+    if live:
+        try:
+            verified = await arb.verify_payments(
+                [(items[i].tx_hash, items[i].session_id, int(sessions[i].usdc_amount)) for i in live]
+            )
+        except ValueError as exc:
+            verified = [exc] * len(live)
+        for i, outcome in zip(live, verified):
+            if isinstance(outcome, ValueError):
+                VERIFICATION_FAILURES.inc(reason="invalid")
+                results[i] = _batch_error(HTTPException(status.HTTP_400_BAD_REQUEST, str(outcome)))
+                del sessions[i]
+            else:
+                payments[i] = outcome
+
+    # 4. Claim sessions (sequential - they share this request's DB session)
+    claimed: List[int] = []
+    for i in sorted(payments):
+        try:
+            await _claim_session(db, items[i].session_id)
+        except HTTPException as exc:
+            results[i] = _batch_error(exc)
+        else:
+            claimed.append(i)
+
+    # 5. Cards, concurrently under a bound
+    limit = asyncio.Semaphore(settings.confirm_batch_card_concurrency)
+
+    async def issue(i: int) -> Dict[str, Any]:
+        async with limit:
+            return await _create_card(lithic, items[i].session_id, _card_amounts(payments[i])[1])
+
+    outcomes = await asyncio.gather(*(issue(i) for i in claimed), return_exceptions=True)
+
+    records: Dict[int, Tuple[VirtualCard, CardSecret]] = {}
+    for i, outcome in zip(claimed, outcomes):
+        if isinstance(outcome, BaseException):
+            await session_store.release(db, items[i].session_id)
+            error = outcome if isinstance(outcome, HTTPException) else HTTPException(
+                status.HTTP_500_INTERNAL_SERVER_ERROR, f"Card creation failed: {outcome}"
+            )
+            results[i] = _batch_error(error)
+        else:
+            records[i] = _card_record(items[i], sessions[i], payments[i], outcome)
+
+    # 6. One transaction for every new card
+    if records:
+        try:
+            await run_db(db, _save_cards, list(records.values()))
+        except Exception as exc:
+            logger.error(f"Saving {len(records)} batch card(s) failed: {exc}", exc_info=True)
+            for i, (record, _) in records.items():
+                await _unissue(db, lithic, items[i].session_id, record.lithic_card_token)
+                results[i] = _batch_error(
+                    HTTPException(status.HTTP_500_INTERNAL_SERVER_ERROR, "Card could not be saved")
+                )
+            records = {}
+    for i, (record, secret) in records.items():
+        results[i] = _confirm_result(items[i].tx_hash, payments[i]["paid_usd"], record, secret)
+
+    succeeded = len(records)
+    logger.info(f"Batch confirm: {succeeded}/{len(items)} cards issued")
+    return {"succeeded": succeeded, "failed": len(items) - succeeded, "results": results}
+
+
 # ─────────────────────────────────────────────
 # Cards
 # ─────────────────────────────────────────────
 
 
-def _card_response(card: VirtualCard) -> VirtualCardResponse:
-    card_info = (
-        CardInfoResponse(
-            token=card.lithic_card_token,
-            last_four=card.last_four,
-            exp_month=card.exp_month,
-            exp_year=card.exp_year,
-            state=card.card_state,
-            pan=card.card_pan,
-            cvv=card.card_cvv,
-        )
-        if card.lithic_card_token
-        else None
-    )
-    auth_info = (
-        AuthorizationInfo(
-            token=card.authorization_token,
-            amount_cents=card.authorization_amount_cents,
-            authorized_at=card.authorized_at,
-        )
-        if card.authorization_token
-        else None
-    )
-    clearing_info = ClearingInfo(
-        cleared=card.cleared,
-        amount_cents=card.cleared_amount_cents,
-        cleared_at=card.cleared_at,
-        debug_id=card.clearing_debug_id,
-    )
-    return VirtualCardResponse(
-        id=card.id,
-        tx_hash=card.tx_hash,
-        session_id=card.session_id,
-        amount_cents=card.amount_cents,
-        spend_limit_cents=card.spend_limit_cents,
-        merchant_name=card.merchant_name,
-        card=card_info,
-        authorization=auth_info,
-        clearing=clearing_info,
-        created_at=card.created_at,
-        updated_at=card.updated_at,
+# Listings project just these columns - never the PAN/CVV unless asked for
+_CARD_COLUMNS = (
+    VirtualCard.id,
+    VirtualCard.tx_hash,
+    VirtualCard.session_id,
+    VirtualCard.amount_cents,
+    VirtualCard.spend_limit_cents,
+    VirtualCard.merchant_name,
+    VirtualCard.lithic_card_token,
+    VirtualCard.last_four,
+    VirtualCard.exp_month,
+    VirtualCard.exp_year,
+    VirtualCard.card_state,
+    VirtualCard.created_at,
+    VirtualCard.updated_at,
+    CardLifecycle.authorization_token,
+    CardLifecycle.authorization_amount_cents,
+    CardLifecycle.authorized_at,
+    CardLifecycle.cleared,
+    CardLifecycle.cleared_amount_cents,
+    CardLifecycle.cleared_at,
+    CardLifecycle.clearing_debug_id,
+)
+
+
+def _card_query(include_sensitive: bool):
+    """SELECT of the response columns; joins card_secrets only for include_sensitive."""
+    if not include_sensitive:
+        return select(*_CARD_COLUMNS).outerjoin(CardLifecycle, CardLifecycle.card_id == VirtualCard.id)
+    return (
+        select(*_CARD_COLUMNS, CardSecret.pan, CardSecret.cvv)
+        .outerjoin(CardLifecycle, CardLifecycle.card_id == VirtualCard.id)
+        .outerjoin(CardSecret, CardSecret.card_id == VirtualCard.id)
     )
 
 
+def _card_dict(row: Any) -> Dict[str, Any]:
+    """
+    A _card_query row as a VirtualCardResponse-shaped dict.
+
+    Cards are listed by the thousand; building nested Pydantic models per
+    row and then having FastAPI validate them again against the
+    response_model costs more CPU than the query. The routes return these
+    dicts through responses.json_response instead, and keep
+    response_model only for the OpenAPI schema.
+    """
+    return {
+        "id":                row.id,
+        "tx_hash":           row.tx_hash,
+        "session_id":        row.session_id,
+        "amount_cents":      row.amount_cents,
+        "spend_limit_cents": row.spend_limit_cents,
+        "merchant_name":     row.merchant_name,
+        "card": {
+            "token":     row.lithic_card_token,
+            "last_four": row.last_four,
+            "exp_month": row.exp_month,
+            "exp_year":  row.exp_year,
+            "state":     row.card_state,
+            "pan":       getattr(row, "pan", None),
+            "cvv":       getattr(row, "cvv", None),
+        } if row.lithic_card_token else None,
+        "authorization": {
+            "token":         row.authorization_token,
+            "amount_cents":  row.authorization_amount_cents,
+            "authorized_at": row.authorized_at,
+        } if row.authorization_token else None,
+        "clearing": {
+            "cleared":      bool(row.cleared),
+            "amount_cents": row.cleared_amount_cents,
+            "cleared_at":   row.cleared_at,
+            "debug_id":     row.clearing_debug_id,
+        },
+        "created_at":        row.created_at,
+        "updated_at":        row.updated_at,
+    }
+
+
+def _encode_cursor(card: VirtualCard) -> str:
+    raw = json.dumps([as_utc(card.created_at).isoformat(), card.id]).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def _decode_cursor(cursor: str) -> Tuple[datetime, str]:
+    try:
+        created_at, card_id = json.loads(base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)))
+        return _utc(datetime.fromisoformat(created_at)), str(card_id)
+    except (ValueError, TypeError):
+        raise HTTPException(status.HTTP_400_BAD_REQUEST, detail="Invalid cursor")
+
+
+def _utc(value: datetime) -> datetime:
+    return as_utc(value).astimezone(timezone.utc)
+
+
 @app.get(
     "/api/v1/cards",
     response_model=List[VirtualCardResponse],
@@ -407,18 +896,90 @@ def _card_response(card: VirtualCard) -> VirtualCardResponse:
     dependencies=[Depends(verify_api_key)],
 )
 def list_cards(
-    db: Session = Depends(get_db),
-    limit: int = 100,
-    offset: int = 0,
+    request: Request,
+    db: Session = Depends(get_read_db),
+    limit: int = Query(100, ge=1, le=1000),
+    cursor: Optional[str] = Query(None, description="X-Next-Cursor from the previous page"),
+    offset: int = Query(0, ge=0, deprecated=True, description="Use cursor instead"),
     session_id: Optional[str] = None,
     tx_hash: Optional[str] = None,
-) -> List[VirtualCardResponse]:
-    stmt = select(VirtualCard)
+    wallet: Optional[str] = Query(None, description="User wallet address (exact match)"),
+    state: Optional[str] = Query(None, description="Card state, e.g. OPEN"),
+    created_after: Optional[datetime] = None,
+    created_before: Optional[datetime] = None,
+    include_sensitive: bool = Query(False, description="Include PAN and CVV"),
+) -> Response:
+    """
+    Cards ordered by (created_at, id). When there are more, the response
+    carries an X-Next-Cursor header; pass it back as `cursor` for the next
+    page. Pages are keyset seeks on the (filter, created_at, id) indexes, so
+    page 10,000 costs the same as page 1 - unlike `offset`, which scans and
+    discards every skipped row.
+    """
+    stmt = _card_query(include_sensitive)
     if session_id:
         stmt = stmt.where(VirtualCard.session_id == session_id)
     elif tx_hash:
         stmt = stmt.where(VirtualCard.tx_hash == tx_hash)
-    return [_card_response(c) for c in db.exec(stmt.offset(offset).limit(limit)).all()]
+    if wallet:
+        stmt = stmt.where(VirtualCard.user_wallet_address == wallet)
+    if state:
+        stmt = stmt.where(VirtualCard.card_state == state.upper())
+    if created_after:
+        stmt = stmt.where(VirtualCard.created_at >= _utc(created_after))
+    if created_before:
+        stmt = stmt.where(VirtualCard.created_at < _utc(created_before))
+
+    if cursor:
+        stmt = stmt.where(tuple_(VirtualCard.created_at, VirtualCard.id) > _decode_cursor(cursor))
+    elif offset:
+        stmt = stmt.offset(offset)
+
+    # One extra row tells us whether there is a next page without a COUNT
+    cards = db.exec(stmt.order_by(VirtualCard.created_at, VirtualCard.id).limit(limit + 1)).all()
+    headers = {}
+    if len(cards) > limit:
+        cards = cards[:limit]
+        headers["X-Next-Cursor"] = _encode_cursor(cards[-1])
+    return json_response(request, [_card_dict(c) for c in cards], headers)
+
+
+@app.get(
+    "/api/v1/cards/export",
+    tags=["Cards"],
+    dependencies=[Depends(verify_api_key)],
+    response_class=StreamingResponse,
+)
+def export_cards(
+    format: Literal["ndjson", "csv"] = "ndjson",
+    columns: Optional[str] = Query(None, description="Comma-separated column names (default: all)"),
+    created_after: Optional[datetime] = None,
+    created_before: Optional[datetime] = None,
+) -> StreamingResponse:
+    """
+    Stream the card ledger - cards with their authorization, clearing and
+    refund history - as NDJSON (one object per line) or CSV with a header
+    row, oldest first. PAN/CVV are never included.
+    """
+    try:
+        names = export.parse_columns(columns)
+    except ValueError as exc:
+        raise HTTPException(
+            status.HTTP_400_BAD_REQUEST,
+            detail=f"{exc}. Available: {', '.join(export.EXPORT_COLUMNS)}",
+        )
+    rows = export.export_cards(
+        names,
+        format,
+        created_after=_utc(created_after) if created_after else None,
+        created_before=_utc(created_before) if created_before else None,
+    )
+    filename = f"cards-{utc_now():%Y%m%dT%H%M%SZ}.{format}"
+    return StreamingResponse(
+        rows,
+        media_type=export.MEDIA_TYPES[format],
+        headers={"Content-Disposition": f'attachment; filename="{filename}"'},
+    )
 
 
 @app.get(
@@ -427,11 +988,16 @@ def list_cards(
     tags=["Cards"],
     dependencies=[Depends(verify_api_key)],
 )
-def get_card(card_id: str, db: Session = Depends(get_db)) -> VirtualCardResponse:
-    card = db.get(VirtualCard, card_id)
-    if not card:
+def get_card(
+    card_id: str,
+    request: Request,
+    db: Session = Depends(get_read_db),
+    include_sensitive: bool = Query(False, description="Include PAN and CVV"),
+) -> Response:
+    row = db.exec(_card_query(include_sensitive).where(VirtualCard.id == card_id)).first()
+    if not row:
         raise HTTPException(status.HTTP_404_NOT_FOUND, detail=f"Card {card_id} not found")
-    return _card_response(card)
+    return json_response(request, _card_dict(row))
 
 
 @app.post(
@@ -439,23 +1005,24 @@ def get_card(card_id: str, db: Session = Depends(get_db)) -> VirtualCardResponse
     tags=["Cards"],
     dependencies=[Depends(verify_api_key)],
 )
-def test_payment(request: Dict[str, Any]) -> Dict[str, Any]:
+async def test_payment(
+    request: Dict[str, Any],
+    lithic: "LithicService" = Depends(lithic_service.dependency),
+) -> Dict[str, Any]:
     """Simulate a Lithic sandbox authorization + clearing against a card PAN."""
-    import time
-
     pan = request.get("pan")
     amount_cents = request.get("amount_cents")
     if not pan or not amount_cents:
         raise HTTPException(status.HTTP_400_BAD_REQUEST, detail="pan and amount_cents required")
 
-    auth = lithic_service.simulate_authorization(
+    auth = await lithic.simulate_authorization(
         pan=pan, amount_cents=amount_cents, descriptor="TEST MERCHANT"
     )
 
-    time.sleep(2)
+    await asyncio.sleep(2)
     cleared = False
     try:
-        lithic_service.simulate_clearing(
+        await lithic.simulate_clearing(
             transaction_token=auth["token"], amount_cents=amount_cents
         )
         cleared = True
@@ -470,28 +1037,49 @@ def test_payment(request: Dict[str, Any]) -> Dict[str, Any]:
     }
 
 
+def _card_side_rows(db: Session, card_id: str) -> Tuple[VirtualCard, Optional[CardSecret], CardLifecycle]:
+    """A card with its PAN/CVV row and (possibly new) lifecycle row; 404 if the card doesn't exist."""
+    card = db.get(VirtualCard, card_id)
+    if card is None:
+        raise HTTPException(status.HTTP_404_NOT_FOUND, detail=f"Card {card_id} not found")
+    return card, db.get(CardSecret, card_id), db.get(CardLifecycle, card_id) or CardLifecycle(card_id=card_id)
+
+
+def _save_lifecycle(
+    db: Session,
+    card: VirtualCard,
+    lifecycle: CardLifecycle,
+    before: Optional[Dict[str, int]] = None,
+) -> None:
+    """Save a lifecycle change; `before` is the card's rollup contribution when it affects the rollups."""
+    card.updated_at = utc_now()
+    db.add(lifecycle)
+    if before is not None:
+        rollups.record(db, card, before, lifecycle)
+    db.commit()
+
+
 @app.post(
     "/api/v1/cards/{card_id}/simulate/authorize",
     response_model=SimulateAuthorizationResponse,
     tags=["Testing"],
     dependencies=[Depends(verify_api_key)],
 )
-def simulate_authorization(
+async def simulate_authorization(
     card_id: str,
     req: SimulateAuthorizationRequest,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
+    lithic: "LithicService" = Depends(lithic_service.dependency),
 ) -> SimulateAuthorizationResponse:
-    card = db.get(VirtualCard, card_id)
-    if not card:
-        raise HTTPException(status.HTTP_404_NOT_FOUND, detail=f"Card {card_id} not found")
-    if not card.card_pan:
+    card, secret, lifecycle = await run_db(db, _card_side_rows, card_id)
+    if not secret or not secret.pan:
         raise HTTPException(status.HTTP_400_BAD_REQUEST, detail="Card PAN not available")
 
-    auth = lithic_service.simulate_authorization(
-        pan=card.card_pan, amount_cents=req.amount_cents, descriptor=req.descriptor, mcc=req.mcc
+    auth = await lithic.simulate_authorization(
+        pan=secret.pan, amount_cents=req.amount_cents, descriptor=req.descriptor, mcc=req.mcc
     )
-    card.mark_authorized(auth["token"], req.amount_cents)
-    db.commit()
+    lifecycle.mark_authorized(auth["token"], req.amount_cents)
+    await run_db(db, _save_lifecycle, card, lifecycle)
 
     return SimulateAuthorizationResponse(
         transaction_token=auth["token"],
@@ -505,26 +1093,59 @@ def simulate_authorization(
     tags=["Testing"],
     dependencies=[Depends(verify_api_key)],
 )
-def simulate_clearing(
+async def simulate_clearing(
     card_id: str,
     req: SimulateClearingRequest,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
+    lithic: "LithicService" = Depends(lithic_service.dependency),
 ) -> SimulateClearingResponse:
-    card = db.get(VirtualCard, card_id)
-    if not card:
-        raise HTTPException(status.HTTP_404_NOT_FOUND, detail=f"Card {card_id} not found")
-    if not card.authorization_token:
+    card, _, lifecycle = await run_db(db, _card_side_rows, card_id)
+    if not lifecycle.authorization_token:
         raise HTTPException(status.HTTP_400_BAD_REQUEST, detail="No authorization found. Call /simulate/authorize first.")
 
-    result = lithic_service.simulate_clearing(
-        transaction_token=card.authorization_token, amount_cents=req.amount_cents
+    result = await lithic.simulate_clearing(
+        transaction_token=lifecycle.authorization_token, amount_cents=req.amount_cents
     )
-    card.mark_cleared(req.amount_cents, result.get("debugging_request_id"))
-    db.commit()
+    before = rollups.contribution(card, lifecycle)
+    lifecycle.mark_cleared(req.amount_cents, result.get("debugging_request_id"))
+    await run_db(db, _save_lifecycle, card, lifecycle, before)
 
     return SimulateClearingResponse(cleared=True, debugging_request_id=result.get("debugging_request_id"))
 
 
+# ─────────────────────────────────────────────
+# Stats
+# ─────────────────────────────────────────────
+
+_STATS_DEFAULT_WINDOW = {"hour": timedelta(hours=48), "day": timedelta(days=30)}
+
+
+@app.get(
+    "/api/v1/stats",
+    tags=["Stats"],
+    dependencies=[Depends(verify_api_key)],
+)
+def get_stats(
+    granularity: Literal["hour", "day"] = "day",
+    start: Optional[datetime] = Query(None, description="Default: 48 hours / 30 days before end"),
+    end: Optional[datetime] = Query(None, description="Default: now"),
+    wallet: Optional[str] = Query(None, description="One wallet instead of the total"),
+    db: Session = Depends(get_read_db),
+) -> Dict[str, Any]:
+    """
+    Issued volume, spend limits, cleared / settled amounts, refunds and
+    retained buffer per hour or day, with totals for the range. Served from
+    the stats_rollups table, so the cost depends on the number of buckets,
+    not the number of cards. Cards count towards the bucket they were
+    issued in.
+    """
+    end = _utc(end) if end else utc_now()
+    start = _utc(start) if start else end - _STATS_DEFAULT_WINDOW[granularity]
+    if start >= end:
+        raise HTTPException(status.HTTP_400_BAD_REQUEST, detail="start must be before end")
+    return rollups.query(db, granularity, start, end, wallet)
+
+
 # ─────────────────────────────────────────────
 # Lithic Webhooks - Buffer & Refund
 # ─────────────────────────────────────────────
@@ -541,8 +1162,13 @@ def _verify_lithic_signature(payload: bytes, signature: str, secret: str) -> boo
 @app.post("/webhooks/lithic", tags=["Webhooks"], include_in_schema=False)
 async def lithic_webhook(
     request: Request,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
 ) -> Dict[str, Any]:
+    """
+    Verify, store and acknowledge. Processing (refund queuing) happens in
+    the webhook inbox worker, so Lithic's delivery never waits on the DB
+    work and a redelivered event is acknowledged as a duplicate.
+    """
     body = await request.body()
     signature = request.headers.get("X-Lithic-Signature", "")
 
@@ -550,87 +1176,15 @@ async def lithic_webhook(
         raise HTTPException(status.HTTP_401_UNAUTHORIZED, detail="Invalid webhook signature")
 
     try:
-        payload = await request.json()
-    except Exception:
+        payload = json.loads(body)
+    except ValueError:
+        raise HTTPException(status.HTTP_400_BAD_REQUEST, detail="Invalid JSON")
+    if not isinstance(payload, dict):
         raise HTTPException(status.HTTP_400_BAD_REQUEST, detail="Invalid JSON")
 
-    event_type = payload.get("event_type")
-    logger.info(f"Lithic webhook: {event_type}")
-
-    if event_type == "transaction.settled":
-        return await _handle_settled(payload, db)
-    elif event_type in ("transaction.authorization", "card.state_changed"):
-        return {"status": "logged"}
-    return {"status": "ignored"}
-
-
-async def _handle_settled(payload: Dict[str, Any], db: Session) -> Dict[str, Any]:
-    """
-    On settlement:
-    1. Find card in DB by Lithic card token.
-    2. Calculate unused buffer (spend_limit − actual_charged).
-    3. Send ETH (gas) refund via escrow contract if buffer > 0.
-    """
-    card_token = payload.get("card_token")
-    actual_cents = payload.get("amount")
-
-    if not card_token or actual_cents is None:
-        return {"status": "error", "reason": "missing_fields"}
-
-    card = db.exec(
-        select(VirtualCard).where(VirtualCard.lithic_card_token == card_token)
-    ).first()
-
-    if not card:
-        logger.warning(f"Webhook: card not found for token {card_token}")
-        return {"status": "error", "reason": "card_not_found"}
-
-    card.actual_charged_cents = actual_cents
-    card.updated_at = datetime.utcnow()
-
-    spend_limit = card.spend_limit_cents or card.amount_cents
-    refund_cents = spend_limit - actual_cents
-
-    logger.info(
-        f"Settlement: limit=${spend_limit/100:.2f}, "
-        f"charged=${actual_cents/100:.2f}, "
-        f"refund=${refund_cents/100:.2f}"
-    )
-
-    if refund_cents > 0 and card.user_wallet_address:
-        try:
-            refund_usdc = cents_to_usdc(refund_cents)
-
-            result = arb_service.send_refund(
-                recipient=card.user_wallet_address,
-                usdc_amount=refund_usdc,
-                session_id=card.session_id or card.id,
-            )
-
-            card.refund_amount_cents = refund_cents
-            card.refund_tx = result["tx_hash"]
-            card.refunded_at = datetime.utcnow()
-            db.commit()
-
-            logger.info(
-                f"Refund sent: ${result['amount_usd']:.2f} USDC "
-                f"to {card.user_wallet_address[:10]}... "
-                f"tx: {result['tx_hash'][:16]}..."
-            )
-            return {
-                "status": "refunded",
-                "refund_amount_cents": refund_cents,
-                "refund_usd": result["amount_usd"],
-                "refund_tx": result["tx_hash"],
-            }
-        except Exception as exc:
-            logger.error(f"Refund failed: {exc}")
-            db.commit()
-            return {"status": "refund_failed", "error": str(exc)}
-
-    elif refund_cents <= 0:
-        db.commit()
-        return {"status": "no_refund_needed"}
-    else:
-        db.commit()
-        return {"status": "no_wallet_address_for_refund"}
+    stored, event_token = await run_db(db, webhook_inbox.accept, body, payload, request.headers)
+    logger.info(f"Lithic webhook: {payload.get('event_type')} ({event_token}){'' if stored else ' - duplicate'}")
+    if not stored:
+        return {"status": "duplicate"}
+    webhook_inbox.wake()
+    return {"status": "accepted"}
@@ -0,0 +1,217 @@
+"""
+In-process Prometheus metrics, rendered by GET /metrics.
+
+Counters and histograms are plain dicts keyed by label values behind one
+uncontended lock each - recording is a dict lookup and a bisect, cheap
+enough for every RPC call and DB stage. Everything is exposed in the
+Prometheus text format (version 0.0.4); there is no push gateway and no
+dependency on prometheus_client.
+
+    with STAGE_SECONDS.time(flow="confirm", stage="card"):
+        card = await issue_card(...)
+"""
+import threading
+import time
+from bisect import bisect_left
+from contextlib import contextmanager
+from typing import Dict, Iterator, List, Sequence, Tuple
+
+# Seconds - from a cache hit to a slow receipt wait
+DEFAULT_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+_registry: List["_Metric"] = []
+
+
+class _Metric:
+    kind = ""
+
+    def __init__(self, name: str, help: str, labels: Sequence[str] = ()) -> None:
+        self.name = name
+        self.help = help
+        self.labelnames = tuple(labels)
+        self._lock = threading.Lock()
+        _registry.append(self)
+
+    def _key(self, labels: Dict[str, str]) -> Tuple[str, ...]:
+        try:
+            return tuple(str(labels[name]) for name in self.labelnames)
+        except KeyError as exc:
+            raise ValueError(f"{self.name}: missing label {exc}") from None
+
+    def _labels(self, key: Tuple[str, ...], extra: str = "") -> str:
+        pairs = [f'{name}="{_escape(value)}"' for name, value in zip(self.labelnames, key)]
+        if extra:
+            pairs.append(extra)
+        return "{" + ",".join(pairs) + "}" if pairs else ""
+
+    def render(self) -> List[str]:
+        return [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} {self.kind}", *self._samples()]
+
+    def _samples(self) -> List[str]:
+        raise NotImplementedError
+
+
+class Counter(_Metric):
+    """Monotonic count per label set."""
+
+    kind = "counter"
+
+    def __init__(self, name: str, help: str, labels: Sequence[str] = ()) -> None:
+        super().__init__(name, help, labels)
+        self._values: Dict[Tuple[str, ...], float] = {}
+
+    def inc(self, amount: float = 1, **labels: str) -> None:
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def _samples(self) -> List[str]:
+        with self._lock:
+            values = list(self._values.items())
+        return [f"{self.name}{self._labels(key)} {_number(value)}" for key, value in values]
+
+
+class Gauge(_Metric):
+    """Current value per label set (set, not accumulated)."""
+
+    kind = "gauge"
+
+    def __init__(self, name: str, help: str, labels: Sequence[str] = ()) -> None:
+        super().__init__(name, help, labels)
+        self._values: Dict[Tuple[str, ...], float] = {}
+
+    def set(self, value: float, **labels: str) -> None:
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = value
+
+    def _samples(self) -> List[str]:
+        with self._lock:
+            values = list(self._values.items())
+        return [f"{self.name}{self._labels(key)} {_number(value)}" for key, value in values]
+
+
+class Histogram(_Metric):
+    """
+    Latency distribution per label set. Bucket counts are stored per bucket
+    and only made cumulative when rendered.
+    """
+
+    kind = "histogram"
+
+    def __init__(
+        self,
+        name: str,
+        help: str,
+        labels: Sequence[str] = (),
+        buckets: Sequence[float] = DEFAULT_BUCKETS,
+    ) -> None:
+        super().__init__(name, help, labels)
+        self.buckets = tuple(sorted(buckets))
+        # key -> [count per bucket..., count above the last bucket, sum]
+        self._values: Dict[Tuple[str, ...], List[float]] = {}
+
+    def observe(self, value: float, **labels: str) -> None:
+        key = self._key(labels)
+        index = bisect_left(self.buckets, value)
+        with self._lock:
+            row = self._values.get(key)
+            if row is None:
+                row = self._values[key] = [0] * (len(self.buckets) + 2)
+            row[index] += 1
+            row[-1] += value
+
+    @contextmanager
+    def time(self, **labels: str) -> Iterator[None]:
+        """Observe the block's wall time, with outcome="ok" or "error" (it raised)."""
+        start = time.perf_counter()
+        outcome = "error"
+        try:
+            yield
+            outcome = "ok"
+        finally:
+            self.observe(time.perf_counter() - start, outcome=outcome, **labels)
+
+    def _samples(self) -> List[str]:
+        with self._lock:
+            values = [(key, list(row)) for key, row in self._values.items()]
+        lines = []
+        for key, row in values:
+            cumulative = 0
+            for bound, count in zip((*self.buckets, "+Inf"), row):
+                cumulative += count
+                le = 'le="%s"' % (bound if bound == "+Inf" else _number(bound))
+                lines.append(f"{self.name}_bucket{self._labels(key, le)} {cumulative}")
+            lines.append(f"{self.name}_sum{self._labels(key)} {_number(row[-1])}")
+            lines.append(f"{self.name}_count{self._labels(key)} {cumulative}")
+        return lines
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _number(value: float) -> str:
+    return str(int(value)) if float(value).is_integer() else repr(float(value))
+
+
+def render() -> str:
+    """Every registered metric in the Prometheus text exposition format."""
+    lines: List[str] = []
+    for metric in _registry:
+        lines.extend(metric.render())
+    return "\n".join(lines) + "\n"
+
+
+# ─────────────────────────────────────────────
+# Metrics
+# ─────────────────────────────────────────────
+
+STAGE_SECONDS = Histogram(
+    "clawpay_stage_duration_seconds",
+    "Time spent in each stage of the confirm, settlement webhook and refund flows.",
+    ("flow", "stage", "outcome"),
+)
+OUTBOUND_SECONDS = Histogram(
+    "clawpay_outbound_request_duration_seconds",
+    "Outbound calls to the Arbitrum RPC pool and the Lithic API, retries included.",
+    ("service", "method", "outcome"),
+)
+CARDS_ISSUED = Counter(
+    "clawpay_cards_issued_total",
+    "Virtual cards issued by confirm, by where the card came from (pool or lithic).",
+    ("source",),
+)
+REFUNDS_SENT = Counter(
+    "clawpay_refunds_sent_total",
+    "Buffer refunds confirmed on chain.",
+)
+CARD_POOL_CLAIMS = Counter(
+    "clawpay_card_pool_claims_total",
+    "Card pool lookups by confirm: hit, miss (pool empty) or activation_failed (card discarded).",
+    ("result",),
+)
+CARD_POOL_CARDS = Counter(
+    "clawpay_card_pool_cards_total",
+    "Card pool card events: created, create_failed, closed (discarded card closed at Lithic), close_failed.",
+    ("event",),
+)
+CARD_POOL_AVAILABLE = Gauge(
+    "clawpay_card_pool_available",
+    "PAUSED cards waiting in the pool, as of the last claim or refill.",
+)
+WEBHOOK_INBOX_DEPTH = Gauge(
+    "clawpay_webhook_inbox_depth",
+    "PENDING webhook events, as of the inbox loop's last count.",
+)
+WEBHOOK_INBOX_LAG = Gauge(
+    "clawpay_webhook_inbox_lag_seconds",
+    "Age of the oldest PENDING webhook event, as of the inbox loop's last count.",
+)
+VERIFICATION_FAILURES = Counter(
+    "clawpay_verification_failures_total",
+    "Deposits rejected by confirm: reason is replayed (tx already used) or invalid (event check failed).",
+    ("reason",),
+)
@@ -0,0 +1,188 @@
+"""
+Sampling profiler for the live API process - no restart, no dependency.
+
+A daemon thread snapshots every thread's Python stack with
+sys._current_frames() each `interval` seconds and counts identical stacks.
+The result is collapsed-stack text ("frame;frame;frame count" per line),
+which flamegraph.pl, speedscope and inferno all read. Sampling costs one
+short GIL hold per tick, so it is safe on a loaded worker.
+
+Two ways in (both behind ADMIN_API_KEY, see main.py):
+
+- GET /admin/profile?seconds=N samples the whole process for N seconds.
+- X-Profile: 1 on any request samples just that request: event-loop
+  samples are kept only while the request's own task is running, and time
+  spent awaiting I/O or yielding to other tasks is reported as
+  "(awaiting)" / "(other tasks)". The response carries X-Profile-Id; fetch
+  the stacks from GET /admin/profiles/{id}. Meant for async routes such
+  as confirm - a sync route's work runs in the threadpool and shows up as
+  "(awaiting)".
+
+Each uvicorn worker is its own process - a profile covers the worker that
+served the request.
+"""
+import asyncio
+import hmac
+import itertools
+import os
+import sys
+import threading
+from collections import Counter
+from typing import Any, Dict, Optional
+
+from .cache import TTLCache
+from .config import settings
+
+_labels: Dict[Any, str] = {}           # code object -> "func (file.py:line)"
+_ids = itertools.count(1)
+_whole_process = threading.Lock()      # one /admin/profile run at a time
+
+# Finished per-request profiles, by id, for GET /admin/profiles/{id}
+profiles: TTLCache[str, str] = TTLCache(settings.profile_keep, settings.profile_keep_seconds)
+
+
+class Sampler:
+    """
+    Samples thread stacks on a background thread until stop().
+
+    thread_id limits sampling to one thread. With `task` (and the loop
+    running on that thread) a sample only counts while that asyncio task is
+    the one executing; otherwise it is tallied as "(awaiting)" or
+    "(other tasks)".
+    """
+
+    def __init__(
+        self,
+        interval: float,
+        thread_id: Optional[int] = None,
+        task: Optional["asyncio.Task[Any]"] = None,
+    ) -> None:
+        self.interval = interval
+        self.thread_id = thread_id
+        self.task = task
+        self.stacks: "Counter[str]" = Counter()
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="clawpay-profiler", daemon=True)
+
+    def start(self) -> "Sampler":
+        self._thread.start()
+        return self
+
+    def stop(self) -> str:
+        """Stop sampling and return the collapsed stacks, hottest first."""
+        self._stop.set()
+        self._thread.join()
+        return "".join(f"{stack} {count}\n" for stack, count in self.stacks.most_common())
+
+    def _run(self) -> None:
+        own = threading.get_ident()
+        names = {thread.ident: thread.name for thread in threading.enumerate()}
+        while not self._stop.wait(self.interval):
+            for thread_id, frame in sys._current_frames().items():
+                if thread_id == own or (self.thread_id is not None and thread_id != self.thread_id):
+                    continue
+                if self.task is not None:
+                    running = _running_task(self.task)
+                    if running is not self.task:
+                        self.stacks["(awaiting)" if running is None else "(other tasks)"] += 1
+                        continue
+                if thread_id not in names:
+                    names = {thread.ident: thread.name for thread in threading.enumerate()}
+                root = names.get(thread_id, f"thread-{thread_id}")
+                self.stacks[_collapse(root, frame)] += 1
+
+
+def _running_task(task: "asyncio.Task[Any]") -> Optional["asyncio.Task[Any]"]:
+    try:
+        return asyncio.current_task(task.get_loop())
+    except RuntimeError:
+        return task  # can't tell from this thread - count the sample
+
+
+def _collapse(root: str, frame: Any) -> str:
+    labels = []
+    while frame is not None:
+        code = frame.f_code
+        label = _labels.get(code)
+        if label is None:
+            label = _labels[code] = f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})"
+        labels.append(label)
+        frame = frame.f_back
+    labels.append(root)
+    return ";".join(reversed(labels))
+
+
+async def profile_process(seconds: float, interval: float) -> Optional[str]:
+    """Sample every thread for `seconds`. None if another run is in progress."""
+    if not _whole_process.acquire(blocking=False):
+        return None
+    try:
+        sampler = Sampler(interval).start()
+        try:
+            await asyncio.sleep(seconds)
+        finally:
+            stacks = sampler.stop()
+        return stacks
+    finally:
+        _whole_process.release()
+
+
+def next_profile_id() -> str:
+    return f"{os.getpid()}-{next(_ids)}"
+
+
+# ─────────────────────────────────────────────
+# Per-request profiling
+# ─────────────────────────────────────────────
+
+
+class ProfileRequestMiddleware:
+    """
+    ASGI middleware: X-Profile: 1 plus a valid X-Admin-Key samples the
+    event-loop thread for this request's task only, until the response
+    starts. The stacks are kept in `profiles` under the X-Profile-Id header
+    the response carries. Other requests pass straight through.
+    """
+
+    def __init__(self, app: Any) -> None:
+        self.app = app
+
+    async def __call__(self, scope: Dict[str, Any], receive: Any, send: Any) -> None:
+        if scope["type"] != "http" or not _wants_profile(scope):
+            await self.app(scope, receive, send)
+            return
+
+        profile_id = next_profile_id()
+        sampler = Sampler(
+            settings.profile_interval_ms / 1000,
+            thread_id=threading.get_ident(),
+            task=asyncio.current_task(),
+        ).start()
+
+        done = False
+
+        def finish() -> None:
+            nonlocal done
+            if not done:
+                done = True
+                profiles.set(profile_id, sampler.stop())
+
+        async def send_with_id(message: Dict[str, Any]) -> None:
+            if message["type"] == "http.response.start":
+                finish()
+                message["headers"] = [*message.get("headers", []), (b"x-profile-id", profile_id.encode())]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_id)
+        finally:
+            finish()  # no-op unless the app failed before starting a response
+
+
+def _wants_profile(scope: Dict[str, Any]) -> bool:
+    if not settings.admin_api_key:
+        return False
+    headers = dict(scope["headers"])
+    return headers.get(b"x-profile") == b"1" and hmac.compare_digest(
+        headers.get(b"x-admin-key", b""), settings.admin_api_key.encode()
+    )
@@ -0,0 +1,67 @@
+"""Client-side rate limiting for outbound API calls."""
+import asyncio
+import heapq
+import itertools
+import time
+from typing import List, Optional, Tuple
+
+
+class PriorityTokenBucket:
+    """
+    Token bucket whose waiters are served lowest-priority-number first.
+
+    `rate` tokens are added per second, up to `burst`. acquire() returns
+    immediately while tokens are left and nobody more important is waiting;
+    otherwise the caller queues, and each token that comes due goes to the
+    queued caller with the smallest priority (FIFO within a priority). A
+    burst of background calls therefore can't make a card issuance wait
+    behind them.
+
+    rate <= 0 disables limiting - acquire() never waits. Event loop only.
+    """
+
+    def __init__(self, rate: float, burst: int) -> None:
+        self.rate = rate
+        self.burst = max(1, burst)
+        self._tokens = float(self.burst)
+        self._updated = time.monotonic()
+        self._waiters: List[Tuple[int, int, asyncio.Future]] = []
+        self._seq = itertools.count()
+        self._dispatcher: Optional[asyncio.Task] = None
+        self.waited = 0
+
+    async def acquire(self, priority: int = 0) -> None:
+        if self.rate <= 0:
+            return
+        self._refill()
+        if self._tokens >= 1 and not self._waiters:
+            self._tokens -= 1
+            return
+
+        self.waited += 1
+        future = asyncio.get_running_loop().create_future()
+        heapq.heappush(self._waiters, (priority, next(self._seq), future))
+        if self._dispatcher is None or self._dispatcher.done():
+            self._dispatcher = asyncio.create_task(self._dispatch())
+        await future
+
+    @property
+    def queued(self) -> int:
+        return len(self._waiters)
+
+    def _refill(self) -> None:
+        now = time.monotonic()
+        self._tokens = min(self.burst, self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    async def _dispatch(self) -> None:
+        while self._waiters:
+            self._refill()
+            if self._tokens < 1:
+                await asyncio.sleep((1 - self._tokens) / self.rate)
+                continue
+            _, _, future = heapq.heappop(self._waiters)
+            if future.done():  # caller was cancelled while queued
+                continue
+            self._tokens -= 1
+            future.set_result(None)
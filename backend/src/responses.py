@@ -0,0 +1,53 @@
+"""Fast JSON responses for large, trusted payloads - orjson + gzip/br."""
+import gzip
+from typing import Any, Dict, Optional
+
+import orjson
+from fastapi import Request, Response
+
+from .config import settings
+
+try:  # optional: pip install brotli (or the "compression" extra)
+    import brotli
+except ImportError:  # pragma: no cover - gzip still works
+    brotli = None
+
+# Naive datetimes are UTC in this app (SQLite drops the tzinfo)
+_ORJSON_OPTIONS = orjson.OPT_NAIVE_UTC | orjson.OPT_UTC_Z
+
+
+def dumps(payload: Any) -> bytes:
+    return orjson.dumps(payload, option=_ORJSON_OPTIONS)
+
+
+def json_response(
+    request: Request,
+    payload: Any,
+    headers: Optional[Dict[str, str]] = None,
+) -> Response:
+    """
+    Serialize payload with orjson and return it as-is.
+
+    Returning a Response skips FastAPI's response_model validation, so only
+    use this for data the app built itself (DB rows mapped to plain dicts).
+    Bodies of at least RESPONSE_COMPRESS_MIN_BYTES are compressed with br
+    or gzip when the client accepts it.
+    """
+    body = dumps(payload)
+    headers = dict(headers or {})
+    if len(body) >= settings.response_compress_min_bytes:
+        body = _compress(body, request.headers.get("accept-encoding", ""), headers)
+    return Response(content=body, media_type="application/json", headers=headers)
+
+
+def _compress(body: bytes, accept_encoding: str, headers: Dict[str, str]) -> bytes:
+    accepted = {token.split(";")[0].strip().lower() for token in accept_encoding.split(",")}
+    if brotli is not None and "br" in accepted:
+        encoding, body = "br", brotli.compress(body, quality=settings.response_brotli_quality)
+    elif "gzip" in accepted:
+        encoding, body = "gzip", gzip.compress(body, compresslevel=settings.response_gzip_level)
+    else:
+        return body
+    headers["Content-Encoding"] = encoding
+    headers["Vary"] = "Accept-Encoding"
+    return body
@@ -1 +1,69 @@
-"""Service initialization."""
+"""
+Service initialization.
+
+The chain, Lithic and indexer services pull in web3 / the Lithic SDK and
+build their clients when constructed - most of the API's import time - so
+they are created on first use instead of at import. Each one is a `Lazy`
+here; code reaches the instance through .get(), and routes through the
+.dependency FastAPI dependency. The app lifespan builds them on a worker
+thread right after startup (see main.py), so the API answers /health
+while they load.
+"""
+import asyncio
+import threading
+from typing import TYPE_CHECKING, Callable, Generic, Optional, TypeVar
+
+if TYPE_CHECKING:
+    from .bnb import ArbitrumService
+    from .indexer import EscrowIndexer
+    from .lithic import LithicService
+
+T = TypeVar("T")
+
+
+class Lazy(Generic[T]):
+    """One process-wide instance, built by `factory` on the first get()."""
+
+    def __init__(self, factory: Callable[[], T]) -> None:
+        self._factory = factory
+        self._instance: Optional[T] = None
+        self._lock = threading.Lock()
+
+    def get(self) -> T:
+        instance = self._instance
+        if instance is None:
+            with self._lock:  # the lifespan's warm-up thread and a request can race
+                if self._instance is None:
+                    self._instance = self._factory()
+                instance = self._instance
+        return instance
+
+    def peek(self) -> Optional[T]:
+        """The instance if it has been built, else None - never builds it."""
+        return self._instance
+
+    async def dependency(self) -> T:
+        """FastAPI dependency: the instance, built off the event loop if it isn't yet."""
+        if self._instance is not None:
+            return self._instance
+        return await asyncio.to_thread(self.get)
+
+
+def _arb_service() -> "ArbitrumService":
+    from .bnb import ArbitrumService
+    return ArbitrumService()
+
+
+def _lithic_service() -> "LithicService":
+    from .lithic import LithicService
+    return LithicService()
+
+
+def _escrow_indexer() -> "EscrowIndexer":
+    from .indexer import EscrowIndexer
+    return EscrowIndexer()
+
+
+arb_service: Lazy["ArbitrumService"] = Lazy(_arb_service)
+lithic_service: Lazy["LithicService"] = Lazy(_lithic_service)
+escrow_indexer: Lazy["EscrowIndexer"] = Lazy(_escrow_indexer)
@@ -1,16 +1,34 @@
 """Arbitrum Sepolia service - MockUSDC payment verification and USDC refunds."""
+import asyncio
 import logging
-from typing import Optional
+import time
+from typing import Dict, List, Optional, Tuple, Union
 
-from web3 import Web3
+from web3 import AsyncWeb3
+from web3.exceptions import TimeExhausted, TransactionNotFound
+from web3.types import RPCEndpoint
 
+from ..cache import TTLCache
 from ..config import settings
+from ..metrics import REFUNDS_SENT, STAGE_SECONDS
+from .events import decode_payment_received, payment_received_logs
+from .nonce import NonceConsumedError, NonceManager, TxRejectedError
+from .rpc import RPCPool
+from .usdc import check_confirmations, check_destination, check_payment, usdc_to_usd
+
+try:
+    from web3.exceptions import Web3RPCError  # v7+
+    RPC_ERRORS: tuple = (ValueError, Web3RPCError)
+except ImportError:
+    RPC_ERRORS = (ValueError,)  # v6 raises ValueError for JSON-RPC errors
 
 logger = logging.getLogger(__name__)
 
-# USDC has 6 decimals: 1 USDC = 1_000_000 units = $1.00
-USDC_DECIMALS = 6
-USDC_UNIT = 10 ** USDC_DECIMALS  # 1_000_000
+# Gas limits for escrow refunds. batchRefund pays the base cost once and a
+# transfer + Refunded event per entry.
+REFUND_GAS = 120_000
+BATCH_REFUND_BASE_GAS = 60_000
+BATCH_REFUND_GAS_PER_ENTRY = 80_000
 
 # ─────────────────────────────────────────────
 # ABIs (minimal - only what we use)
@@ -38,6 +56,17 @@ ESCROW_ABI = [
         "stateMutability": "nonpayable",
         "type": "function",
     },
+    {
+        "inputs": [
+            {"name": "recipients", "type": "address[]"},
+            {"name": "amounts",    "type": "uint256[]"},
+            {"name": "sessionIds", "type": "string[]"},
+        ],
+        "name": "batchRefund",
+        "outputs": [],
+        "stateMutability": "nonpayable",
+        "type": "function",
+    },
     {
         "anonymous": False,
         "inputs": [
@@ -107,29 +136,46 @@ ERC20_ABI = [
 # Helpers
 # ─────────────────────────────────────────────
 
-def _inject_poa(w3: Web3) -> None:
-    """Inject POA middleware - handles both web3.py v5 and v6."""
+def _inject_poa(w3: AsyncWeb3) -> None:
+    """Inject async POA middleware - handles both web3.py v6 and v7+."""
     try:
-        from web3.middleware import ExtraDataToPOAMiddleware  # v6+
+        from web3.middleware import ExtraDataToPOAMiddleware  # v7+
         w3.middleware_onion.inject(ExtraDataToPOAMiddleware, layer=0)
     except ImportError:
-        from web3.middleware import geth_poa_middleware  # v5
-        w3.middleware_onion.inject(geth_poa_middleware, layer=0)
+        from web3.middleware import async_geth_poa_middleware  # v6
+        w3.middleware_onion.inject(async_geth_poa_middleware, layer=0)
 
 
-def usd_to_usdc(usd_amount: float) -> int:
-    """Convert a USD float to MockUSDC units (6 decimals). e.g. 52.50 → 52_500_000."""
-    return int(round(usd_amount * USDC_UNIT))
+def _receipt_from_rpc(raw: Optional[dict]) -> Optional[dict]:
+    """
+    Minimal formatting for a raw eth_getTransactionReceipt result from a batch
+    response - just the fields verify_payment reads. Raw batch results skip
+    web3's result formatters (and a null receipt would otherwise make web3
+    fail the whole batch).
+    """
+    if raw is None:
+        return None
+    return {
+        "status":      int(raw.get("status") or "0x0", 16),
+        "to":          raw.get("to"),
+        "blockNumber": int(raw["blockNumber"], 16),
+        "logs":        raw.get("logs") or [],
+    }
 
 
-def usdc_to_usd(usdc_amount: int) -> float:
-    """Convert MockUSDC units to USD float. e.g. 52_500_000 → 52.50."""
-    return usdc_amount / USDC_UNIT
+def _already_known(exc: Exception) -> bool:
+    """True if a send_raw_transaction error means this exact tx is already pending."""
+    message = str(exc).lower()
+    return "already known" in message or "known transaction" in message
 
 
-def cents_to_usdc(cents: int) -> int:
-    """Convert USD cents to MockUSDC units. e.g. 5250 cents → 52_500_000."""
-    return cents * (USDC_UNIT // 100)  # cents * 10_000
+def _nonce_consumed(exc: Exception) -> bool:
+    """True if a send_raw_transaction error means the nonce is already taken."""
+    message = str(exc).lower()
+    return any(
+        marker in message
+        for marker in ("nonce too low", "replacement transaction underpriced")
+    )
 
 
 # ─────────────────────────────────────────────
@@ -143,13 +189,40 @@ class ArbitrumService:
     Responsibilities:
     - Verify MockUSDC PaymentReceived events in transaction receipts
     - Send MockUSDC refunds from the platform wallet via the escrow contract
+
+    All RPC calls go through an AsyncWeb3 provider so they never block the
+    event loop serving the API. The provider is an RPCPool over every URL in
+    ARB_RPC_URLS, with failover and hedged reads.
     """
 
     def __init__(self) -> None:
-        self.w3 = Web3(Web3.HTTPProvider(settings.arb_rpc_url))
+        self.rpc = RPCPool(
+            settings.rpc_urls,
+            timeout=settings.rpc_timeout_seconds,
+            max_connections=settings.rpc_max_connections_per_endpoint,
+            hedge=settings.rpc_hedge_reads,
+            hedge_min_delay=settings.rpc_hedge_min_delay_seconds,
+            failure_cooldown=settings.rpc_failure_cooldown_seconds,
+        )
+        self.w3 = AsyncWeb3(self.rpc)
         _inject_poa(self.w3)
         self.chain_id = settings.arb_chain_id
 
+        # Local nonce allocation for the platform wallet (see NonceManager)
+        self.nonces = NonceManager()
+        self._nonce_lock = asyncio.Lock()
+        self._gas_price_value = 0
+        self._gas_price_at = float("-inf")
+
+        # Decoded PaymentReceived events for finalized deposits, keyed by tx
+        # hash - retried confirms for the same tx skip the receipt fetch
+        self.receipt_cache: TTLCache[str, dict] = TTLCache(
+            maxsize=settings.receipt_cache_max_entries,
+            ttl=settings.receipt_cache_ttl_seconds,
+        )
+        self._finalized_value = -1
+        self._finalized_at = float("-inf")
+
         # Platform wallet (for sending USDC refunds)
         self.platform_account = None
         if settings.arb_platform_private_key:
@@ -165,7 +238,7 @@ class ArbitrumService:
         self.contract = None
         if settings.arb_escrow_contract:
             self.contract = self.w3.eth.contract(
-                address=Web3.to_checksum_address(settings.arb_escrow_contract),
+                address=AsyncWeb3.to_checksum_address(settings.arb_escrow_contract),
                 abi=ESCROW_ABI,
             )
             logger.info(f"Escrow contract: {settings.arb_escrow_contract}")
@@ -176,19 +249,18 @@ class ArbitrumService:
         self.usdc = None
         if settings.usdc_contract:
             self.usdc = self.w3.eth.contract(
-                address=Web3.to_checksum_address(settings.usdc_contract),
+                address=AsyncWeb3.to_checksum_address(settings.usdc_contract),
                 abi=ERC20_ABI,
             )
             logger.info(f"USDC contract: {settings.usdc_contract}")
         else:
             logger.warning("USDC_CONTRACT not set - USDC operations disabled")
 
-
     # ------------------------------------------------------------------
     # Payment verification
     # ------------------------------------------------------------------
 
-    def verify_payment(
+    async def verify_payment(
         self,
         tx_hash: str,
         session_id: str,
@@ -217,12 +289,114 @@ class ArbitrumService:
         if not self.contract:
             raise ValueError("Escrow contract not configured (ARB_ESCROW_CONTRACT)")
 
-        # Fetch receipt
+        key = tx_hash.lower()
+        event = self.receipt_cache.get(key)
+        if event is None:
+            event = await self._fetch_payment_event(tx_hash)
+            await self._remember_event(key, event)
+
+        head = await self._confirmations_head()
+        if head is not None:
+            check_confirmations(event["block_number"], head, settings.deposit_min_confirmations)
+        return check_payment(
+            payer=event["payer"],
+            paid_usdc=event["amount"],
+            event_session_id=event["session_id"],
+            session_id=session_id,
+            min_usdc=min_usdc,
+            block_number=event["block_number"],
+        )
+
+    async def verify_payments(
+        self,
+        payments: List[Tuple[str, str, int]],
+    ) -> List[Union[dict, ValueError]]:
+        """
+        verify_payment for many deposits at once.
+
+        Args:
+            payments: (tx_hash, session_id, min_usdc) per deposit
+
+        Returns:
+            One entry per input, in order: the verify_payment result dict, or
+            the ValueError that verify_payment would have raised. Receipts not
+            in the cache are fetched in a single JSON-RPC batch request.
+        """
+        if not self.contract:
+            raise ValueError("Escrow contract not configured (ARB_ESCROW_CONTRACT)")
+
+        events: Dict[str, Union[dict, ValueError]] = {}
+        for tx_hash, _, _ in payments:
+            cached = self.receipt_cache.get(tx_hash.lower())
+            if cached is not None:
+                events[tx_hash.lower()] = cached
+
+        missing = list(dict.fromkeys(h for h, _, _ in payments if h.lower() not in events))
+        if missing:
+            try:
+                responses = await self.rpc.make_batch_request(
+                    [(RPCEndpoint("eth_getTransactionReceipt"), [h]) for h in missing]
+                )
+            except Exception as exc:
+                responses = {"error": {"message": str(exc)}}
+            if not isinstance(responses, list):
+                # The whole batch failed - every uncached deposit gets the same error
+                responses = [responses] * len(missing)
+
+            for tx_hash, response in zip(missing, responses):
+                key = tx_hash.lower()
+                try:
+                    if "error" in response:
+                        raise ValueError(f"Transaction not found: {tx_hash} - {response['error']}")
+                    event = self._payment_event(tx_hash, _receipt_from_rpc(response.get("result")))
+                except ValueError as exc:
+                    events[key] = exc
+                    continue
+                await self._remember_event(key, event)
+                events[key] = event
+
+        head: Optional[int] = None
+        if any(not isinstance(event, ValueError) for event in events.values()):
+            try:
+                head = await self._confirmations_head()
+            except ValueError as exc:
+                events = {key: exc for key in events}
+
+        results: List[Union[dict, ValueError]] = []
+        for tx_hash, session_id, min_usdc in payments:
+            event = events[tx_hash.lower()]
+            if isinstance(event, ValueError):
+                results.append(event)
+                continue
+            try:
+                if head is not None:
+                    check_confirmations(event["block_number"], head, settings.deposit_min_confirmations)
+                results.append(
+                    check_payment(
+                        payer=event["payer"],
+                        paid_usdc=event["amount"],
+                        event_session_id=event["session_id"],
+                        session_id=session_id,
+                        min_usdc=min_usdc,
+                        block_number=event["block_number"],
+                    )
+                )
+            except ValueError as exc:
+                results.append(exc)
+        return results
+
+    async def _fetch_payment_event(self, tx_hash: str) -> dict:
+        """Fetch tx_hash's receipt and decode its first PaymentReceived event."""
         try:
-            receipt = self.w3.eth.get_transaction_receipt(tx_hash)
+            with STAGE_SECONDS.time(flow="confirm", stage="receipt"):
+                receipt = await self.w3.eth.get_transaction_receipt(tx_hash)
         except Exception as exc:
             raise ValueError(f"Transaction not found: {tx_hash} - {exc}")
+        with STAGE_SECONDS.time(flow="confirm", stage="decode"):
+            return self._payment_event(tx_hash, receipt)
 
+    def _payment_event(self, tx_hash: str, receipt: Optional[dict]) -> dict:
+        """Validate a deposit receipt and decode its first PaymentReceived event."""
         if receipt is None:
             raise ValueError(f"Transaction receipt not found: {tx_hash}")
 
@@ -230,94 +404,329 @@ class ArbitrumService:
             raise ValueError(f"Transaction reverted: {tx_hash}")
 
         # Verify destination is the escrow contract
-        if receipt["to"].lower() != settings.arb_escrow_contract.lower():
-            raise ValueError(
-                f"Transaction sent to {receipt['to']}, "
-                f"expected escrow {settings.arb_escrow_contract}"
-            )
+        check_destination(receipt["to"], settings.arb_escrow_contract)
 
         # Parse PaymentReceived event
-        try:
-            events = self.contract.events.PaymentReceived().process_receipt(receipt)
-        except Exception as exc:
-            raise ValueError(f"Failed to parse PaymentReceived event: {exc}")
-
-        if not events:
+        logs = payment_received_logs(receipt["logs"], self.contract.address)
+        if not logs:
             raise ValueError("No PaymentReceived event in transaction")
 
-        event = events[0]
-        if event["args"]["sessionId"] != session_id:
-            raise ValueError(
-                f"Session ID mismatch: got '{event['args']['sessionId']}', "
-                f"expected '{session_id}'"
-            )
-
-        paid_usdc = event["args"]["amount"]
-        if paid_usdc < min_usdc:
-            raise ValueError(
-                f"Underpayment: got {paid_usdc} USDC units, minimum {min_usdc}"
-            )
+        try:
+            args = decode_payment_received(logs[0])
+        except ValueError as exc:
+            raise ValueError(f"Failed to parse PaymentReceived event: {exc}")
 
         return {
-            "payer":        event["args"]["payer"],
-            "paid_usdc":    paid_usdc,
-            "paid_usd":     usdc_to_usd(paid_usdc),
-            "session_id":   session_id,
+            "payer":        args["payer"],
+            "amount":       args["amount"],
+            "session_id":   args["sessionId"],
             "block_number": receipt["blockNumber"],
         }
 
+    async def _confirmations_head(self) -> Optional[int]:
+        """Chain head for check_confirmations, or None when being mined is enough."""
+        if settings.deposit_min_confirmations <= 1:
+            return None
+        try:
+            return await self.w3.eth.block_number
+        except Exception as exc:
+            raise ValueError(f"Block number lookup failed: {exc}")
+
+    async def _remember_event(self, key: str, event: dict) -> None:
+        """Cache a decoded deposit, but only once its block is finalized."""
+        if event["block_number"] <= await self._finalized_block(event["block_number"]):
+            self.receipt_cache.set(key, event)
+
+    async def _finalized_block(self, needed: int) -> int:
+        """
+        Latest finalized block number, re-read at most every
+        FINALIZED_BLOCK_TTL_SECONDS and only when `needed` is past what we
+        last saw. Returns -1 if the node can't tell us (nothing gets cached).
+        """
+        now = time.monotonic()
+        if needed > self._finalized_value and now - self._finalized_at > settings.finalized_block_ttl_seconds:
+            self._finalized_at = now
+            try:
+                self._finalized_value = (await self.w3.eth.get_block("finalized"))["number"]
+            except Exception as exc:
+                logger.debug(f"Finalized block lookup failed: {exc}")
+        return self._finalized_value
+
     # ------------------------------------------------------------------
     # Refunds
     # ------------------------------------------------------------------
 
-    def send_refund(
+    async def sign_refund(
         self,
         recipient: str,
         usdc_amount: int,
         session_id: str,
     ) -> dict:
         """
-        Send a MockUSDC refund to a user via the escrow contract.
+        Build and sign an escrow refund() transaction without broadcasting it.
+
+        Signing is split from broadcasting so the refund worker can persist
+        the tx hash and raw transaction before anything reaches the network.
+        The nonce comes from the local NonceManager, so many refunds can be
+        signed and in flight at once without colliding.
+
+        Returns:
+            {"tx_hash": "0x...", "raw_transaction": "0x...", "nonce": 42}
+        """
+        self._require_refund_config()
+        call = self.contract.functions.refund(
+            AsyncWeb3.to_checksum_address(recipient),
+            usdc_amount,
+            session_id,
+        )
+        return await self._sign_call(call, REFUND_GAS)
+
+    async def sign_batch_refund(self, refunds: List[Tuple[str, int, str]]) -> dict:
+        """
+        Build and sign one escrow batchRefund() transaction for many refunds.
 
         Args:
-            recipient:   User's EVM address
-            usdc_amount: Amount in USDC units to refund
-            session_id:  Original session ID (emitted in Refunded event)
+            refunds: (recipient, usdc_amount, session_id) per entry
 
         Returns:
-            {"success": True, "tx_hash": "0x...", "amount_usd": 2.50, "recipient": "0x..."}
+            Same shape as sign_refund().
         """
+        self._require_refund_config()
+        call = self.contract.functions.batchRefund(
+            [AsyncWeb3.to_checksum_address(recipient) for recipient, _, _ in refunds],
+            [usdc_amount for _, usdc_amount, _ in refunds],
+            [session_id for _, _, session_id in refunds],
+        )
+        return await self._sign_call(
+            call, BATCH_REFUND_BASE_GAS + BATCH_REFUND_GAS_PER_ENTRY * len(refunds)
+        )
+
+    def _require_refund_config(self) -> None:
         if not self.platform_account:
             raise ValueError("Platform account not configured (ARB_PLATFORM_PRIVATE_KEY)")
         if not self.contract:
             raise ValueError("Escrow contract not configured (ARB_ESCROW_CONTRACT)")
 
-        checksum_recipient = Web3.to_checksum_address(recipient)
-        nonce = self.w3.eth.get_transaction_count(self.platform_account.address)
+    async def _sign_call(self, call, gas: int) -> dict:
+        await self._ensure_nonce_synced()
+        gas_price = await self._gas_price()
 
-        tx = self.contract.functions.refund(
-            checksum_recipient,
-            usdc_amount,
-            session_id,
-        ).build_transaction(
-            {
-                "chainId":  self.chain_id,
-                "gas":      120_000,
-                "gasPrice": self.w3.eth.gas_price,
-                "nonce":    nonce,
-            }
-        )
+        nonce = self.nonces.allocate()
+        try:
+            tx = await call.build_transaction(
+                {
+                    "chainId":  self.chain_id,
+                    "gas":      gas,
+                    "gasPrice": gas_price,
+                    "nonce":    nonce,
+                }
+            )
+            signed = self.platform_account.sign_transaction(tx)
+        except Exception:
+            self.nonces.release(nonce)
+            raise
+
+        tx_hash = AsyncWeb3.to_hex(signed.hash)
+        self.nonces.track(nonce, tx, tx_hash)
+        return {
+            "tx_hash":         tx_hash,
+            "raw_transaction": AsyncWeb3.to_hex(signed.raw_transaction),
+            "nonce":           nonce,
+        }
+
+    async def broadcast(self, raw_transaction: str, nonce: Optional[int] = None) -> str:
+        """
+        Send a signed transaction and return its hash (0x...).
+
+        Pass the nonce on a first broadcast: if the node rejects the tx, the
+        nonce goes back to the allocator so it doesn't leave a gap. Raises
+        NonceConsumedError if the nonce is already used - by another tx, or
+        by one of ours that was mined or replaced in the meantime - and
+        TxRejectedError for any other JSON-RPC refusal. Transport errors
+        (timeouts, connection resets) propagate as they are: the tx may or
+        may not have reached the node, so its nonce is kept.
+        """
+        try:
+            tx_hash = await self.w3.eth.send_raw_transaction(raw_transaction)
+        except RPC_ERRORS as exc:
+            if _already_known(exc):
+                # Same signed tx is already in the mempool - that's a success
+                return AsyncWeb3.to_hex(AsyncWeb3.keccak(hexstr=raw_transaction))
+            if _nonce_consumed(exc):
+                raise NonceConsumedError(str(exc)) from exc
+            if nonce is not None:
+                self.nonces.release(nonce)
+            raise TxRejectedError(str(exc)) from exc
+        return AsyncWeb3.to_hex(tx_hash)
+
+    async def get_receipt(self, tx_hash: str, timeout: float = 0) -> Optional[dict]:
+        """
+        Return the receipt for tx_hash, or None if it isn't mined yet.
+
+        With timeout > 0, polls for up to that many seconds before giving up.
+        """
+        try:
+            if timeout > 0:
+                return await self.w3.eth.wait_for_transaction_receipt(tx_hash, timeout=timeout)
+            return await self.w3.eth.get_transaction_receipt(tx_hash)
+        except (TransactionNotFound, TimeExhausted):
+            return None
+
+    async def find_receipt(self, tx_hashes: List[str]) -> Tuple[Optional[str], Optional[dict]]:
+        """Return (hash, receipt) for whichever of tx_hashes got mined, else (None, None)."""
+        receipts = await asyncio.gather(*(self.get_receipt(h) for h in tx_hashes))
+        for tx_hash, receipt in zip(tx_hashes, receipts):
+            if receipt is not None:
+                return tx_hash, receipt
+        return None, None
+
+    async def nonce_mined(self, nonce: int) -> bool:
+        """True once the platform wallet has a mined tx (any tx) at this nonce."""
+        mined = await self.w3.eth.get_transaction_count(self.platform_account.address, "latest")
+        return mined > nonce
+
+    async def is_known(self, tx_hash: str) -> bool:
+        """True if the node has tx_hash in its mempool or in a block."""
+        try:
+            await self.w3.eth.get_transaction(tx_hash)
+            return True
+        except TransactionNotFound:
+            return False
+
+    # ------------------------------------------------------------------
+    # Nonce management
+    # ------------------------------------------------------------------
+
+    async def sync_nonce(self) -> int:
+        """Reset the local allocator from the platform wallet's pending tx count."""
+        if not self.platform_account:
+            raise ValueError("Platform account not configured (ARB_PLATFORM_PRIVATE_KEY)")
+        async with self._nonce_lock:
+            pending = await self.w3.eth.get_transaction_count(
+                self.platform_account.address, "pending"
+            )
+            self.nonces.reset(pending)
+        logger.info(f"Platform nonce synced: next={pending}")
+        return pending
+
+    async def _ensure_nonce_synced(self) -> None:
+        if self.nonces.synced:
+            return
+        async with self._nonce_lock:
+            if self.nonces.synced:
+                return
+            pending = await self.w3.eth.get_transaction_count(
+                self.platform_account.address, "pending"
+            )
+            self.nonces.reset(pending)
+
+    async def replace_stuck(self, tx_hash: str) -> Optional[dict]:
+        """
+        Re-sign a stuck tx under the same nonce with a bumped gas price.
 
+        Only acts if tx_hash is the newest broadcast for its nonce and has been
+        pending longer than NONCE_STUCK_AFTER_SECONDS. Returns the replacement
+        as {"tx_hash", "raw_transaction", "nonce"}, or None if nothing was done.
+        """
+        entry = self.nonces.lookup(tx_hash)
+        if entry is None or entry.hashes[-1] != tx_hash:
+            return None
+        if time.monotonic() - entry.sent_at < settings.nonce_stuck_after_seconds:
+            return None
+
+        bumped = entry.gas_price * (100 + settings.nonce_fee_bump_percent) // 100 + 1
+        tx = dict(entry.tx, gasPrice=max(bumped, await self._gas_price(refresh=True)))
         signed = self.platform_account.sign_transaction(tx)
-        raw_tx_hash = self.w3.eth.send_raw_transaction(signed.raw_transaction)
-        receipt = self.w3.eth.wait_for_transaction_receipt(raw_tx_hash)
+        new_hash = await self.broadcast(AsyncWeb3.to_hex(signed.raw_transaction))
+        self.nonces.track(entry.nonce, tx, new_hash)
+
+        logger.warning(
+            f"Replaced stuck tx {tx_hash[:16]}... (nonce {entry.nonce}) "
+            f"with {new_hash[:16]}... at {tx['gasPrice']} wei"
+        )
+        return {
+            "tx_hash":         new_hash,
+            "raw_transaction": AsyncWeb3.to_hex(signed.raw_transaction),
+            "nonce":           entry.nonce,
+        }
+
+    async def maintain_nonces(self) -> None:
+        """
+        Drop mined txs from the allocator and fill nonce gaps.
+
+        A released nonce that no new refund picked up within
+        NONCE_GAP_FILL_AFTER_SECONDS blocks every later in-flight tx, so it is
+        burned with a zero-value self-transfer.
+        """
+        if not self.platform_account or not self.nonces.synced:
+            return
+        address = self.platform_account.address
+        self.nonces.confirm_below(await self.w3.eth.get_transaction_count(address, "latest"))
+
+        for nonce in self.nonces.stale_gaps(settings.nonce_gap_fill_after_seconds):
+            if not self.nonces.claim(nonce):
+                continue
+            try:
+                tx = {
+                    "chainId":  self.chain_id,
+                    "to":       address,
+                    "value":    0,
+                    "gasPrice": await self._gas_price(),
+                    "nonce":    nonce,
+                }
+                tx["gas"] = await self.w3.eth.estimate_gas({"from": address, "to": address, "value": 0})
+                signed = self.platform_account.sign_transaction(tx)
+                filler_hash = await self.broadcast(AsyncWeb3.to_hex(signed.raw_transaction), nonce=nonce)
+            except Exception as exc:
+                # Back into the released set, so the next round (or a new refund) fills it
+                self.nonces.release(nonce)
+                logger.error(f"Nonce gap fill failed for nonce {nonce}: {exc}")
+                continue
+            self.nonces.track(nonce, tx, filler_hash)
+            logger.warning(f"Filled nonce gap {nonce} with {filler_hash[:16]}...")
+
+    async def _gas_price(self, refresh: bool = False) -> int:
+        """Network gas price, re-read at most every GAS_PRICE_TTL_SECONDS."""
+        now = time.monotonic()
+        if refresh or now - self._gas_price_at > settings.gas_price_ttl_seconds:
+            self._gas_price_value = await self.w3.eth.gas_price
+            self._gas_price_at = now
+        return self._gas_price_value
+
+    async def send_refund(
+        self,
+        recipient: str,
+        usdc_amount: int,
+        session_id: str,
+    ) -> dict:
+        """
+        Send a MockUSDC refund to a user via the escrow contract and wait for it.
+
+        The settlement webhook queues refunds for the RefundWorker instead; this
+        is the one-shot path for scripts and manual refunds.
+
+        Args:
+            recipient:   User's EVM address
+            usdc_amount: Amount in USDC units to refund
+            session_id:  Original session ID (emitted in Refunded event)
+
+        Returns:
+            {"success": True, "tx_hash": "0x...", "amount_usd": 2.50, "recipient": "0x..."}
+        """
+        with STAGE_SECONDS.time(flow="refund", stage="sign"):
+            signed = await self.sign_refund(recipient, usdc_amount, session_id)
+        with STAGE_SECONDS.time(flow="refund", stage="broadcast"):
+            tx_hash = await self.broadcast(signed["raw_transaction"], nonce=signed["nonce"])
+        with STAGE_SECONDS.time(flow="refund", stage="receipt"):
+            receipt = await self.w3.eth.wait_for_transaction_receipt(tx_hash)
 
         if receipt["status"] != 1:
-            raise RuntimeError(f"Refund transaction reverted: {raw_tx_hash.hex()}")
+            raise RuntimeError(f"Refund transaction reverted: {tx_hash}")
+        REFUNDS_SENT.inc()
 
         return {
             "success":    True,
-            "tx_hash":    raw_tx_hash.hex(),
+            "tx_hash":    tx_hash,
             "amount_usd": usdc_to_usd(usdc_amount),
             "recipient":  recipient,
         }
@@ -326,11 +735,11 @@ class ArbitrumService:
     # Utilities
     # ------------------------------------------------------------------
 
-    def is_connected(self) -> bool:
+    async def is_connected(self) -> bool:
         try:
-            return self.w3.is_connected()
+            return await self.w3.is_connected()
         except Exception:
             return False
 
-
-arb_service = ArbitrumService()
+    async def close(self) -> None:
+        await self.rpc.disconnect()
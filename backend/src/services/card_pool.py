@@ -0,0 +1,261 @@
+"""Warm pool of pre-created Lithic cards - takes card creation off the confirm path."""
+import asyncio
+import logging
+from typing import Any, Dict, List, Optional
+
+from sqlalchemy import func, update
+from sqlmodel import Session, select
+
+from ..config import settings
+from ..database import engine
+from ..metrics import CARD_POOL_AVAILABLE, CARD_POOL_CARDS, CARD_POOL_CLAIMS
+from ..models import PooledCard, PooledCardStatus, utc_now
+from . import lithic_service
+
+logger = logging.getLogger(__name__)
+
+
+class CardPool:
+    """
+    Keeps CARD_POOL_TARGET_SIZE SINGLE_USE cards created and PAUSED.
+
+    claim() takes the oldest available card with a conditional UPDATE (so
+    concurrent confirms, in any process, never get the same one) and opens
+    it with the requested spend limit - one Lithic update instead of a
+    create. It returns None when the pool is empty or disabled, and the
+    caller creates a card the usual way. A background task tops the pool
+    back up, CARD_POOL_REFILL_CONCURRENCY creations at a time.
+
+    Cards whose activation fails are marked DISCARDED rather than retried,
+    and closed at Lithic: after a timeout the update may have landed,
+    leaving an OPEN card with the session's spend limit that nobody owns.
+    A close that fails is retried by the refill task until the card is
+    CLOSED.
+    """
+
+    def __init__(self) -> None:
+        self._task: Optional[asyncio.Task] = None
+        self._wake = asyncio.Event()
+        self.hits = 0
+        self.misses = 0
+        self.activation_failures = 0
+        self.refill_failures = 0
+        self.created = 0
+        self.closed = 0
+        self._available = 0
+
+    @property
+    def enabled(self) -> bool:
+        return settings.card_pool_target_size > 0 and lithic_service.get().client is not None
+
+    # ------------------------------------------------------------------
+    # Lifecycle
+    # ------------------------------------------------------------------
+
+    def start(self) -> None:
+        if self._task is not None or not self.enabled:
+            return
+        self._task = asyncio.create_task(self._refill_forever())
+        logger.info(f"Card pool started - target {settings.card_pool_target_size} cards")
+
+    async def stop(self) -> None:
+        if self._task is None:
+            return
+        self._task.cancel()
+        await asyncio.gather(self._task, return_exceptions=True)
+        self._task = None
+
+    # ------------------------------------------------------------------
+    # Claiming
+    # ------------------------------------------------------------------
+
+    async def claim(self, session_id: str, spend_limit_cents: int) -> Optional[Dict[str, Any]]:
+        """An activated card dict (create_virtual_card shape), or None on a pool miss."""
+        if not self.enabled:
+            return None
+        card = await asyncio.to_thread(self._take, session_id)
+        CARD_POOL_AVAILABLE.set(self._available)
+        self._wake.set()
+        if card is None:
+            self.misses += 1
+            CARD_POOL_CLAIMS.inc(result="miss")
+            return None
+
+        try:
+            activated = await lithic_service.get().activate_card(
+                card.token,
+                spend_limit_cents=spend_limit_cents,
+                memo=f"ClawPay {session_id[:8]}",
+            )
+        except Exception as exc:
+            self.activation_failures += 1
+            CARD_POOL_CLAIMS.inc(result="activation_failed")
+            logger.error(f"Pooled card {card.token} activation failed, discarding: {exc}")
+            await asyncio.to_thread(self._set_status, card.token, PooledCardStatus.DISCARDED)
+            await self._close(card.token)
+            return None
+
+        self.hits += 1
+        CARD_POOL_CLAIMS.inc(result="hit")
+        return {
+            "token":     card.token,
+            "last_four": card.last_four,
+            "exp_month": card.exp_month,
+            "exp_year":  card.exp_year,
+            "state":     activated.get("state"),
+            "pan":       activated.get("pan") or card.pan,
+            "cvv":       activated.get("cvv") or card.cvv,
+        }
+
+    def stats(self) -> Dict[str, Any]:
+        lookups = self.hits + self.misses
+        return {
+            "enabled":             self.enabled,
+            "target_size":         settings.card_pool_target_size,
+            "available":           self._available,
+            "hits":                self.hits,
+            "misses":              self.misses,
+            "hit_rate":            round(self.hits / lookups, 4) if lookups else None,
+            "created":             self.created,
+            "activation_failures": self.activation_failures,
+            "refill_failures":     self.refill_failures,
+            "closed":              self.closed,
+        }
+
+    async def _close(self, token: str) -> bool:
+        """Close a discarded card at Lithic and mark it CLOSED. False (and it stays DISCARDED) on failure."""
+        try:
+            await lithic_service.get().close_card(token)
+        except Exception as exc:
+            CARD_POOL_CARDS.inc(event="close_failed")
+            logger.warning(f"Card pool: closing discarded card {token} failed, will retry: {exc}")
+            return False
+        await asyncio.to_thread(self._set_status, token, PooledCardStatus.CLOSED)
+        self.closed += 1
+        CARD_POOL_CARDS.inc(event="closed")
+        return True
+
+    # ------------------------------------------------------------------
+    # Refill
+    # ------------------------------------------------------------------
+
+    async def _refill_forever(self) -> None:
+        while True:
+            try:
+                await self.refill()
+            except asyncio.CancelledError:
+                raise
+            except Exception as exc:
+                logger.error(f"Card pool refill failed: {exc}")
+            self._wake.clear()
+            try:
+                await asyncio.wait_for(self._wake.wait(), settings.card_pool_refill_interval_seconds)
+            except asyncio.TimeoutError:
+                pass
+
+    async def refill(self) -> int:
+        """
+        Close any discarded cards still open at Lithic, then create cards
+        until the pool is at its target size. Returns how many were added.
+        """
+        for token in await asyncio.to_thread(self._discarded, settings.card_pool_refill_concurrency):
+            await self._close(token)
+
+        self._available = await asyncio.to_thread(self._count_available)
+        CARD_POOL_AVAILABLE.set(self._available)
+        missing = settings.card_pool_target_size - self._available
+        if missing <= 0:
+            return 0
+
+        limit = asyncio.Semaphore(settings.card_pool_refill_concurrency)
+
+        async def create_one() -> bool:
+            async with limit:
+                try:
+                    card = await lithic_service.get().create_paused_card()
+                except Exception as exc:
+                    self.refill_failures += 1
+                    CARD_POOL_CARDS.inc(event="create_failed")
+                    logger.warning(f"Card pool: create failed: {exc}")
+                    return False
+            await asyncio.to_thread(self._insert, card)
+            self._available += 1
+            self.created += 1
+            CARD_POOL_CARDS.inc(event="created")
+            CARD_POOL_AVAILABLE.set(self._available)
+            return True
+
+        added = sum(await asyncio.gather(*(create_one() for _ in range(missing))))
+        if added:
+            logger.info(f"Card pool: added {added} card(s), {self._available} available")
+        return added
+
+    # ------------------------------------------------------------------
+    # DB helpers (run in a thread)
+    # ------------------------------------------------------------------
+
+    def _take(self, session_id: str) -> Optional[PooledCard]:
+        with Session(engine) as db:
+            for _ in range(3):  # lost the race for the oldest card - try the next one
+                card = db.exec(
+                    select(PooledCard)
+                    .where(PooledCard.status == PooledCardStatus.AVAILABLE)
+                    .order_by(PooledCard.created_at)
+                ).first()
+                if card is None:
+                    self._available = 0
+                    return None
+                result = db.exec(
+                    update(PooledCard)
+                    .where(PooledCard.token == card.token)
+                    .where(PooledCard.status == PooledCardStatus.AVAILABLE)
+                    .values(status=PooledCardStatus.CLAIMED, session_id=session_id, claimed_at=utc_now())
+                )
+                db.commit()
+                if result.rowcount:
+                    self._available = max(0, self._available - 1)
+                    db.refresh(card)
+                    db.expunge(card)
+                    return card
+            return None
+
+    @staticmethod
+    def _insert(card: Dict[str, Any]) -> None:
+        with Session(engine) as db:
+            db.add(
+                PooledCard(
+                    token=card["token"],
+                    last_four=card.get("last_four"),
+                    exp_month=str(card.get("exp_month", "")).zfill(2),
+                    exp_year=str(card.get("exp_year", "")),
+                    pan=card.get("pan"),
+                    cvv=card.get("cvv"),
+                )
+            )
+            db.commit()
+
+    @staticmethod
+    def _set_status(token: str, status: str) -> None:
+        with Session(engine) as db:
+            db.exec(update(PooledCard).where(PooledCard.token == token).values(status=status))
+            db.commit()
+
+    @staticmethod
+    def _discarded(limit: int) -> List[str]:
+        with Session(engine) as db:
+            return list(db.exec(
+                select(PooledCard.token)
+                .where(PooledCard.status == PooledCardStatus.DISCARDED)
+                .order_by(PooledCard.created_at)
+                .limit(limit)
+            ).all())
+
+    @staticmethod
+    def _count_available() -> int:
+        with Session(engine) as db:
+            return db.exec(
+                select(func.count()).select_from(PooledCard).where(PooledCard.status == PooledCardStatus.AVAILABLE)
+            ).one()
+
+
+card_pool = CardPool()
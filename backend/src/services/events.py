@@ -0,0 +1,102 @@
+"""
+Escrow event decoding - PaymentReceived / Refunded without web3's ABI codec.
+
+contract.events.X().process_receipt() runs every log in a receipt through
+the generic event ABI machinery and warns on each one that doesn't match.
+The escrow's events have fixed layouts, so we filter on address + topic0
+and slice the data words directly:
+
+    PaymentReceived(address indexed payer, uint256 amount, string sessionId, uint256 timestamp)
+        topics[1] = payer
+        data      = amount | offset(sessionId) | timestamp | len | bytes...
+
+    Refunded(address indexed recipient, uint256 amount, string sessionId)
+        topics[1] = recipient
+        data      = amount | offset(sessionId) | len | bytes...
+"""
+from typing import Any, Iterable, List, Optional, Union
+
+from web3 import AsyncWeb3
+
+PAYMENT_RECEIVED_TOPIC = AsyncWeb3.to_hex(
+    AsyncWeb3.keccak(text="PaymentReceived(address,uint256,string,uint256)")
+)
+REFUNDED_TOPIC = AsyncWeb3.to_hex(AsyncWeb3.keccak(text="Refunded(address,uint256,string)"))
+
+_PAYMENT_RECEIVED_TOPIC_BYTES = bytes.fromhex(PAYMENT_RECEIVED_TOPIC[2:])
+_REFUNDED_TOPIC_BYTES = bytes.fromhex(REFUNDED_TOPIC[2:])
+
+WORD = 32
+
+
+class EventDecodeError(ValueError):
+    """A log matched an escrow event topic but its data is malformed."""
+
+
+def _to_bytes(value: Union[bytes, str]) -> bytes:
+    if isinstance(value, str):
+        return bytes.fromhex(value[2:] if value.startswith(("0x", "0X")) else value)
+    return bytes(value)
+
+
+def _address(value: Union[bytes, str]) -> str:
+    return AsyncWeb3.to_checksum_address(_to_bytes(value)[-20:])
+
+
+def _uint(data: bytes, word: int) -> int:
+    return int.from_bytes(data[word * WORD:(word + 1) * WORD], "big")
+
+
+def _string(data: bytes, offset: int) -> str:
+    length = int.from_bytes(data[offset:offset + WORD], "big")
+    start = offset + WORD
+    if start + length > len(data):
+        raise EventDecodeError(f"string of length {length} overruns {len(data)} bytes of log data")
+    return data[start:start + length].decode("utf-8")
+
+
+def topic0(log: Any) -> Optional[bytes]:
+    topics = log["topics"]
+    return _to_bytes(topics[0]) if topics else None
+
+
+def decode_payment_received(log: Any) -> dict:
+    """Decode one PaymentReceived log → {payer, amount, sessionId, timestamp}."""
+    data = _to_bytes(log["data"])
+    if len(data) < 4 * WORD or len(log["topics"]) < 2:
+        raise EventDecodeError("PaymentReceived log too short")
+    return {
+        "payer":     _address(log["topics"][1]),
+        "amount":    _uint(data, 0),
+        "sessionId": _string(data, _uint(data, 1)),
+        "timestamp": _uint(data, 2),
+    }
+
+
+def decode_refunded(log: Any) -> dict:
+    """Decode one Refunded log → {recipient, amount, sessionId}."""
+    data = _to_bytes(log["data"])
+    if len(data) < 3 * WORD or len(log["topics"]) < 2:
+        raise EventDecodeError("Refunded log too short")
+    return {
+        "recipient": _address(log["topics"][1]),
+        "amount":    _uint(data, 0),
+        "sessionId": _string(data, _uint(data, 1)),
+    }
+
+
+def payment_received_logs(logs: Iterable[Any], address: str) -> List[Any]:
+    """Logs emitted by `address` whose topic0 is PaymentReceived, in receipt order."""
+    address = address.lower()
+    return [
+        log for log in logs
+        if str(log["address"]).lower() == address and topic0(log) == _PAYMENT_RECEIVED_TOPIC_BYTES
+    ]
+
+
+def is_payment_received(log: Any) -> bool:
+    return topic0(log) == _PAYMENT_RECEIVED_TOPIC_BYTES
+
+
+def is_refunded(log: Any) -> bool:
+    return topic0(log) == _REFUNDED_TOPIC_BYTES
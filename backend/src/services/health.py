@@ -0,0 +1,173 @@
+"""Background health prober - the cached status behind GET /readyz."""
+import asyncio
+import logging
+import time
+from datetime import datetime, timezone
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+
+from sqlalchemy import text
+
+from ..config import settings
+from ..database import engine, read_engine
+from . import arb_service, lithic_service
+
+logger = logging.getLogger(__name__)
+
+
+class HealthProber:
+    """
+    Checks the database, the RPC pool and Lithic every
+    health_probe_interval_seconds and keeps the last result, so load
+    balancer probes read a dict instead of making a round trip each.
+
+    Each check records ok / latency_ms (and error); the RPC check also
+    records the head block number. Ready means the chain and Lithic
+    services have been built, the primary database answered the last
+    probe and that probe is fresh. RPC and Lithic failures are reported as
+    "degraded" but don't fail readiness: an outage there hits every
+    replica alike, and taking them all out of rotation would also stop the
+    webhook inbox, card listings and everything else that doesn't need
+    the chain or the issuer.
+    """
+
+    def __init__(self) -> None:
+        self._task: Optional[asyncio.Task] = None
+        self._wake = asyncio.Event()
+        self._checks: Dict[str, Dict[str, Any]] = {}
+        self._checked_at: Optional[datetime] = None
+        self._checked_monotonic = 0.0
+        self._failing: List[str] = []
+        self.probes = 0
+
+    # ------------------------------------------------------------------
+    # Lifecycle
+    # ------------------------------------------------------------------
+
+    def start(self) -> None:
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        if self._task is None:
+            return
+        self._task.cancel()
+        await asyncio.gather(self._task, return_exceptions=True)
+        self._task = None
+
+    def wake(self) -> None:
+        """Probe now instead of at the end of the interval (called once the services are up)."""
+        self._wake.set()
+
+    # ------------------------------------------------------------------
+    # Status
+    # ------------------------------------------------------------------
+
+    def status(self) -> Dict[str, Any]:
+        """The last probe's result with the readiness verdict - never does I/O."""
+        if self._checked_at is None:
+            return {"ready": False, "status": "starting", "checked_at": None, "age_seconds": None, "checks": {}}
+
+        age = time.monotonic() - self._checked_monotonic
+        checks = self._checks
+        services_built = arb_service.peek() is not None and lithic_service.peek() is not None
+        if not services_built:
+            state = "starting"
+        elif age > settings.health_stale_after_seconds:
+            state = "stale"
+        elif not checks["database"]["ok"]:
+            state = "unavailable"
+        elif any(check["ok"] is False for check in checks.values()):
+            state = "degraded"
+        else:
+            state = "ok"
+        return {
+            "ready": state in ("ok", "degraded"),
+            "status": state,
+            "checked_at": self._checked_at.isoformat().replace("+00:00", "Z"),
+            "age_seconds": round(age, 3),
+            "checks": checks,
+        }
+
+    def rpc_connected(self) -> Optional[bool]:
+        """Whether the RPC pool answered the last probe; None before the first one."""
+        return self._checks.get("rpc", {}).get("ok")
+
+    # ------------------------------------------------------------------
+    # Probing
+    # ------------------------------------------------------------------
+
+    async def probe(self) -> Dict[str, Dict[str, Any]]:
+        """Run every check concurrently and store the result."""
+        checks: Dict[str, Callable[[], Awaitable[Dict[str, Any]]]] = {
+            "database": lambda: asyncio.to_thread(_ping_database, engine),
+            "rpc": _probe_rpc,
+            "lithic": _probe_lithic,
+        }
+        if read_engine is not engine:
+            checks["database_replica"] = lambda: asyncio.to_thread(_ping_database, read_engine)
+
+        results = await asyncio.gather(*(_timed(check) for check in checks.values()))
+        self._checks = dict(zip(checks, results))
+        self._checked_at = datetime.now(timezone.utc)
+        self._checked_monotonic = time.monotonic()
+        self.probes += 1
+        return self._checks
+
+    async def _run(self) -> None:
+        while True:
+            self._wake.clear()  # a wake() during the probe below triggers the next one at once
+            try:
+                checks = await self.probe()
+                failing = [name for name, check in checks.items() if check["ok"] is False]
+                if failing != self._failing:  # log changes, not every failed round
+                    if failing:
+                        logger.warning(f"Health probe: {', '.join(failing)} failing")
+                    else:
+                        logger.info("Health probe: all checks passing again")
+                    self._failing = failing
+            except Exception as exc:
+                logger.error(f"Health probe failed: {exc}", exc_info=True)
+            try:
+                await asyncio.wait_for(self._wake.wait(), settings.health_probe_interval_seconds)
+            except asyncio.TimeoutError:
+                pass
+
+
+async def _timed(check: Callable[[], Awaitable[Dict[str, Any]]]) -> Dict[str, Any]:
+    """Run one check under the probe timeout; {"ok": False, "error": ...} if it raises or times out."""
+    start = time.perf_counter()
+    try:
+        result = await asyncio.wait_for(check(), settings.health_probe_timeout_seconds)
+    except asyncio.TimeoutError:
+        result = {"ok": False, "error": f"timed out after {settings.health_probe_timeout_seconds:g}s"}
+    except Exception as exc:
+        result = {"ok": False, "error": f"{type(exc).__name__}: {exc}"}
+    if result["ok"] is not None:
+        result["latency_ms"] = round((time.perf_counter() - start) * 1000, 2)
+    return result
+
+
+def _ping_database(bind: Any) -> Dict[str, Any]:
+    with bind.connect() as conn:
+        conn.execute(text("SELECT 1"))
+    return {"ok": True}
+
+
+async def _probe_rpc() -> Dict[str, Any]:
+    arb = arb_service.peek()
+    if arb is None:
+        return {"ok": None, "error": "starting"}
+    return {"ok": True, "block_number": await arb.w3.eth.block_number}
+
+
+async def _probe_lithic() -> Dict[str, Any]:
+    lithic = lithic_service.peek()
+    if lithic is None:
+        return {"ok": None, "error": "starting"}
+    if lithic.client is None:
+        return {"ok": None, "error": "not configured"}
+    await lithic.ping()
+    return {"ok": True}
+
+
+health_prober = HealthProber()
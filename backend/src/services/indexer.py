@@ -0,0 +1,301 @@
+"""Escrow event indexer - follows PaymentReceived / Refunded logs into local tables."""
+import asyncio
+import logging
+from typing import Dict, List, Optional, Tuple
+
+from sqlalchemy import delete
+from sqlmodel import Session, select
+from web3 import AsyncWeb3
+from web3.types import RPCEndpoint
+
+from ..config import settings
+from ..database import engine
+from ..models import IndexerCursor, PaymentEvent, RefundEvent, utc_now
+from . import arb_service
+from .usdc import check_destination, check_payment
+from .events import (
+    PAYMENT_RECEIVED_TOPIC,
+    REFUNDED_TOPIC,
+    decode_payment_received,
+    decode_refunded,
+    is_payment_received,
+    is_refunded,
+)
+
+logger = logging.getLogger(__name__)
+
+CURSOR_NAME = "escrow"
+
+
+class EscrowIndexer:
+    """
+    Tails the escrow contract with eth_getLogs and stores its events.
+
+    Each poll covers at most indexer_block_range blocks past the cursor. The
+    cursor stores the hash of the last indexed block; if the next block's
+    parentHash doesn't match it, the chain reorganised under us and the
+    indexer rewinds indexer_reorg_depth blocks, deleting what it had stored
+    for them, and re-indexes from there. A range and its cursor move are
+    written in one DB transaction, so a crash never leaves half a range.
+
+    confirm_payment looks deposits up here first (find_payment), and only
+    falls back to a live receipt fetch for blocks the indexer hasn't reached.
+    """
+
+    def __init__(self) -> None:
+        self._task: Optional[asyncio.Task] = None
+
+    # ------------------------------------------------------------------
+    # Lifecycle
+    # ------------------------------------------------------------------
+
+    def start(self) -> None:
+        if self._task is not None or not settings.indexer_enabled:
+            return
+        if not arb_service.get().contract:
+            logger.warning("Escrow indexer disabled - ARB_ESCROW_CONTRACT not set")
+            return
+        self._task = asyncio.create_task(self._run())
+        logger.info("Escrow indexer started")
+
+    async def stop(self) -> None:
+        if self._task is None:
+            return
+        self._task.cancel()
+        await asyncio.gather(self._task, return_exceptions=True)
+        self._task = None
+
+    async def _run(self) -> None:
+        while True:
+            try:
+                covered = await self.poll_once()
+            except asyncio.CancelledError:
+                raise
+            except Exception as exc:
+                logger.error(f"Escrow indexer poll failed: {exc}")
+                covered = 0
+            if covered == 0:
+                await asyncio.sleep(settings.indexer_poll_interval_seconds)
+
+    # ------------------------------------------------------------------
+    # Indexing
+    # ------------------------------------------------------------------
+
+    async def poll_once(self) -> int:
+        """Index the next block range. Returns the number of blocks covered (0 = caught up)."""
+        w3 = arb_service.get().w3
+        head = await w3.eth.block_number
+
+        cursor = await asyncio.to_thread(self._load_cursor)
+        if cursor is None:
+            start = settings.indexer_start_block or max(0, head - settings.indexer_initial_lookback_blocks)
+            last_block, last_hash = start - 1, None
+        else:
+            last_block, last_hash = cursor
+
+        if last_block >= head:
+            return 0
+
+        from_block = last_block + 1
+        to_block = min(head, from_block + settings.indexer_block_range - 1)
+
+        first = await w3.eth.get_block(from_block)
+        last = first if to_block == from_block else await w3.eth.get_block(to_block)
+        if last_hash is not None and AsyncWeb3.to_hex(first["parentHash"]) != last_hash:
+            await self._rewind(last_block)
+            return 1
+
+        logs = await w3.eth.get_logs(
+            {
+                "address":   arb_service.get().contract.address,
+                "fromBlock": from_block,
+                "toBlock":   to_block,
+                "topics":    [[PAYMENT_RECEIVED_TOPIC, REFUNDED_TOPIC]],
+            }
+        )
+        to_hash = AsyncWeb3.to_hex(last["hash"])
+        if any(log["blockNumber"] == to_block and AsyncWeb3.to_hex(log["blockHash"]) != to_hash for log in logs):
+            return 0  # to_block was replaced while we were reading it - try again
+
+        payments, refunds = self._decode(logs)
+        if payments:
+            await self._fill_tx_to(payments)
+        await asyncio.to_thread(self._store, from_block, to_block, to_hash, payments, refunds)
+        if payments or refunds:
+            logger.info(
+                f"Indexed blocks {from_block}-{to_block}: "
+                f"{len(payments)} payment(s), {len(refunds)} refund(s)"
+            )
+        return to_block - from_block + 1
+
+    async def _rewind(self, mismatched_block: int) -> None:
+        rewind_to = max(0, mismatched_block - settings.indexer_reorg_depth)
+        block = await arb_service.get().w3.eth.get_block(rewind_to)
+        logger.warning(f"Reorg detected at block {mismatched_block} - rewinding indexer to {rewind_to}")
+        await asyncio.to_thread(self._store_rewind, rewind_to, AsyncWeb3.to_hex(block["hash"]))
+
+    async def _fill_tx_to(self, payments: List[PaymentEvent]) -> None:
+        """
+        Record each deposit's transaction `to`, for verify_indexed's escrow
+        check - one JSON-RPC batch per range. Any failure fails the poll, so
+        the range is retried rather than stored without it.
+        """
+        tx_hashes = list(dict.fromkeys(p.tx_hash for p in payments))
+        responses = await arb_service.get().rpc.make_batch_request(
+            [(RPCEndpoint("eth_getTransactionByHash"), [h]) for h in tx_hashes]
+        )
+        if not isinstance(responses, list):
+            raise ValueError(f"Transaction lookup failed: {responses.get('error')}")
+        tx_to: Dict[str, str] = {}
+        for tx_hash, response in zip(tx_hashes, responses):
+            tx = response.get("result")
+            if "error" in response or tx is None:
+                raise ValueError(f"Transaction not found: {tx_hash} - {response.get('error')}")
+            tx_to[tx_hash] = (tx.get("to") or "").lower()
+        for payment in payments:
+            payment.tx_to = tx_to[payment.tx_hash]
+
+    def _decode(self, logs: list) -> Tuple[List[PaymentEvent], List[RefundEvent]]:
+        payments: List[PaymentEvent] = []
+        refunds: List[RefundEvent] = []
+
+        for log in logs:
+            common = {
+                "tx_hash":      AsyncWeb3.to_hex(log["transactionHash"]),
+                "log_index":    log["logIndex"],
+                "block_number": log["blockNumber"],
+                "block_hash":   AsyncWeb3.to_hex(log["blockHash"]),
+            }
+            try:
+                if is_payment_received(log):
+                    args = decode_payment_received(log)
+                    payments.append(
+                        PaymentEvent(
+                            **common,
+                            payer=args["payer"],
+                            amount_usdc=str(args["amount"]),
+                            session_id=args["sessionId"],
+                            timestamp=args["timestamp"],
+                            contract=str(log["address"]).lower(),
+                        )
+                    )
+                elif is_refunded(log):
+                    args = decode_refunded(log)
+                    refunds.append(
+                        RefundEvent(
+                            **common,
+                            recipient=args["recipient"],
+                            amount_usdc=str(args["amount"]),
+                            session_id=args["sessionId"],
+                        )
+                    )
+            except Exception as exc:
+                logger.warning(f"Indexer: skipping undecodable log {common['tx_hash']}#{common['log_index']}: {exc}")
+        return payments, refunds
+
+    # ------------------------------------------------------------------
+    # Lookups (sync - call from the threadpool)
+    # ------------------------------------------------------------------
+
+    @staticmethod
+    def _confirmed_through(db: Session) -> int:
+        """
+        Last block with deposit_min_confirmations as of the cursor. The
+        cursor trails the head, so an event past it may still be confirmed -
+        it just isn't decided here: find_payment leaves it to the live path.
+        """
+        cursor = db.get(IndexerCursor, CURSOR_NAME)
+        if cursor is None:
+            return -1
+        return cursor.block_number - settings.deposit_min_confirmations + 1
+
+    @classmethod
+    def find_payment(cls, db: Session, tx_hash: str) -> Optional[PaymentEvent]:
+        """First indexed, confirmed PaymentReceived event in tx_hash, or None if not indexed (yet)."""
+        return db.exec(
+            select(PaymentEvent)
+            .where(PaymentEvent.tx_hash == tx_hash.lower())
+            .where(PaymentEvent.block_number <= cls._confirmed_through(db))
+            .order_by(PaymentEvent.log_index)
+        ).first()
+
+    @classmethod
+    def find_payments(cls, db: Session, tx_hashes: List[str]) -> Dict[str, PaymentEvent]:
+        """find_payment for many txs in one query, keyed by lower-case tx hash."""
+        found: Dict[str, PaymentEvent] = {}
+        rows = db.exec(
+            select(PaymentEvent)
+            .where(PaymentEvent.tx_hash.in_([h.lower() for h in tx_hashes]))
+            .where(PaymentEvent.block_number <= cls._confirmed_through(db))
+            .order_by(PaymentEvent.log_index)
+        ).all()
+        for event in rows:
+            found.setdefault(event.tx_hash, event)
+        return found
+
+    @staticmethod
+    def verify_indexed(event: PaymentEvent, session_id: str, min_usdc: int = 0) -> dict:
+        """
+        Same checks and result as ArbitrumService.verify_payment, from an
+        indexed row: emitted by the escrow, in a tx sent to the escrow, for
+        this session and amount. The confirmations threshold was applied by
+        find_payment.
+        """
+        if event.contract != settings.arb_escrow_contract.lower():
+            raise ValueError("No PaymentReceived event in transaction")
+        check_destination(event.tx_to, settings.arb_escrow_contract)
+        return check_payment(
+            payer=event.payer,
+            paid_usdc=int(event.amount_usdc),
+            event_session_id=event.session_id,
+            session_id=session_id,
+            min_usdc=min_usdc,
+            block_number=event.block_number,
+        )
+
+    # ------------------------------------------------------------------
+    # DB helpers (run in a thread)
+    # ------------------------------------------------------------------
+
+    def _load_cursor(self) -> Optional[Tuple[int, str]]:
+        with Session(engine) as db:
+            cursor = db.get(IndexerCursor, CURSOR_NAME)
+            return (cursor.block_number, cursor.block_hash) if cursor else None
+
+    def _store(
+        self,
+        from_block: int,
+        to_block: int,
+        to_hash: str,
+        payments: List[PaymentEvent],
+        refunds: List[RefundEvent],
+    ) -> None:
+        with Session(engine) as db:
+            # Idempotent per range: clear anything a previous run stored for it
+            for model in (PaymentEvent, RefundEvent):
+                db.exec(
+                    delete(model)
+                    .where(model.block_number >= from_block)
+                    .where(model.block_number <= to_block)
+                )
+            db.add_all(payments)
+            db.add_all(refunds)
+            self._move_cursor(db, to_block, to_hash)
+            db.commit()
+
+    def _store_rewind(self, rewind_to: int, block_hash: str) -> None:
+        with Session(engine) as db:
+            for model in (PaymentEvent, RefundEvent):
+                db.exec(delete(model).where(model.block_number > rewind_to))
+            self._move_cursor(db, rewind_to, block_hash)
+            db.commit()
+
+    @staticmethod
+    def _move_cursor(db: Session, block_number: int, block_hash: str) -> None:
+        cursor = db.get(IndexerCursor, CURSOR_NAME)
+        if cursor is None:
+            cursor = IndexerCursor(name=CURSOR_NAME, block_number=block_number, block_hash=block_hash)
+        cursor.block_number = block_number
+        cursor.block_hash = block_hash
+        cursor.updated_at = utc_now()
+        db.add(cursor)
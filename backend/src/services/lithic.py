@@ -1,10 +1,39 @@
 """Lithic API service wrapper for card creation and transaction simulation."""
+import asyncio
+import logging
+import random
 from typing import Any, Dict, Optional
 
-import requests
-from lithic import Lithic
+import httpx
+from lithic import (
+    APIConnectionError,
+    AsyncLithic,
+    DefaultAsyncHttpxClient,
+    InternalServerError,
+    RateLimitError,
+)
 
+from .. import tracing
 from ..config import settings
+from ..metrics import OUTBOUND_SECONDS
+from ..ratelimit import PriorityTokenBucket
+
+logger = logging.getLogger(__name__)
+
+# Rate-limiter priorities - lower goes first when calls are queued
+PRIORITY_ISSUE = 0         # card creation / activation for a waiting buyer
+PRIORITY_DEFAULT = 5       # reads, card pool refill
+PRIORITY_SIMULATE = 9      # sandbox simulations
+PRIORITY_PROBE = 10        # health probes
+
+# Transient failures worth retrying: 429, 5xx, connection errors / timeouts
+RETRYABLE_ERRORS = (RateLimitError, InternalServerError, APIConnectionError)
+
+# Calls that must not run twice - cards.create has no idempotency key, so a
+# 5xx or read timeout may hide a card that was issued. These are retried only
+# on 429 and on transport errors raised before the request went out.
+NOT_IDEMPOTENT = frozenset({"cards.create"})
+_NOT_SENT = (httpx.ConnectError, httpx.ConnectTimeout, httpx.PoolTimeout)
 
 
 class LithicService:
@@ -15,6 +44,13 @@ class LithicService:
     - Creating virtual cards (SINGLE_USE or MERCHANT_LOCKED)
     - Simulating authorization transactions
     - Simulating clearing/settlement
+
+    Every call goes through one process-wide AsyncLithic client with a
+    pooled httpx connection pool, a client-side token bucket (card issuance
+    jumps the queue ahead of simulations) and jittered exponential retries
+    on 429 / 5xx / connection errors - for card creation only where the
+    card can't have been issued (see NOT_IDEMPOTENT). The SDK's own retries
+    are off so that each retry also waits for a rate-limiter token.
     """
 
     def __init__(
@@ -34,14 +70,65 @@ class LithicService:
         
         # Allow initialization without API key for testing/development
         # Actual API calls will fail if not configured
-        self.client = None
+        self.client: Optional[AsyncLithic] = None
         if self.api_key:
-            self.client = Lithic(
+            self.client = AsyncLithic(
                 api_key=self.api_key,
                 environment=self.environment,
+                max_retries=0,
+                timeout=settings.lithic_timeout_seconds,
+                http_client=DefaultAsyncHttpxClient(
+                    limits=httpx.Limits(
+                        max_connections=settings.lithic_max_connections,
+                        max_keepalive_connections=settings.lithic_max_keepalive_connections,
+                    ),
+                ),
             )
+        self.limiter = PriorityTokenBucket(
+            rate=settings.lithic_rate_limit_per_second,
+            burst=settings.lithic_rate_limit_burst,
+        )
+        self.retries = 0
+
+    async def _call(self, priority: int, method: str, **kwargs: Any) -> Any:
+        """
+        Run one Lithic API call (e.g. "cards.create") under the rate limiter,
+        retrying transient failures.
+        """
+        if not self.client:
+            raise ValueError("Lithic API key not configured")
+        resource, name = method.split(".")
+        request = getattr(getattr(self.client, resource), name)
+
+        with OUTBOUND_SECONDS.time(service="lithic", method=method), tracing.span(
+            f"lithic {method}", {"lithic.method": method}, client=True
+        ):
+            for attempt in range(settings.lithic_max_retries + 1):
+                await self.limiter.acquire(priority)
+                try:
+                    return await request(**kwargs)
+                except RETRYABLE_ERRORS as exc:
+                    if attempt == settings.lithic_max_retries or not _may_retry(method, exc):
+                        raise
+                    delay = _retry_after(exc) or random.uniform(
+                        0,
+                        min(
+                            settings.lithic_backoff_max_seconds,
+                            settings.lithic_backoff_base_seconds * 2 ** attempt,
+                        ),
+                    )
+                    self.retries += 1
+                    logger.warning(f"Lithic call failed ({type(exc).__name__}), retry {attempt + 1} in {delay:.2f}s")
+                    await asyncio.sleep(delay)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "retries":        self.retries,
+            "rate_limited":   self.limiter.waited,
+            "queued":         self.limiter.queued,
+        }
 
-    def create_virtual_card(
+    async def create_virtual_card(
         self,
         memo: Optional[str] = None,
         card_type: str = "SINGLE_USE",
@@ -76,9 +163,6 @@ class LithicService:
             - pan: Full card number (sandbox only)
             - cvv: CVV code (sandbox only)
         """
-        if not self.client:
-            raise ValueError("Lithic API key not configured")
-        
         # Build card creation parameters
         create_params = {
             "type": "SINGLE_USE",
@@ -90,9 +174,67 @@ class LithicService:
             create_params["spend_limit"] = spend_limit_cents
             create_params["spend_limit_duration"] = "TRANSACTION"  # Limit applies per transaction
         
-        card = self.client.cards.create(**create_params)
-        
-        # Convert Lithic response to dict
+        card = await self._call(PRIORITY_ISSUE, "cards.create", **create_params)
+        return self._card_dict(card)
+
+    async def create_paused_card(self, memo: Optional[str] = None) -> Dict[str, Any]:
+        """
+        Create a SINGLE_USE card in the PAUSED state, for the warm card pool.
+
+        Paused cards decline every authorization, so a pooled card is inert
+        until activate_card() gives it a spend limit and opens it.
+
+        Returns:
+            Same shape as create_virtual_card().
+        """
+        card = await self._call(
+            PRIORITY_DEFAULT,
+            "cards.create",
+            type="SINGLE_USE",
+            state="PAUSED",
+            memo=memo or "clawpay pooled card",
+        )
+        return self._card_dict(card)
+
+    async def activate_card(
+        self,
+        card_token: str,
+        spend_limit_cents: int,
+        memo: Optional[str] = None,
+    ) -> Dict[str, Any]:
+        """
+        Open a pooled card with a per-transaction spend limit.
+
+        Args:
+            card_token: Token of a card created by create_paused_card()
+            spend_limit_cents: Spend limit, including the 5% buffer
+            memo: Optional new memo (e.g. the session ID)
+
+        Returns:
+            Same shape as create_virtual_card().
+        """
+        update_params: Dict[str, Any] = {
+            "state": "OPEN",
+            "spend_limit": spend_limit_cents,
+            "spend_limit_duration": "TRANSACTION",
+        }
+        if memo:
+            update_params["memo"] = memo
+        card = await self._call(
+            PRIORITY_ISSUE,
+            "cards.update",
+            card_token=card_token,
+            **update_params,
+        )
+        return self._card_dict(card)
+
+    async def close_card(self, card_token: str) -> None:
+        """Close a card for good - e.g. a pooled card whose activation failed."""
+        await self._call(PRIORITY_DEFAULT, "cards.update", card_token=card_token, state="CLOSED")
+
+    @staticmethod
+    def _card_dict(card: Any) -> Dict[str, Any]:
+        """Convert a Lithic card response to the dict the API returns."""
         return {
             "token": getattr(card, "token", None),
             "last_four": getattr(card, "last_four", None),
@@ -104,7 +246,7 @@ class LithicService:
             "cvv": getattr(card, "cvv", None),
         }
 
-    def simulate_authorization(
+    async def simulate_authorization(
         self,
         pan: str,
         amount_cents: int,
@@ -124,13 +266,12 @@ class LithicService:
             
         Returns:
             Dictionary with:
-        if not self.client:
-            raise ValueError("Lithic API key not configured")
-        
             - token: Transaction token
             - debugging_request_id: Debug ID for tracking
         """
-        transaction = self.client.transactions.simulate_authorization(
+        transaction = await self._call(
+            PRIORITY_SIMULATE,
+            "transactions.simulate_authorization",
             pan=pan,
             amount=amount_cents,
             merchant_amount=amount_cents,
@@ -144,7 +285,7 @@ class LithicService:
             "debugging_request_id": getattr(transaction, "debugging_request_id", None),
         }
 
-    def simulate_clearing(
+    async def simulate_clearing(
         self,
         transaction_token: str,
         amount_cents: int,
@@ -161,11 +302,10 @@ class LithicService:
             - debugging_request_id: Debug ID for tracking
             - Other clearing details
         """
-        if not self.client:
-            raise ValueError("Lithic API key not configured")
-        
         # Use the SDK's simulate clearing method
-        clearing = self.client.transactions.simulate_clearing(
+        clearing = await self._call(
+            PRIORITY_SIMULATE,
+            "transactions.simulate_clearing",
             token=transaction_token,
             amount=amount_cents,
         )
@@ -175,20 +315,21 @@ class LithicService:
             "status": "CLEARED"
         }
 
-    def get_card(self, card_token: str) -> Dict[str, Any]:
+    async def get_card(self, card_token: str) -> Dict[str, Any]:
         """
         Retrieve card details from Lithic.
         
-        if not self.client:
-            raise ValueError("Lithic API key not configured")
-        
         Args:
             card_token: Lithic card token
             
         Returns:
             Dictionary with current card details
         """
-        card = self.client.cards.retrieve(card_token)
+        card = await self._call(
+            PRIORITY_DEFAULT,
+            "cards.retrieve",
+            card_token=card_token,
+        )
         
         return {
             "token": getattr(card, "token", None),
@@ -200,6 +341,30 @@ class LithicService:
             "memo": getattr(card, "memo", None),
         }
 
+    async def ping(self) -> None:
+        """
+        One GET /v1/status for the health prober - no retries, behind every
+        other queued call. Raises if Lithic can't be reached.
+        """
+        if not self.client:
+            raise ValueError("Lithic API key not configured")
+        with OUTBOUND_SECONDS.time(service="lithic", method="api_status"):
+            await self.limiter.acquire(PRIORITY_PROBE)
+            await self.client.api_status()
+
+
+def _may_retry(method: str, exc: Exception) -> bool:
+    """Whether a RETRYABLE_ERRORS failure of `method` can be retried without risking a duplicate."""
+    if method not in NOT_IDEMPOTENT or isinstance(exc, RateLimitError):
+        return True
+    return isinstance(exc, APIConnectionError) and isinstance(exc.__cause__, _NOT_SENT)
+
 
-# Global service instance
-lithic_service = LithicService()
+def _retry_after(exc: Exception) -> Optional[float]:
+    """Seconds from a 429's Retry-After header, if it sent a usable one."""
+    response = getattr(exc, "response", None)
+    value = response.headers.get("retry-after") if response is not None else None
+    try:
+        return min(float(value), settings.lithic_backoff_max_seconds) if value else None
+    except ValueError:
+        return None
@@ -0,0 +1,134 @@
+"""Local nonce allocation for the platform wallet."""
+import heapq
+import itertools
+import time
+from dataclasses import dataclass, field
+from typing import Dict, Iterator, List, Optional
+
+
+class NonceConsumedError(Exception):
+    """The node refused a transaction because its nonce is already used (mined or pending)."""
+
+
+class TxRejectedError(Exception):
+    """
+    The node refused a transaction outright (underpriced, out of gas, ...) -
+    it never reached the mempool. If the broadcast passed its nonce, that
+    nonce is back with the allocator.
+    """
+
+
+@dataclass
+class InFlightTx:
+    """A signed transaction whose nonce hasn't been seen mined yet."""
+
+    nonce: int
+    tx: dict                     # unsigned tx params, re-signed on replacement
+    hashes: List[str]            # every hash broadcast for this nonce, newest last
+    sent_at: float = field(default_factory=time.monotonic)
+
+    @property
+    def gas_price(self) -> int:
+        return self.tx["gasPrice"]
+
+
+class NonceManager:
+    """
+    Hands out nonces for a single sending account without an RPC per tx.
+
+    All methods are synchronous and never await, so on the event loop they are
+    atomic with respect to each other - allocate() is a heap check plus
+    next() on a counter, with no lock. Only resync (owned by ArbitrumService)
+    needs to coordinate with in-flight senders.
+
+    Bookkeeping:
+    - released nonces (signed but rejected before reaching the mempool) go
+      into a min-heap and are handed out again before fresh ones, so a
+      rejected tx never leaves a gap that blocks every later nonce;
+    - in-flight txs are kept per nonce so stuck ones can be re-signed with a
+      higher gas price under the same nonce;
+    - confirm_below() drops everything the chain has already mined.
+    """
+
+    def __init__(self) -> None:
+        self._counter: Optional[Iterator[int]] = None
+        self._released: List[int] = []
+        self._released_at: Dict[int, float] = {}
+        self._in_flight: Dict[int, InFlightTx] = {}
+        self._by_hash: Dict[str, int] = {}
+
+    @property
+    def synced(self) -> bool:
+        return self._counter is not None
+
+    def reset(self, next_nonce: int) -> None:
+        """Start handing out nonces from next_nonce (the chain's pending count)."""
+        self._counter = itertools.count(next_nonce)
+        self._released.clear()
+        self._released_at.clear()
+        self._in_flight = {n: tx for n, tx in self._in_flight.items() if n < next_nonce}
+        self._by_hash = {h: n for h, n in self._by_hash.items() if n in self._in_flight}
+
+    def allocate(self) -> int:
+        if self._counter is None:
+            raise RuntimeError("NonceManager used before reset()")
+        if self._released:
+            nonce = heapq.heappop(self._released)
+            self._released_at.pop(nonce, None)
+            return nonce
+        return next(self._counter)
+
+    def release(self, nonce: int) -> None:
+        """Return a nonce whose tx never reached the mempool."""
+        self._forget(nonce)
+        if nonce not in self._released_at:
+            heapq.heappush(self._released, nonce)
+            self._released_at[nonce] = time.monotonic()
+
+    def track(self, nonce: int, tx: dict, tx_hash: str) -> None:
+        entry = self._in_flight.get(nonce)
+        if entry is None:
+            self._in_flight[nonce] = InFlightTx(nonce=nonce, tx=tx, hashes=[tx_hash])
+        else:
+            entry.tx = tx
+            entry.hashes.append(tx_hash)
+            entry.sent_at = time.monotonic()
+        self._by_hash[tx_hash] = nonce
+
+    def lookup(self, tx_hash: str) -> Optional[InFlightTx]:
+        nonce = self._by_hash.get(tx_hash)
+        return self._in_flight.get(nonce) if nonce is not None else None
+
+    def confirm_below(self, chain_nonce: int) -> None:
+        """Forget every in-flight tx with nonce < chain_nonce (already mined)."""
+        for nonce in [n for n in self._in_flight if n < chain_nonce]:
+            self._forget(nonce)
+        while self._released and self._released[0] < chain_nonce:
+            self._released_at.pop(heapq.heappop(self._released), None)
+
+    def stale_gaps(self, older_than: float) -> List[int]:
+        """Released nonces that nothing re-used and that block a later in-flight tx."""
+        if not self._in_flight:
+            return []
+        highest = max(self._in_flight)
+        cutoff = time.monotonic() - older_than
+        return [n for n in self._released if n < highest and self._released_at[n] <= cutoff]
+
+    def claim(self, nonce: int) -> bool:
+        """Take a specific released nonce (used by gap filling)."""
+        if nonce not in self._released_at:
+            return False
+        self._released.remove(nonce)
+        heapq.heapify(self._released)
+        del self._released_at[nonce]
+        return True
+
+    @property
+    def in_flight(self) -> int:
+        return len(self._in_flight)
+
+    def _forget(self, nonce: int) -> None:
+        entry = self._in_flight.pop(nonce, None)
+        if entry is not None:
+            for tx_hash in entry.hashes:
+                self._by_hash.pop(tx_hash, None)
@@ -0,0 +1,467 @@
+"""Background refund worker - drains the refund_jobs queue."""
+import asyncio
+import logging
+import random
+import time
+from datetime import timedelta
+from typing import Any, Dict, List, Optional, Set, Tuple
+
+from sqlalchemy import update
+from sqlmodel import Session, select
+
+from .. import tracing
+from ..config import settings
+from ..database import engine
+from ..metrics import REFUNDS_SENT, STAGE_SECONDS
+from ..models import RefundJob, RefundStatus, VirtualCard, as_utc, utc_now
+from . import arb_service, rollups
+from .nonce import NonceConsumedError, TxRejectedError
+from .usdc import cents_to_usdc
+
+logger = logging.getLogger(__name__)
+
+
+class RefundWorker:
+    """
+    Signs, broadcasts and tracks MockUSDC refunds off the request path.
+
+    The settlement webhook only inserts a PENDING RefundJob; this worker
+    polls for due jobs and runs up to `workers` of them concurrently.
+    Nonces come from ArbitrumService's local allocator, so those jobs are
+    pipelined - many refunds can be in flight in the same block. With
+    REFUND_BATCH_MAX_SIZE > 1, fresh jobs are also aggregated into one escrow
+    batchRefund() tx (see _claim_due), cutting gas and RPC calls per refund.
+
+    Durability:
+    - A job is claimed by pushing its next_attempt_at forward (a lease),
+      so a crashed worker's jobs become due again once the lease runs out.
+    - The signed tx is persisted as SUBMITTED *before* it is broadcast. A
+      SUBMITTED job is only ever re-tracked or re-broadcast. It is re-signed
+      only when its nonce has been mined and none of its hashes has a
+      receipt - proof that none of them can land - so a refund can't go out
+      twice. Any other error leaves it SUBMITTED to be polled again.
+    - A stuck tx is replaced under the same nonce with a higher gas price;
+      every hash broadcast for the job is kept, and tracking checks all of
+      them, so whichever one lands is the one recorded.
+    - Failures are retried with jittered exponential backoff until
+      refund_max_attempts, then the job is parked as FAILED.
+
+    All of this is written to the refund_jobs row; the card itself only
+    gets refund_tx and refunded_at once the refund is confirmed.
+    """
+
+    def __init__(self, workers: int = settings.refund_workers) -> None:
+        self.workers = workers
+        self.lease_seconds = settings.refund_receipt_timeout_seconds + 60
+        self._task: Optional[asyncio.Task] = None
+        self._active: Set[asyncio.Task] = set()
+        self._wake = asyncio.Event()
+        self._last_maintenance = float("-inf")
+
+    # ------------------------------------------------------------------
+    # Lifecycle
+    # ------------------------------------------------------------------
+
+    def start(self) -> None:
+        if self._task is not None:
+            return
+        if not arb_service.get().platform_account:
+            logger.warning("Refund worker disabled - ARB_PLATFORM_PRIVATE_KEY not set, refunds stay queued")
+            return
+        self._task = asyncio.create_task(self._run())
+        logger.info(f"Refund worker started ({self.workers} workers)")
+
+    async def stop(self) -> None:
+        tasks = list(self._active)
+        if self._task is not None:
+            tasks.append(self._task)
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        self._task = None
+        self._active.clear()
+
+    def wake(self) -> None:
+        """Skip the rest of the current poll interval (called after queueing a job)."""
+        self._wake.set()
+
+    # ------------------------------------------------------------------
+    # Dispatch
+    # ------------------------------------------------------------------
+
+    async def _run(self) -> None:
+        try:
+            await arb_service.get().sync_nonce()
+        except Exception as exc:
+            logger.error(f"Refund worker: nonce sync failed, will sync on first refund: {exc}")
+
+        while True:
+            await self._maintain()
+            free = self.workers - len(self._active)
+            units: List[List[str]] = []
+            if free > 0:
+                try:
+                    units = await asyncio.to_thread(self._claim_due, free)
+                except Exception as exc:
+                    logger.error(f"Refund worker: claim failed: {exc}")
+
+            for card_ids in units:
+                task = asyncio.create_task(self._process(card_ids))
+                self._active.add(task)
+                task.add_done_callback(self._on_done)
+
+            if not units:
+                self._wake.clear()
+                try:
+                    await asyncio.wait_for(self._wake.wait(), settings.refund_poll_interval_seconds)
+                except asyncio.TimeoutError:
+                    pass
+
+    async def _maintain(self) -> None:
+        if time.monotonic() - self._last_maintenance < settings.nonce_maintenance_interval_seconds:
+            return
+        self._last_maintenance = time.monotonic()
+        try:
+            await arb_service.get().maintain_nonces()
+        except Exception as exc:
+            logger.error(f"Refund worker: nonce maintenance failed: {exc}")
+
+    def _on_done(self, task: asyncio.Task) -> None:
+        self._active.discard(task)
+        self._wake.set()
+
+    def _claim_due(self, limit: int) -> List[List[str]]:
+        """
+        Lease up to `limit` units of work. A unit is a list of card ids that
+        share one transaction:
+
+        - first-attempt PENDING jobs are grouped into batches of up to
+          refund_batch_max_size. A partial batch is held back until its oldest
+          job has waited refund_batch_window_seconds, so a burst of
+          settlements goes out as one batchRefund tx;
+        - SUBMITTED jobs are grouped by tx_hash, so a batch is tracked with
+          one receipt lookup;
+        - retried jobs (attempts > 0) always go alone, so one bad
+          entry can't keep reverting the batch it was in.
+        """
+        now = utc_now()
+        lease_until = now + timedelta(seconds=self.lease_seconds)
+        due_states = [RefundStatus.PENDING, RefundStatus.SUBMITTED]
+        batch_size = max(1, settings.refund_batch_max_size)
+
+        with Session(engine) as db:
+            candidates = db.exec(
+                select(
+                    RefundJob.card_id,
+                    RefundJob.status,
+                    RefundJob.attempts,
+                    RefundJob.tx_hash,
+                    RefundJob.next_attempt_at,
+                )
+                .where(RefundJob.status.in_(due_states))
+                .where(RefundJob.next_attempt_at <= now)
+                .order_by(RefundJob.next_attempt_at)
+                .limit(limit * batch_size)
+            ).all()
+
+            groups: Dict[str, List[str]] = {}
+            fresh: List[str] = []
+            oldest_fresh = None
+            for card_id, status, attempts, tx_hash, due_at in candidates:
+                if status == RefundStatus.SUBMITTED:
+                    groups.setdefault(f"tx:{tx_hash}", []).append(card_id)
+                elif batch_size > 1 and attempts == 0:
+                    fresh.append(card_id)
+                    oldest_fresh = oldest_fresh or as_utc(due_at)
+                else:
+                    groups[f"job:{card_id}"] = [card_id]
+
+            window = timedelta(seconds=settings.refund_batch_window_seconds)
+            if fresh and (len(fresh) >= batch_size or oldest_fresh <= now - window):
+                for start in range(0, len(fresh), batch_size):
+                    groups[f"batch:{start}"] = fresh[start:start + batch_size]
+
+            units: List[List[str]] = []
+            for card_ids in groups.values():
+                if len(units) >= limit:
+                    break
+                claimed = []
+                for card_id in card_ids:
+                    # Conditional update - only one worker (or process) wins the lease
+                    result = db.exec(
+                        update(RefundJob)
+                        .where(RefundJob.card_id == card_id)
+                        .where(RefundJob.status.in_(due_states))
+                        .where(RefundJob.next_attempt_at <= now)
+                        .values(next_attempt_at=lease_until)
+                    )
+                    if result.rowcount:
+                        claimed.append(card_id)
+                if claimed:
+                    units.append(claimed)
+            db.commit()
+        return units
+
+    # ------------------------------------------------------------------
+    # Job processing
+    # ------------------------------------------------------------------
+
+    async def _process(self, card_ids: List[str]) -> None:
+        submitted = False
+        try:
+            jobs = await asyncio.to_thread(self._load, card_ids)
+            if not jobs:
+                return
+            submitted = jobs[0][0].status == RefundStatus.SUBMITTED
+            # One refund joins its card's trace; a batch links to all of them
+            single = len(jobs) == 1
+            with tracing.span(
+                "refund",
+                {"refund.cards": len(jobs), "refund.status": jobs[0][0].status},
+                traceparent=jobs[0][1].trace_parent if single else None,
+                links=() if single else [card.trace_parent for _, card in jobs],
+            ):
+                if submitted:
+                    await self._track(jobs)
+                else:
+                    await self._submit(jobs)
+        except asyncio.CancelledError:
+            raise
+        except Exception as exc:
+            logger.error(f"Refund jobs {card_ids} failed: {exc}")
+            if submitted:
+                # A signed tx is out there - an RPC error while tracking it
+                # is no reason to give up on it or sign another
+                await asyncio.to_thread(self._poll_later, card_ids, str(exc))
+            else:
+                await asyncio.to_thread(self._retry, card_ids, str(exc))
+
+    async def _submit(self, jobs: List[Tuple[RefundJob, VirtualCard]]) -> None:
+        arb = arb_service.get()
+        refunds = [
+            (card.user_wallet_address, cents_to_usdc(card.refund_amount_cents), card.session_id or card.id)
+            for _, card in jobs
+        ]
+        with STAGE_SECONDS.time(flow="refund", stage="sign"):
+            if len(refunds) == 1:
+                signed = await arb.sign_refund(*refunds[0])
+            else:
+                signed = await arb.sign_batch_refund(refunds)
+
+        card_ids = [job.card_id for job, _ in jobs]
+        try:
+            with STAGE_SECONDS.time(flow="refund", stage="persist"):
+                await asyncio.to_thread(
+                    self._update,
+                    card_ids,
+                    status=RefundStatus.SUBMITTED,
+                    tx_hash=signed["tx_hash"],
+                    raw_tx=signed["raw_transaction"],
+                    nonce=signed["nonce"],
+                    replaced_txs=None,
+                )
+        except Exception:
+            # Not stored, so never broadcast - the nonce goes back to the allocator
+            arb.nonces.release(signed["nonce"])
+            raise
+
+        try:
+            with STAGE_SECONDS.time(flow="refund", stage="broadcast"):
+                await arb.broadcast(signed["raw_transaction"], nonce=signed["nonce"])
+        except TxRejectedError as exc:
+            # Never reached the mempool and broadcast() released the nonce:
+            # drop the stored tx so nothing re-sends it at a nonce another
+            # refund may now be given
+            await asyncio.to_thread(self._retry, card_ids, f"Broadcast rejected: {exc}", True)
+            return
+        except Exception as exc:
+            # A timeout may still have reached the node, and a nonce clash is
+            # settled by _track: stay SUBMITTED with the nonce reserved
+            await asyncio.to_thread(self._poll_later, card_ids, f"Broadcast failed: {exc}")
+            return
+        logger.info(
+            f"Refund broadcast: {len(card_ids)} refund(s), nonce {signed['nonce']}, "
+            f"tx {signed['tx_hash'][:16]}..."
+        )
+        try:
+            await self._await_receipt(card_ids, signed["tx_hash"], [])
+        except Exception as exc:
+            # The tx is stored and broadcast, so it can still be mined: an
+            # RPC error while waiting must not count against the job
+            await asyncio.to_thread(self._poll_later, card_ids, f"Receipt lookup failed: {exc}")
+
+    async def _track(self, jobs: List[Tuple[RefundJob, VirtualCard]]) -> None:
+        arb = arb_service.get()
+        job = jobs[0][0]
+        card_ids = [j.card_id for j, _ in jobs]
+        replaced = job.replaced_txs.split(",") if job.replaced_txs else []
+        hashes = [job.tx_hash, *replaced]
+        mined_hash, receipt = await arb.find_receipt(hashes)
+        if receipt is not None:
+            await self._finish(card_ids, mined_hash, receipt)
+            return
+
+        known = await asyncio.gather(*(arb.is_known(tx_hash) for tx_hash in hashes))
+        if not any(known):
+            # Dropped from the mempool, or we crashed before broadcasting
+            try:
+                await arb.broadcast(job.raw_tx)
+            except NonceConsumedError as exc:
+                await self._nonce_taken(job, card_ids, hashes, exc)
+                return
+            except Exception as exc:
+                # A 429, a timeout or a lagging endpoint - says nothing about
+                # whether one of our txs can still land
+                await asyncio.to_thread(self._poll_later, card_ids, f"Re-broadcast failed: {exc}")
+                return
+        await self._await_receipt(card_ids, job.tx_hash, replaced)
+
+    async def _nonce_taken(
+        self, job: RefundJob, card_ids: List[str], hashes: List[str], exc: Exception
+    ) -> None:
+        """
+        A re-broadcast was refused because the job's nonce is used. Re-sign
+        only if that nonce is mined and none of our hashes has a receipt:
+        the chain is read first, so a receipt for one of ours mined after
+        the first lookup is still seen here.
+        """
+        arb = arb_service.get()
+        mined = job.nonce is not None and await arb.nonce_mined(job.nonce)
+        mined_hash, receipt = await arb.find_receipt(hashes)
+        if receipt is not None:
+            await self._finish(card_ids, mined_hash, receipt)
+        elif mined:
+            await asyncio.to_thread(
+                self._retry, card_ids, f"Nonce {job.nonce} used by another tx: {exc}", True
+            )
+        else:
+            # Another tx holds the nonce in the mempool - one of ours may still replace it
+            await asyncio.to_thread(self._poll_later, card_ids, f"Re-broadcast rejected: {exc}")
+
+    async def _await_receipt(self, card_ids: List[str], tx_hash: str, replaced: List[str]) -> None:
+        with STAGE_SECONDS.time(flow="refund", stage="receipt"):
+            receipt = await arb_service.get().get_receipt(
+                tx_hash, timeout=settings.refund_receipt_timeout_seconds
+            )
+        if receipt is not None:
+            await self._finish(card_ids, tx_hash, receipt)
+            return
+
+        # Still pending - bump the fee if it's stuck, and look again later
+        # without counting it as a failure
+        values: dict = {
+            "next_attempt_at": utc_now() + timedelta(seconds=settings.refund_poll_interval_seconds),
+        }
+        replacement = await arb_service.get().replace_stuck(tx_hash)
+        if replacement is not None:
+            values.update(
+                tx_hash=replacement["tx_hash"],
+                raw_tx=replacement["raw_transaction"],
+                replaced_txs=",".join([*replaced, tx_hash]),
+            )
+        await asyncio.to_thread(self._update, card_ids, **values)
+
+    async def _finish(self, card_ids: List[str], tx_hash: str, receipt: dict) -> None:
+        if receipt["status"] == 1:
+            await asyncio.to_thread(self._confirm, card_ids, tx_hash)
+            REFUNDS_SENT.inc(len(card_ids))
+            logger.info(f"Refund confirmed: {len(card_ids)} refund(s), tx {tx_hash[:16]}...")
+        else:
+            await asyncio.to_thread(self._retry, card_ids, f"Refund transaction reverted: {tx_hash}", True)
+
+    # ------------------------------------------------------------------
+    # DB helpers (run in a thread)
+    # ------------------------------------------------------------------
+
+    def _load(self, card_ids: List[str]) -> List[Tuple[RefundJob, VirtualCard]]:
+        with Session(engine) as db:
+            rows = db.exec(
+                select(RefundJob, VirtualCard)
+                .join(VirtualCard, VirtualCard.id == RefundJob.card_id)
+                .where(RefundJob.card_id.in_(card_ids))
+            ).all()
+            for job, card in rows:
+                db.expunge(job)
+                db.expunge(card)
+            return [(job, card) for job, card in rows]
+
+    def _update(self, card_ids: List[str], **values: Any) -> None:
+        with Session(engine) as db:
+            db.exec(
+                update(RefundJob)
+                .where(RefundJob.card_id.in_(card_ids))
+                .values(updated_at=utc_now(), **values)
+            )
+            db.commit()
+
+    def _confirm(self, card_ids: List[str], tx_hash: str) -> None:
+        """
+        Close the jobs, record the refund on their cards and add it to the
+        rollups, in one transaction. A job that is already CONFIRMED is
+        skipped, so a refund is never counted twice.
+        """
+        now = utc_now()
+        with Session(engine) as db:
+            for card_id in card_ids:
+                result = db.exec(
+                    update(RefundJob)
+                    .where(RefundJob.card_id == card_id)
+                    .where(RefundJob.status != RefundStatus.CONFIRMED)
+                    .values(
+                        status=RefundStatus.CONFIRMED,
+                        tx_hash=tx_hash,
+                        raw_tx=None,
+                        last_error=None,
+                        next_attempt_at=None,
+                        updated_at=now,
+                    )
+                )
+                card = db.get(VirtualCard, card_id) if result.rowcount else None
+                if card is None:
+                    continue
+                before = rollups.contribution(card)
+                card.refund_tx = tx_hash
+                card.refunded_at = now
+                card.updated_at = now
+                rollups.record(db, card, before)
+            db.commit()
+
+    def _poll_later(self, card_ids: List[str], error: str) -> None:
+        """Look at SUBMITTED jobs again after the poll interval - not counted as a failed attempt."""
+        self._update(
+            card_ids,
+            last_error=error[:500],
+            next_attempt_at=utc_now() + timedelta(seconds=settings.refund_poll_interval_seconds),
+        )
+
+    def _retry(self, card_ids: List[str], error: str, resign: bool = False) -> None:
+        with Session(engine) as db:
+            jobs = db.exec(select(RefundJob).where(RefundJob.card_id.in_(card_ids))).all()
+            for job in jobs:
+                job.attempts += 1
+                job.last_error = error[:500]
+                job.updated_at = utc_now()
+                if resign:
+                    job.status = RefundStatus.PENDING
+                    job.raw_tx = None
+                    job.replaced_txs = None
+
+                if job.attempts >= settings.refund_max_attempts:
+                    job.status = RefundStatus.FAILED
+                    job.next_attempt_at = None
+                    logger.error(f"Refund job {job.card_id} gave up after {job.attempts} attempts: {error}")
+                else:
+                    job.next_attempt_at = utc_now() + timedelta(seconds=_backoff(job.attempts))
+            db.commit()
+
+
+def _backoff(attempt: int) -> float:
+    """Full-jitter exponential backoff, capped at refund_backoff_max_seconds."""
+    ceiling = min(
+        settings.refund_backoff_max_seconds,
+        settings.refund_backoff_base_seconds * (2 ** (attempt - 1)),
+    )
+    return random.uniform(settings.refund_backoff_base_seconds / 2, max(ceiling, 1.0))
+
+
+refund_worker = RefundWorker()
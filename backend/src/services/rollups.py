@@ -0,0 +1,209 @@
+"""
+Spend / refund rollups - hourly and daily StatsRollup buckets, per wallet and total.
+
+Every card contributes a fixed set of metrics (contribution()) to the hour
+and day it was issued in, for its wallet and for the all-wallets total.
+Writers snapshot the card's contribution before changing it and call
+record() before committing; record() upserts the difference into the four
+buckets in the same transaction, so the rollups never disagree with the
+cards they summarize. rebuild() recomputes every bucket from the raw rows:
+
+    python -m src.services.rollups rebuild
+"""
+import argparse
+import logging
+from collections import defaultdict
+from datetime import datetime, timezone
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from sqlalchemy import delete
+from sqlmodel import Session, SQLModel, select
+
+from ..config import settings
+from ..database import engine
+from ..models import CardLifecycle, StatsRollup, VirtualCard, as_utc
+
+logger = logging.getLogger(__name__)
+
+ALL_WALLETS = ""
+METRICS = (
+    "cards_issued",
+    "volume_cents",
+    "spend_limit_cents",
+    "cleared_count",
+    "cleared_cents",
+    "settled_count",
+    "charged_cents",
+    "refunds_queued",
+    "refund_cents",
+    "buffer_retained_cents",
+)
+
+Key = Tuple[str, datetime, str]
+
+
+def contribution(card: Any, lifecycle: Optional[Any] = None) -> Dict[str, int]:
+    """
+    What one card adds to its buckets. Takes a VirtualCard (or any row with
+    its columns) plus its CardLifecycle, if loaded - without one the
+    clearing metrics count as zero, which is fine for a before/after pair
+    that doesn't change clearing.
+    """
+    spend_limit = card.spend_limit_cents or card.amount_cents
+    cleared = bool(lifecycle is not None and lifecycle.cleared)
+    settled = card.actual_charged_cents is not None
+    # Counted once the refund is confirmed - a queued refund may still fail
+    refund = (card.refund_amount_cents or 0) if card.refunded_at is not None else 0
+    return {
+        "cards_issued":          1,
+        "volume_cents":          card.amount_cents,
+        "spend_limit_cents":     spend_limit,
+        "cleared_count":         int(cleared),
+        "cleared_cents":         (lifecycle.cleared_amount_cents or 0) if cleared else 0,
+        "settled_count":         int(settled),
+        "charged_cents":         card.actual_charged_cents or 0,
+        "refunds_queued":        int(card.refund_amount_cents is not None),
+        "refund_cents":          refund,
+        "buffer_retained_cents": max(0, spend_limit - card.actual_charged_cents) - refund if settled else 0,
+    }
+
+
+def record(
+    db: Session,
+    card: Any,
+    before: Optional[Dict[str, int]] = None,
+    lifecycle: Optional[Any] = None,
+) -> None:
+    """
+    Add the card's change since `before` (a contribution() snapshot, None
+    for a new card) to its buckets. Call before the commit that saves it.
+    """
+    after = contribution(card, lifecycle)
+    delta = {name: after[name] - (before or {}).get(name, 0) for name in METRICS}
+    if any(delta.values()):
+        _upsert(db, {key: delta for key in _keys(card.created_at, card.user_wallet_address)})
+
+
+def _utc(value: datetime) -> datetime:
+    return as_utc(value).astimezone(timezone.utc)
+
+
+def _keys(created_at: datetime, wallet: Optional[str]) -> List[Key]:
+    hour = _utc(created_at).replace(minute=0, second=0, microsecond=0)
+    day = hour.replace(hour=0)
+    wallets = [ALL_WALLETS] + ([wallet.lower()] if wallet else [])
+    return [(granularity, start, w) for granularity, start in (("hour", hour), ("day", day)) for w in wallets]
+
+
+def _upsert(db: Session, deltas: Dict[Key, Dict[str, int]]) -> None:
+    """INSERT ... ON CONFLICT DO UPDATE SET metric = metric + excluded.metric, per key."""
+    table = StatsRollup.__table__
+    dialect = db.get_bind().dialect.name
+    if dialect == "postgresql":
+        from sqlalchemy.dialects.postgresql import insert
+    elif dialect == "sqlite":
+        from sqlalchemy.dialects.sqlite import insert
+    else:
+        return _merge(db, deltas)
+
+    for (granularity, start, wallet), delta in deltas.items():
+        stmt = insert(table).values(granularity=granularity, bucket_start=start, wallet=wallet, **delta)
+        db.exec(
+            stmt.on_conflict_do_update(
+                index_elements=["granularity", "bucket_start", "wallet"],
+                set_={name: table.c[name] + stmt.excluded[name] for name in METRICS},
+            )
+        )
+
+
+def _merge(db: Session, deltas: Dict[Key, Dict[str, int]]) -> None:
+    """Read-modify-write fallback for databases without ON CONFLICT."""
+    for key, delta in deltas.items():
+        row = db.get(StatsRollup, key) or StatsRollup(granularity=key[0], bucket_start=key[1], wallet=key[2])
+        for name, value in delta.items():
+            setattr(row, name, getattr(row, name) + value)
+        db.add(row)
+
+
+# ─────────────────────────────────────────────
+# Reads
+# ─────────────────────────────────────────────
+
+
+def query(
+    db: Session,
+    granularity: str,
+    start: datetime,
+    end: datetime,
+    wallet: Optional[str] = None,
+) -> Dict[str, Any]:
+    """Buckets in [start, end) plus their totals - cost is O(buckets), not O(cards)."""
+    rows = db.exec(
+        select(StatsRollup)
+        .where(StatsRollup.granularity == granularity)
+        .where(StatsRollup.wallet == (wallet.lower() if wallet else ALL_WALLETS))
+        .where(StatsRollup.bucket_start >= _utc(start))
+        .where(StatsRollup.bucket_start < _utc(end))
+        .order_by(StatsRollup.bucket_start)
+    ).all()
+    buckets = [{"bucket_start": as_utc(row.bucket_start), **{name: getattr(row, name) for name in METRICS}} for row in rows]
+    return {
+        "granularity": granularity,
+        "wallet":      wallet,
+        "start":       as_utc(start),
+        "end":         as_utc(end),
+        "totals":      {name: sum(bucket[name] for bucket in buckets) for name in METRICS},
+        "buckets":     buckets,
+    }
+
+
+# ─────────────────────────────────────────────
+# Rebuild
+# ─────────────────────────────────────────────
+
+
+def rebuild() -> int:
+    """
+    Recompute every bucket from virtual_cards + card_lifecycle, replacing
+    the table in one transaction. Cards are streamed, so memory is
+    O(buckets). Stop writers first - a card confirmed mid-rebuild could be
+    counted twice. Returns the number of buckets written.
+    """
+    totals: Dict[Key, Dict[str, int]] = defaultdict(lambda: dict.fromkeys(METRICS, 0))
+    with Session(engine) as db:
+        rows = db.exec(
+            select(VirtualCard, CardLifecycle)
+            .outerjoin(CardLifecycle, CardLifecycle.card_id == VirtualCard.id)
+            .execution_options(stream_results=True, yield_per=settings.export_batch_rows)
+        )
+        for card, lifecycle in rows:
+            values = contribution(card, lifecycle)
+            for key in _keys(card.created_at, card.user_wallet_address):
+                bucket = totals[key]
+                for name in METRICS:
+                    bucket[name] += values[name]
+            db.expunge(card)
+            if lifecycle is not None:
+                db.expunge(lifecycle)
+
+        db.exec(delete(StatsRollup))
+        db.add_all(
+            StatsRollup(granularity=key[0], bucket_start=key[1], wallet=key[2], **values)
+            for key, values in totals.items()
+        )
+        db.commit()
+    logger.info(f"Rollups rebuilt: {len(totals)} buckets")
+    return len(totals)
+
+
+def _main(argv: Optional[Iterable[str]] = None) -> None:
+    parser = argparse.ArgumentParser(prog="python -m src.services.rollups")
+    parser.add_argument("command", choices=["rebuild"])
+    parser.parse_args(argv)
+    SQLModel.metadata.create_all(engine)
+    print(f"rebuilt {rebuild()} buckets")
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+    _main()
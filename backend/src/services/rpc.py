@@ -0,0 +1,293 @@
+"""Multi-endpoint JSON-RPC provider - health-scored failover and hedged reads."""
+import asyncio
+import logging
+import time
+from collections import deque
+from typing import Any, Deque, Dict, List, Optional, Sequence, Tuple
+from urllib.parse import urlsplit
+
+import httpx
+from web3.providers.async_base import AsyncJSONBaseProvider
+from web3.types import RPCEndpoint, RPCResponse
+
+from .. import tracing
+from ..metrics import OUTBOUND_SECONDS
+
+logger = logging.getLogger(__name__)
+
+# Reads that return the same answer from any healthy node, so racing two
+# endpoints for them is harmless. Anything else (send_raw_transaction, ...)
+# only ever fails over after an endpoint error, never hedges.
+HEDGEABLE_METHODS = frozenset(
+    {
+        "eth_blockNumber",
+        "eth_call",
+        "eth_chainId",
+        "eth_estimateGas",
+        "eth_gasPrice",
+        "eth_getBalance",
+        "eth_getBlockByHash",
+        "eth_getBlockByNumber",
+        "eth_getLogs",
+        "eth_getTransactionByHash",
+        "eth_getTransactionReceipt",
+        "eth_maxPriorityFeePerGas",
+        "net_version",
+        "web3_clientVersion",
+    }
+)
+
+# Reads that depend on one node's view of the mempool - an account's nonce,
+# anything asked of the "pending" block. Two nodes can disagree on them, so
+# they never hedge and stay on one endpoint until it fails.
+STICKY_METHODS = frozenset({"eth_getTransactionCount"})
+
+# JSON-RPC error codes / messages that mean "this node is unhappy", not "your
+# request is wrong" - they count against the endpoint and fail over.
+_THROTTLE_CODES = {-32005, -32029, 429}
+_THROTTLE_MARKERS = ("rate limit", "too many requests", "capacity", "exceeded")
+
+EWMA_ALPHA = 0.2
+LATENCY_WINDOW = 256
+
+
+class EndpointError(ConnectionError):
+    """An endpoint failed at the transport / HTTP / throttling level."""
+
+
+class Endpoint:
+    """One RPC URL with its own keep-alive client and rolling health stats."""
+
+    def __init__(self, url: str, timeout: float, max_connections: int) -> None:
+        self.url = url
+        self.client = httpx.AsyncClient(
+            timeout=timeout,
+            limits=httpx.Limits(
+                max_connections=max_connections,
+                max_keepalive_connections=max_connections,
+            ),
+            headers={"Content-Type": "application/json"},
+        )
+        self.latency = 0.0           # EWMA of successful request latency (s)
+        self.error_rate = 0.0        # EWMA of failures (0..1)
+        self.requests = 0
+        self.failures = 0
+        self.cooldown_until = 0.0
+        self._latencies: Deque[float] = deque(maxlen=LATENCY_WINDOW)
+
+    @property
+    def label(self) -> str:
+        """scheme://host only - RPC URLs often carry an API key in the path."""
+        parts = urlsplit(self.url)
+        return f"{parts.scheme}://{parts.hostname}"
+
+    def score(self, now: float) -> float:
+        """Lower is better. Cooling-down endpoints sort last but stay usable."""
+        penalty = 1_000.0 if now < self.cooldown_until else 0.0
+        return penalty + (self.latency or 0.05) * (1 + 10 * self.error_rate)
+
+    def p95(self) -> Optional[float]:
+        if len(self._latencies) < 20:
+            return None
+        ordered = sorted(self._latencies)
+        return ordered[int(0.95 * (len(ordered) - 1))]
+
+    def record_success(self, elapsed: float) -> None:
+        self.requests += 1
+        self._latencies.append(elapsed)
+        self.latency = elapsed if self.latency == 0 else (1 - EWMA_ALPHA) * self.latency + EWMA_ALPHA * elapsed
+        self.error_rate *= 1 - EWMA_ALPHA
+
+    def record_failure(self, cooldown: float) -> None:
+        self.requests += 1
+        self.failures += 1
+        self.error_rate = (1 - EWMA_ALPHA) * self.error_rate + EWMA_ALPHA
+        self.cooldown_until = time.monotonic() + cooldown
+
+    async def post(self, body: bytes) -> Any:
+        start = time.monotonic()
+        try:
+            response = await self.client.post(self.url, content=body)
+        except httpx.HTTPError as exc:
+            raise EndpointError(f"{self.label}: {type(exc).__name__}: {exc}") from exc
+        if response.status_code == 429 or response.status_code >= 500:
+            raise EndpointError(f"{self.label}: HTTP {response.status_code}")
+        try:
+            payload = response.json()
+        except ValueError as exc:
+            raise EndpointError(f"{self.label}: invalid JSON response") from exc
+        if _throttled(payload):
+            raise EndpointError(f"{self.label}: throttled - {payload['error']}")
+        self.record_success(time.monotonic() - start)
+        return payload
+
+    def stats(self) -> Dict[str, Any]:
+        p95 = self.p95()
+        return {
+            "endpoint":    self.label,
+            "latency_ms":  round(self.latency * 1000, 1),
+            "p95_ms":      round(p95 * 1000, 1) if p95 is not None else None,
+            "error_rate":  round(self.error_rate, 3),
+            "requests":    self.requests,
+            "failures":    self.failures,
+            "cooling_down": time.monotonic() < self.cooldown_until,
+        }
+
+
+def _state_dependent(method: str, params: Any) -> bool:
+    return method in STICKY_METHODS or (isinstance(params, (list, tuple)) and "pending" in params)
+
+
+def _throttled(payload: Any) -> bool:
+    if not isinstance(payload, dict) or "error" not in payload:
+        return False
+    error = payload["error"] or {}
+    message = str(error.get("message", "")).lower() if isinstance(error, dict) else str(error).lower()
+    code = error.get("code") if isinstance(error, dict) else None
+    return code in _THROTTLE_CODES or any(marker in message for marker in _THROTTLE_MARKERS)
+
+
+class RPCPool(AsyncJSONBaseProvider):
+    """
+    AsyncWeb3 provider that spreads requests over several RPC endpoints.
+
+    Every request goes to the endpoint with the best score (EWMA latency
+    inflated by EWMA error rate). Transport errors, HTTP 429/5xx and JSON-RPC
+    throttling responses count as endpoint failures: the endpoint is put on
+    a short cooldown and the request moves on to the next one. Ordinary
+    JSON-RPC errors ("nonce too low", reverts, ...) are real answers and are
+    returned as-is.
+
+    With hedging on, a read from HEDGEABLE_METHODS that hasn't answered
+    within the primary endpoint's p95 latency is also sent to the runner-up;
+    whichever answers first wins and the other is cancelled. State-dependent
+    reads (STICKY_METHODS, or any "pending" param) are never hedged and go
+    to a sticky endpoint, which only moves when it fails, so a nonce is
+    never read from one node's mempool and then another's. With a single URL
+    this behaves like AsyncHTTPProvider plus a pooled keep-alive client.
+    """
+
+    def __init__(
+        self,
+        urls: Sequence[str],
+        timeout: float = 10.0,
+        max_connections: int = 32,
+        hedge: bool = True,
+        hedge_min_delay: float = 0.05,
+        failure_cooldown: float = 30.0,
+        **kwargs: Any,
+    ) -> None:
+        super().__init__(**kwargs)
+        if not urls:
+            raise ValueError("RPCPool needs at least one RPC URL")
+        self.endpoints = [Endpoint(url, timeout, max_connections) for url in urls]
+        self.hedge = hedge
+        self.hedge_min_delay = hedge_min_delay
+        self.failure_cooldown = failure_cooldown
+        self.hedged = 0
+        self.hedge_wins = 0
+        self._sticky: Optional[Endpoint] = None
+
+    def __str__(self) -> str:
+        return f"RPC pool {[endpoint.label for endpoint in self.endpoints]}"
+
+    # ------------------------------------------------------------------
+    # Provider API
+    # ------------------------------------------------------------------
+
+    async def make_request(self, method: RPCEndpoint, params: Any) -> RPCResponse:
+        body = self.encode_rpc_request(method, params)
+        ranked = self._ranked()
+        with OUTBOUND_SECONDS.time(service="rpc", method=method), tracing.span(
+            f"rpc {method}", {"rpc.system": "jsonrpc", "rpc.method": method}, client=True
+        ):
+            if _state_dependent(method, params):
+                return await self._failover(self._sticky_first(ranked), body, stick=True)
+            if self.hedge and len(ranked) > 1 and method in HEDGEABLE_METHODS:
+                return await self._hedged(ranked, body)
+            return await self._failover(ranked, body)
+
+    async def make_batch_request(
+        self, batch_requests: List[Tuple[RPCEndpoint, Any]]
+    ) -> Any:
+        body = self.encode_batch_rpc_request(batch_requests)
+        with OUTBOUND_SECONDS.time(service="rpc", method="batch"), tracing.span(
+            "rpc batch", {"rpc.system": "jsonrpc", "rpc.batch_size": len(batch_requests)}, client=True
+        ):
+            response = await self._failover(self._ranked(), body)
+        if not isinstance(response, list):
+            return response  # a single error object for the whole batch
+        return sorted(response, key=lambda item: item.get("id", 0))
+
+    async def disconnect(self) -> None:
+        await asyncio.gather(*(endpoint.client.aclose() for endpoint in self.endpoints))
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "endpoints":  [endpoint.stats() for endpoint in self.endpoints],
+            "hedged":     self.hedged,
+            "hedge_wins": self.hedge_wins,
+        }
+
+    # ------------------------------------------------------------------
+    # Internals
+    # ------------------------------------------------------------------
+
+    def _ranked(self) -> List[Endpoint]:
+        now = time.monotonic()
+        return sorted(self.endpoints, key=lambda endpoint: endpoint.score(now))
+
+    def _sticky_first(self, ranked: List[Endpoint]) -> List[Endpoint]:
+        """ranked, with the sticky endpoint moved to the front unless it's cooling down."""
+        sticky = self._sticky
+        if sticky is None or time.monotonic() < sticky.cooldown_until:
+            return ranked
+        return [sticky, *(endpoint for endpoint in ranked if endpoint is not sticky)]
+
+    async def _send(self, endpoint: Endpoint, body: bytes) -> Any:
+        try:
+            return await endpoint.post(body)
+        except EndpointError:
+            endpoint.record_failure(self.failure_cooldown)
+            raise
+
+    async def _failover(self, ranked: List[Endpoint], body: bytes, stick: bool = False) -> Any:
+        last_error: Optional[EndpointError] = None
+        for endpoint in ranked:
+            try:
+                result = await self._send(endpoint, body)
+            except EndpointError as exc:
+                logger.warning(f"RPC endpoint failed, trying next: {exc}")
+                last_error = exc
+                continue
+            if stick:
+                self._sticky = endpoint
+            return result
+        raise EndpointError(f"All {len(ranked)} RPC endpoints failed; last: {last_error}")
+
+    async def _hedged(self, ranked: List[Endpoint], body: bytes) -> Any:
+        primary, rest = ranked[0], ranked[1:]
+        delay = max(self.hedge_min_delay, primary.p95() or 0.0)
+
+        first = asyncio.ensure_future(self._send(primary, body))
+        done, _ = await asyncio.wait({first}, timeout=delay)
+        if done and not first.exception():
+            return first.result()
+
+        # Primary is slow or already failed - race the runner-up against it
+        self.hedged += 1
+        second = asyncio.ensure_future(self._failover(rest, body))
+        pending = {second} if done else {first, second}
+        try:
+            while pending:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    if not task.exception():
+                        if task is second:
+                            self.hedge_wins += 1
+                        return task.result()
+            raise EndpointError("All RPC endpoints failed")
+        finally:
+            for task in (first, second):
+                if not task.done():
+                    task.cancel()
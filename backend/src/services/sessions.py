@@ -0,0 +1,172 @@
+"""Payment session store - DB table fronted by an in-process TTL cache."""
+import asyncio
+import logging
+from datetime import timedelta
+from typing import Optional
+
+from sqlalchemy import delete, update
+from sqlmodel import Session
+
+from ..cache import TTLCache
+from ..config import settings
+from ..database import AnySession, engine, run_db
+from ..models import PaymentSession, SessionStatus, as_utc, utc_now
+
+logger = logging.getLogger(__name__)
+
+
+class SessionStore:
+    """
+    Persists payment sessions and answers "is this session usable?" fast.
+
+    The DB row is the source of truth; the cache holds detached copies for
+    at most the session's remaining lifetime, so an unknown-to-this-process
+    session costs one indexed lookup and everything after that is a dict
+    hit. claim() is a conditional UPDATE, so two confirms racing on the same
+    session (in any process) can't both issue a card.
+    """
+
+    def __init__(self) -> None:
+        self._cache: TTLCache[str, PaymentSession] = TTLCache(
+            maxsize=settings.session_cache_max_entries,
+            ttl=settings.session_ttl_seconds,
+        )
+        self._sweeper: Optional[asyncio.Task] = None
+
+    # ------------------------------------------------------------------
+    # Lifecycle
+    # ------------------------------------------------------------------
+
+    def start(self) -> None:
+        if self._sweeper is None:
+            self._sweeper = asyncio.create_task(self._sweep_forever())
+
+    async def stop(self) -> None:
+        if self._sweeper is None:
+            return
+        self._sweeper.cancel()
+        await asyncio.gather(self._sweeper, return_exceptions=True)
+        self._sweeper = None
+
+    # ------------------------------------------------------------------
+    # Operations
+    # ------------------------------------------------------------------
+
+    async def create(
+        self,
+        db: AnySession,
+        session_id: str,
+        user_wallet_address: str,
+        usdc_amount: int,
+        amount_usd: float,
+        merchant_name: Optional[str] = None,
+    ) -> PaymentSession:
+        session = PaymentSession(
+            id=session_id,
+            user_wallet_address=user_wallet_address,
+            usdc_amount=str(usdc_amount),
+            amount_usd=amount_usd,
+            merchant_name=merchant_name,
+            expires_at=utc_now() + timedelta(seconds=settings.session_ttl_seconds),
+        )
+        await run_db(db, self._insert, session)
+        self._remember(session)
+        return session
+
+    async def get(self, db: AnySession, session_id: str) -> Optional[PaymentSession]:
+        """Cached session, falling back to the DB. None if it doesn't exist."""
+        session = self._cache.get(session_id)
+        if session is None:
+            session = await run_db(db, self._load, session_id)
+            if session is not None:
+                self._remember(session)
+        return session
+
+    async def claim(self, db: AnySession, session_id: str) -> bool:
+        """Atomically mark an open, unexpired session consumed. False if someone else got it."""
+        claimed = await run_db(db, self._set_status, session_id, SessionStatus.OPEN, SessionStatus.CONSUMED)
+        if not claimed:
+            # Consumed elsewhere or expired - the next read reloads the row to
+            # tell the two apart
+            self._cache.pop(session_id)
+            return False
+        session = self._cache.get(session_id)
+        if session is not None:
+            session.status = SessionStatus.CONSUMED
+        return True
+
+    async def release(self, db: AnySession, session_id: str) -> None:
+        """Re-open a claimed session after card issuance failed, so the client can retry."""
+        await run_db(db, self._set_status, session_id, SessionStatus.CONSUMED, SessionStatus.OPEN)
+        self._cache.pop(session_id)
+
+    def stats(self) -> dict:
+        return self._cache.stats()
+
+    # ------------------------------------------------------------------
+    # Internals
+    # ------------------------------------------------------------------
+
+    def _remember(self, session: PaymentSession) -> None:
+        remaining = (as_utc(session.expires_at) - utc_now()).total_seconds()
+        if remaining > 0:
+            self._cache.set(session.id, session, ttl=remaining)
+
+    @staticmethod
+    def _insert(db: Session, session: PaymentSession) -> None:
+        db.add(session)
+        db.commit()
+        db.refresh(session)
+        db.expunge(session)
+
+    @staticmethod
+    def _load(db: Session, session_id: str) -> Optional[PaymentSession]:
+        session = db.get(PaymentSession, session_id)
+        if session is not None:
+            db.expunge(session)
+        return session
+
+    @staticmethod
+    def _set_status(db: Session, session_id: str, from_status: str, to_status: str) -> bool:
+        stmt = (
+            update(PaymentSession)
+            .where(PaymentSession.id == session_id)
+            .where(PaymentSession.status == from_status)
+        )
+        if to_status == SessionStatus.CONSUMED:
+            stmt = stmt.where(PaymentSession.expires_at > utc_now())
+        result = db.exec(
+            stmt.values(
+                status=to_status,
+                consumed_at=utc_now() if to_status == SessionStatus.CONSUMED else None,
+            )
+        )
+        db.commit()
+        return bool(result.rowcount)
+
+    async def _sweep_forever(self) -> None:
+        while True:
+            await asyncio.sleep(settings.session_sweep_interval_seconds)
+            evicted = self._cache.evict_expired()
+            try:
+                deleted = await asyncio.to_thread(self._delete_stale)
+            except Exception as exc:
+                logger.error(f"Session sweep failed: {exc}")
+                deleted = 0
+            if evicted or deleted:
+                logger.info(f"Session sweep: evicted {evicted} cached, deleted {deleted} expired")
+
+    @staticmethod
+    def _delete_stale() -> int:
+        cutoff = utc_now() - timedelta(seconds=settings.session_retention_seconds)
+        with Session(engine) as db:
+            result = db.exec(
+                delete(PaymentSession)
+                .where(PaymentSession.status == SessionStatus.OPEN)
+                .where(PaymentSession.expires_at < cutoff)
+            )
+            db.commit()
+            return result.rowcount
+
+
+session_store = SessionStore()
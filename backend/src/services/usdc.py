@@ -0,0 +1,74 @@
+"""
+MockUSDC amount conversions and the PaymentReceived check.
+
+Pure functions, kept out of bnb.py so the API and the refund/webhook path
+can use them without importing web3.
+"""
+from typing import Optional
+
+# USDC has 6 decimals: 1 USDC = 1_000_000 units = $1.00
+USDC_DECIMALS = 6
+USDC_UNIT = 10 ** USDC_DECIMALS  # 1_000_000
+
+
+def usd_to_usdc(usd_amount: float) -> int:
+    """Convert a USD float to MockUSDC units (6 decimals). e.g. 52.50 → 52_500_000."""
+    return int(round(usd_amount * USDC_UNIT))
+
+
+def usdc_to_usd(usdc_amount: int) -> float:
+    """Convert MockUSDC units to USD float. e.g. 52_500_000 → 52.50."""
+    return usdc_amount / USDC_UNIT
+
+
+def cents_to_usdc(cents: int) -> int:
+    """Convert USD cents to MockUSDC units. e.g. 5250 cents → 52_500_000."""
+    return cents * (USDC_UNIT // 100)  # cents * 10_000
+
+
+def check_destination(tx_to: Optional[str], escrow: str) -> None:
+    """Reject a deposit whose transaction wasn't sent to the escrow contract itself."""
+    if (tx_to or "").lower() != escrow.lower():
+        raise ValueError(f"Transaction sent to {tx_to}, expected escrow {escrow}")
+
+
+def check_confirmations(block_number: int, head: int, required: int) -> None:
+    """Reject a deposit fewer than `required` blocks deep (its own block counts as one)."""
+    confirmations = head - block_number + 1
+    if confirmations < required:
+        raise ValueError(f"Deposit has {confirmations} confirmation(s), need {required}")
+
+
+def check_payment(
+    payer: str,
+    paid_usdc: int,
+    event_session_id: str,
+    session_id: str,
+    min_usdc: int,
+    block_number: int,
+) -> dict:
+    """
+    Check a decoded PaymentReceived event against the expected session.
+
+    Shared by the live-receipt path (ArbitrumService.verify_payment) and the
+    indexed path (EscrowIndexer.verify_indexed). Returns the verify_payment
+    result dict; raises ValueError on mismatch.
+    """
+    if event_session_id != session_id:
+        raise ValueError(
+            f"Session ID mismatch: got '{event_session_id}', "
+            f"expected '{session_id}'"
+        )
+
+    if paid_usdc < min_usdc:
+        raise ValueError(
+            f"Underpayment: got {paid_usdc} USDC units, minimum {min_usdc}"
+        )
+
+    return {
+        "payer":        payer,
+        "paid_usdc":    paid_usdc,
+        "paid_usd":     usdc_to_usd(paid_usdc),
+        "session_id":   session_id,
+        "block_number": block_number,
+    }
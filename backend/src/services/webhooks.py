@@ -0,0 +1,364 @@
+"""Lithic webhook inbox - store, ack, then process in per-card order."""
+import asyncio
+import hashlib
+import json
+import logging
+import time
+from datetime import datetime, timedelta
+from typing import Any, Dict, List, Mapping, Optional, Set, Tuple
+
+from sqlalchemy import and_, func, or_
+from sqlalchemy.exc import IntegrityError
+from sqlmodel import Session, select
+
+from .. import tracing
+from ..config import settings
+from ..database import engine
+from ..executor import KeyedSerialExecutor
+from ..metrics import STAGE_SECONDS, WEBHOOK_INBOX_DEPTH, WEBHOOK_INBOX_LAG
+from ..models import RefundJob, RefundStatus, VirtualCard, WebhookEvent, WebhookStatus, as_utc, utc_now
+from . import rollups
+from .refunds import refund_worker
+
+logger = logging.getLogger(__name__)
+
+
+def event_token_for(payload: Dict[str, Any], headers: Mapping[str, str], body: bytes) -> str:
+    """
+    Idempotency key for a delivery. Lithic sends a stable webhook-id header
+    on every retry of the same event; without it, fall back to the event's
+    own token + type, and as a last resort to a hash of the raw body.
+    """
+    webhook_id = headers.get("webhook-id")
+    if webhook_id:
+        return webhook_id
+    if payload.get("token"):
+        return f"{payload.get('event_type')}:{payload['token']}"
+    return "sha256:" + hashlib.sha256(body).hexdigest()
+
+
+def _card_token(payload: Dict[str, Any]) -> Optional[str]:
+    card = payload.get("card")
+    return payload.get("card_token") or (card.get("token") if isinstance(card, dict) else None)
+
+
+# ─────────────────────────────────────────────
+# Handlers - run inside the inbox's transaction, must not commit
+# ─────────────────────────────────────────────
+
+
+def handle_settled(db: Session, payload: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    On settlement:
+    1. Find card in DB by Lithic card token.
+    2. Calculate unused buffer (spend_limit − actual_charged).
+    3. Queue a MockUSDC refund job if buffer > 0.
+
+    The refund itself is signed, broadcast and tracked by the background
+    RefundWorker. The refund job, the rollup update and the inbox row's
+    PROCESSED mark are committed together, so a settlement queues at most
+    one refund and is counted once.
+    """
+    card_token = payload.get("card_token")
+    actual_cents = payload.get("amount")
+
+    if not card_token or actual_cents is None:
+        return {"status": "error", "reason": "missing_fields"}
+
+    with STAGE_SECONDS.time(flow="settlement", stage="card_lookup"):
+        card = db.exec(
+            select(VirtualCard).where(VirtualCard.lithic_card_token == card_token)
+        ).first()
+
+    if not card:
+        logger.warning(f"Webhook: card not found for token {card_token}")
+        return {"status": "error", "reason": "card_not_found"}
+
+    job = db.get(RefundJob, card.id)
+    if job is not None:
+        return {"status": "already_queued", "refund_status": job.status}
+
+    # Continue the trace of the confirm that issued the card
+    with tracing.span("settlement", {"card.id": card.id}, traceparent=card.trace_parent):
+        return _settle(db, card, actual_cents)
+
+
+def _settle(db: Session, card: VirtualCard, actual_cents: int) -> Dict[str, Any]:
+    before = rollups.contribution(card)
+    card.actual_charged_cents = actual_cents
+    card.updated_at = utc_now()
+
+    spend_limit = card.spend_limit_cents or card.amount_cents
+    refund_cents = spend_limit - actual_cents
+
+    refundable = refund_cents > 0 and bool(card.user_wallet_address)
+    with STAGE_SECONDS.time(flow="settlement", stage="queue_refund"):
+        if refundable:
+            card.refund_amount_cents = refund_cents
+            db.add(RefundJob(card_id=card.id))
+        rollups.record(db, card, before)
+
+    logger.info(
+        f"Settlement: limit=${spend_limit/100:.2f}, "
+        f"charged=${actual_cents/100:.2f}, "
+        f"refund=${refund_cents/100:.2f}"
+    )
+
+    if refundable:
+        logger.info(
+            f"Refund queued: ${refund_cents/100:.2f} USDC "
+            f"to {card.user_wallet_address[:10]}... (card {card.id})"
+        )
+        return {
+            "status": "refund_queued",
+            "refund_amount_cents": refund_cents,
+            "refund_status": RefundStatus.PENDING,
+        }
+    elif refund_cents <= 0:
+        return {"status": "no_refund_needed"}
+    else:
+        return {"status": "no_wallet_address_for_refund"}
+
+
+def _handle(db: Session, event_type: Optional[str], payload: Dict[str, Any]) -> Dict[str, Any]:
+    if event_type == "transaction.settled":
+        return handle_settled(db, payload)
+    elif event_type in ("transaction.authorization", "card.state_changed"):
+        return {"status": "logged"}
+    return {"status": "ignored"}
+
+
+# ─────────────────────────────────────────────
+# Inbox
+# ─────────────────────────────────────────────
+
+
+class WebhookInbox:
+    """
+    Durable inbox for Lithic webhooks.
+
+    The route only verifies the signature and calls accept(), which inserts
+    the raw event; the unique event_token turns a redelivery into a no-op,
+    and Lithic gets its 200 without waiting on any processing.
+
+    A background loop picks up due PENDING rows and hands them to a
+    KeyedSerialExecutor keyed by card token: different cards are processed
+    concurrently (up to WEBHOOK_WORKERS), one card's events strictly in the
+    order they arrived. A failing event is retried with exponential backoff
+    and, while it waits, later events for the same card wait behind it.
+
+    The backlog depth and lag are counted by the loop at most once per poll
+    interval and cached, so stats() - and /health - never query the table.
+    """
+
+    def __init__(self) -> None:
+        self._task: Optional[asyncio.Task] = None
+        self._wake = asyncio.Event()
+        self._executor = KeyedSerialExecutor(settings.webhook_workers)
+        self._in_flight: Dict[int, str] = {}  # event id -> ordering key
+        self._depth = 0
+        self._oldest: Optional[datetime] = None
+        self._counted_at = float("-inf")
+        self.accepted = 0
+        self.duplicates = 0
+        self.processed = 0
+        self.failed = 0
+
+    # ------------------------------------------------------------------
+    # Lifecycle
+    # ------------------------------------------------------------------
+
+    def start(self) -> None:
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        if self._task is None:
+            return
+        self._task.cancel()
+        await asyncio.gather(self._task, return_exceptions=True)
+        self._task = None
+        await self._executor.shutdown()
+        self._in_flight.clear()
+
+    def wake(self) -> None:
+        self._wake.set()
+
+    # ------------------------------------------------------------------
+    # Intake (sync - run it with database.run_db)
+    # ------------------------------------------------------------------
+
+    def accept(self, db: Session, body: bytes, payload: Dict[str, Any], headers: Mapping[str, str]) -> Tuple[bool, str]:
+        """Store a delivery. Returns (stored, event_token); stored is False for a duplicate."""
+        event_token = event_token_for(payload, headers, body)
+        db.add(
+            WebhookEvent(
+                event_token=event_token,
+                event_type=payload.get("event_type"),
+                card_token=_card_token(payload),
+                payload=body.decode("utf-8"),
+            )
+        )
+        try:
+            db.commit()
+        except IntegrityError:
+            db.rollback()
+            self.duplicates += 1
+            return False, event_token
+        self.accepted += 1
+        return True, event_token
+
+    # ------------------------------------------------------------------
+    # Processing
+    # ------------------------------------------------------------------
+
+    async def _run(self) -> None:
+        while True:
+            try:
+                due = await asyncio.to_thread(self._claim_due, set(self._in_flight.values()))
+            except Exception as exc:
+                logger.error(f"Webhook inbox: poll failed: {exc}")
+                due = []
+
+            for event_id, key in due:
+                self._in_flight[event_id] = key
+                self._executor.submit(key, lambda event_id=event_id: self._process(event_id))
+
+            if time.monotonic() - self._counted_at >= settings.webhook_poll_interval_seconds:
+                await self._count_backlog()
+
+            self._wake.clear()
+            try:
+                await asyncio.wait_for(self._wake.wait(), settings.webhook_poll_interval_seconds)
+            except asyncio.TimeoutError:
+                pass
+
+    def _claim_due(self, busy: Set[str]) -> List[Tuple[int, str]]:
+        """
+        Due PENDING events, oldest first, as (event id, ordering key). Cards
+        that already have events in flight (`busy`) or an event backing off
+        after a failure are filtered out in the query, so one card's backlog
+        can't fill the batch while other cards wait.
+        """
+        now = utc_now()
+        backing_off = (
+            select(WebhookEvent.card_token)
+            .where(WebhookEvent.status == WebhookStatus.PENDING)
+            .where(WebhookEvent.next_attempt_at > now)
+            .where(WebhookEvent.card_token.is_not(None))
+        )
+        with Session(engine) as db:
+            rows = db.exec(
+                select(WebhookEvent.id, WebhookEvent.card_token, WebhookEvent.event_token)
+                .where(WebhookEvent.status == WebhookStatus.PENDING)
+                .where(WebhookEvent.next_attempt_at <= now)
+                .where(
+                    or_(
+                        and_(WebhookEvent.card_token.is_(None), WebhookEvent.event_token.not_in(busy)),
+                        and_(WebhookEvent.card_token.not_in(busy), WebhookEvent.card_token.not_in(backing_off)),
+                    )
+                )
+                .order_by(WebhookEvent.id)
+                .limit(settings.webhook_workers * 50)
+            ).all()
+        return [(event_id, card_token or event_token) for event_id, card_token, event_token in rows]
+
+    async def _process(self, event_id: int) -> None:
+        try:
+            queued_refund = await asyncio.to_thread(self._process_sync, event_id)
+        finally:
+            key = self._in_flight.pop(event_id, None)
+            if key is not None and key not in self._in_flight.values():
+                self._wake.set()  # the card is free again - claim its next events now
+        if queued_refund:
+            refund_worker.wake()
+
+    def _process_sync(self, event_id: int) -> bool:
+        """Run the handler and mark the row in one transaction. True if a refund was queued."""
+        with Session(engine) as db:
+            event = db.get(WebhookEvent, event_id)
+            if event is None or event.status != WebhookStatus.PENDING:
+                return False
+            if event.card_token and self._has_earlier_pending(db, event):
+                return False  # an earlier event for this card failed and is backing off
+            try:
+                with STAGE_SECONDS.time(flow="webhook", stage="handle"), tracing.span(f"webhook {event.event_type}"):
+                    result = _handle(db, event.event_type, json.loads(event.payload))
+            except Exception as exc:
+                db.rollback()
+                self._record_failure(db, event_id, exc)
+                return False
+
+            event.status = WebhookStatus.PROCESSED
+            event.result = json.dumps(result)
+            event.attempts += 1
+            event.processed_at = utc_now()
+            db.add(event)
+            with STAGE_SECONDS.time(flow="webhook", stage="commit"):
+                db.commit()
+            self.processed += 1
+            return result.get("status") == "refund_queued"
+
+    @staticmethod
+    def _has_earlier_pending(db: Session, event: WebhookEvent) -> bool:
+        return db.exec(
+            select(WebhookEvent.id)
+            .where(WebhookEvent.card_token == event.card_token)
+            .where(WebhookEvent.status == WebhookStatus.PENDING)
+            .where(WebhookEvent.id < event.id)
+        ).first() is not None
+
+    def _record_failure(self, db: Session, event_id: int, exc: Exception) -> None:
+        event = db.get(WebhookEvent, event_id)
+        event.attempts += 1
+        event.last_error = str(exc)[:500]
+        if event.attempts >= settings.webhook_max_attempts:
+            event.status = WebhookStatus.FAILED
+            self.failed += 1
+            logger.error(f"Webhook {event.event_token} failed permanently: {exc}")
+        else:
+            delay = min(settings.webhook_backoff_max_seconds, 2 ** event.attempts)
+            event.next_attempt_at = utc_now() + timedelta(seconds=delay)
+            logger.warning(f"Webhook {event.event_token} failed (attempt {event.attempts}), retry in {delay}s: {exc}")
+        db.add(event)
+        db.commit()
+
+    # ------------------------------------------------------------------
+    # Metrics
+    # ------------------------------------------------------------------
+
+    def stats(self) -> Dict[str, Any]:
+        """Counters plus the backlog as of the loop's last count - never does I/O."""
+        return {
+            "depth":       self._depth,
+            "lag_seconds": self._lag(),
+            "in_flight":   len(self._in_flight),
+            "accepted":    self.accepted,
+            "duplicates":  self.duplicates,
+            "processed":   self.processed,
+            "failed":      self.failed,
+        }
+
+    def _lag(self) -> float:
+        return round((utc_now() - as_utc(self._oldest)).total_seconds(), 3) if self._oldest else 0.0
+
+    async def _count_backlog(self) -> None:
+        self._counted_at = time.monotonic()
+        try:
+            self._depth, self._oldest = await asyncio.to_thread(self._backlog)
+        except Exception as exc:
+            logger.error(f"Webhook inbox: backlog count failed: {exc}")
+            return
+        WEBHOOK_INBOX_DEPTH.set(self._depth)
+        WEBHOOK_INBOX_LAG.set(self._lag())
+
+    @staticmethod
+    def _backlog() -> Tuple[int, Any]:
+        with Session(engine) as db:
+            return db.exec(
+                select(func.count(), func.min(WebhookEvent.received_at))
+                .where(WebhookEvent.status == WebhookStatus.PENDING)
+            ).one()
+
+
+webhook_inbox = WebhookInbox()
@@ -0,0 +1,223 @@
+"""
+Optional OpenTelemetry tracing.
+
+Off unless TRACING_EXPORTER is set, and then only if the `tracing` extra
+(opentelemetry-sdk + the OTLP/HTTP exporter) is installed. Spans cover:
+
+- every HTTP request (TracingMiddleware), continuing the caller's W3C
+  traceparent - the MCP server sends one on initiate and confirm;
+- each JSON-RPC call through the RPC pool and each Lithic API call;
+- every SQL statement on the instrumented engines;
+- settlement handling and refunds, parented to the confirm request that
+  issued the card (its traceparent is stored on the card row), so one
+  payment is one trace from buy_virtual_card to the refund.
+
+Exporters: "otlp" posts to a local collector (TRACING_OTLP_ENDPOINT),
+"file" appends one JSON span per line to TRACING_FILE_PATH, "console"
+prints them. With tracing off every helper here is a cheap no-op.
+"""
+import logging
+import weakref
+from contextlib import contextmanager
+from typing import Any, Dict, Iterable, Iterator, Optional
+
+from .config import settings
+
+try:
+    from opentelemetry import propagate, trace
+    from opentelemetry.trace import Link, SpanKind, Status, StatusCode
+except ImportError:  # the optional `tracing` extra isn't installed
+    trace = None
+
+logger = logging.getLogger(__name__)
+
+_tracer: Any = None      # set by setup(); None = tracing off
+_provider: Any = None
+_SQL_SPAN = "_clawpay_span"       # ExecutionContext attribute holding a statement's open span
+_instrumented: "weakref.WeakSet[Any]" = weakref.WeakSet()
+
+
+def enabled() -> bool:
+    return _tracer is not None
+
+
+def setup() -> bool:
+    """Install the tracer provider and exporter from settings. True if tracing is on."""
+    global _tracer, _provider
+    if _tracer is not None or not settings.tracing_exporter:
+        return _tracer is not None
+    if trace is None:
+        logger.warning("TRACING_EXPORTER is set but opentelemetry-sdk is not installed - tracing disabled")
+        return False
+
+    from opentelemetry.sdk.resources import Resource
+    from opentelemetry.sdk.trace import TracerProvider
+    from opentelemetry.sdk.trace.export import BatchSpanProcessor
+    from opentelemetry.sdk.trace.sampling import ParentBased, TraceIdRatioBased
+
+    _provider = TracerProvider(
+        resource=Resource.create({"service.name": settings.tracing_service_name}),
+        sampler=ParentBased(TraceIdRatioBased(settings.tracing_sample_ratio)),
+    )
+    _provider.add_span_processor(BatchSpanProcessor(_exporter()))
+    _tracer = _provider.get_tracer("clawpay")
+    logger.info(f"Tracing on - {settings.tracing_exporter} exporter")
+    return True
+
+
+def _exporter() -> Any:
+    if settings.tracing_exporter == "otlp":
+        from opentelemetry.exporter.otlp.proto.http.trace_exporter import OTLPSpanExporter
+        return OTLPSpanExporter(endpoint=settings.tracing_otlp_endpoint)
+
+    from opentelemetry.sdk.trace.export import ConsoleSpanExporter
+    if settings.tracing_exporter == "file":
+        out = open(settings.tracing_file_path, "a", encoding="utf-8")
+        return ConsoleSpanExporter(out=out, formatter=lambda span: span.to_json(indent=None) + "\n")
+    return ConsoleSpanExporter()
+
+
+def shutdown() -> None:
+    """Flush buffered spans; call on app shutdown."""
+    global _tracer, _provider
+    if _provider is not None:
+        _provider.shutdown()
+    _tracer = _provider = None
+
+
+# ─────────────────────────────────────────────
+# Spans
+# ─────────────────────────────────────────────
+
+
+@contextmanager
+def span(
+    name: str,
+    attributes: Optional[Dict[str, Any]] = None,
+    client: bool = False,
+    traceparent: Optional[str] = None,
+    links: Iterable[Optional[str]] = (),
+) -> Iterator[Any]:
+    """
+    A span around the block (yields None when tracing is off).
+
+    traceparent starts it in that trace instead of under the current span;
+    links attach other traces' spans, e.g. every card in a refund batch.
+    An exception marks the span as failed and is re-raised.
+    """
+    if _tracer is None:
+        yield None
+        return
+    with _tracer.start_as_current_span(
+        name,
+        context=propagate.extract({"traceparent": traceparent}) if traceparent else None,
+        kind=SpanKind.CLIENT if client else SpanKind.INTERNAL,
+        attributes=attributes,
+        links=[Link(_span_context(value)) for value in links if value],
+    ) as current:
+        yield current
+
+
+def current_traceparent() -> Optional[str]:
+    """The W3C traceparent of the active span, to store or send on."""
+    if _tracer is None:
+        return None
+    carrier: Dict[str, str] = {}
+    propagate.inject(carrier)
+    return carrier.get("traceparent")
+
+
+def _span_context(traceparent: str) -> Any:
+    return trace.get_current_span(propagate.extract({"traceparent": traceparent})).get_span_context()
+
+
+# ─────────────────────────────────────────────
+# HTTP server spans
+# ─────────────────────────────────────────────
+
+
+class TracingMiddleware:
+    """
+    ASGI middleware: one SERVER span per HTTP request, continuing an
+    incoming traceparent and named after the matched route template.
+    Passes straight through while tracing is off.
+    """
+
+    def __init__(self, app: Any) -> None:
+        self.app = app
+
+    async def __call__(self, scope: Dict[str, Any], receive: Any, send: Any) -> None:
+        if _tracer is None or scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        headers = {key.decode("latin-1"): value.decode("latin-1") for key, value in scope["headers"]}
+        method = scope["method"]
+        status_code = 500
+
+        async def send_and_record(message: Dict[str, Any]) -> None:
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+            await send(message)
+
+        with _tracer.start_as_current_span(
+            f"{method} {scope['path']}",
+            context=propagate.extract(headers),
+            kind=SpanKind.SERVER,
+            attributes={"http.request.method": method, "url.path": scope["path"]},
+        ) as current:
+            try:
+                await self.app(scope, receive, send_and_record)
+            finally:
+                route = getattr(scope.get("route"), "path", None)
+                if route:
+                    current.update_name(f"{method} {route}")
+                    current.set_attribute("http.route", route)
+                current.set_attribute("http.response.status_code", status_code)
+                if status_code >= 500:
+                    current.set_status(Status(StatusCode.ERROR))
+
+
+# ─────────────────────────────────────────────
+# SQL spans
+# ─────────────────────────────────────────────
+
+
+def instrument_engine(engine: Any) -> None:
+    """A CLIENT span per SQL statement on this (sync) engine - for async engines pass .sync_engine."""
+    if _tracer is None or engine in _instrumented:
+        return
+    from sqlalchemy import event
+
+    event.listen(engine, "before_cursor_execute", _before_execute)
+    event.listen(engine, "after_cursor_execute", _after_execute)
+    event.listen(engine, "handle_error", _on_error)
+    _instrumented.add(engine)
+
+
+def _before_execute(conn: Any, cursor: Any, statement: str, parameters: Any, context: Any, executemany: bool) -> None:
+    if _tracer is None or context is None or not trace.get_current_span().get_span_context().is_valid:
+        return  # background pollers' queries outside any span would each be a one-span trace
+    # Statement text only - bound parameters (PANs, addresses) are never recorded
+    setattr(context, _SQL_SPAN, _tracer.start_span(
+        statement.split(None, 1)[0].upper() if statement else "SQL",
+        kind=SpanKind.CLIENT,
+        attributes={"db.system": conn.dialect.name, "db.statement": statement[:2_000]},
+    ))
+
+
+def _after_execute(conn: Any, cursor: Any, statement: str, parameters: Any, context: Any, executemany: bool) -> None:
+    current = getattr(context, _SQL_SPAN, None)
+    if current is not None:
+        current.end()
+        setattr(context, _SQL_SPAN, None)
+
+
+def _on_error(exception_context: Any) -> None:
+    current = getattr(exception_context.execution_context, _SQL_SPAN, None)
+    if current is not None:
+        current.record_exception(exception_context.original_exception)
+        current.set_status(Status(StatusCode.ERROR))
+        current.end()
+        setattr(exception_context.execution_context, _SQL_SPAN, None)
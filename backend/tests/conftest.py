@@ -0,0 +1,80 @@
+"""
+Shared fixtures. Settings and the engines are built at import, so the
+environment is pinned here - to a throwaway SQLite file and no external
+services - before anything from src is imported.
+"""
+import os
+import tempfile
+
+_TMP = tempfile.mkdtemp(prefix="clawpay-tests-")
+os.environ.update(
+    DATABASE_URL=f"sqlite:///{_TMP}/test.db",
+    DATABASE_REPLICA_URL="",
+    ASYNC_DATABASE_URL="",
+    API_KEY="test-key",
+    ADMIN_API_KEY="",
+    LITHIC_API_KEY="",
+    LITHIC_WEBHOOK_SECRET="",
+    ARB_PLATFORM_PRIVATE_KEY="",
+    ARB_ESCROW_CONTRACT="",
+    USDC_CONTRACT="",
+    INDEXER_ENABLED="false",
+    CARD_POOL_TARGET_SIZE="0",
+    TRACING_EXPORTER="",
+)
+
+import pytest  # noqa: E402
+from fastapi.testclient import TestClient  # noqa: E402
+from sqlmodel import Session, SQLModel  # noqa: E402
+
+from src.database import engine  # noqa: E402
+from src.services import arb_service, escrow_indexer, lithic_service  # noqa: E402
+
+from .fakes import FakeArb, FakeIndexer, FakeLithic  # noqa: E402
+
+
+@pytest.fixture(autouse=True)
+def tables():
+    """Every test starts from empty tables."""
+    SQLModel.metadata.drop_all(engine)
+    SQLModel.metadata.create_all(engine)
+    yield
+
+
+@pytest.fixture
+def db():
+    with Session(engine) as session:
+        yield session
+
+
+@pytest.fixture
+def arb():
+    """A FakeArb installed as the process-wide arb_service."""
+    fake = FakeArb()
+    arb_service._instance = fake
+    yield fake
+    arb_service._instance = None
+
+
+@pytest.fixture
+def lithic():
+    fake = FakeLithic()
+    lithic_service._instance = fake
+    yield fake
+    lithic_service._instance = None
+
+
+@pytest.fixture
+def indexer():
+    fake = FakeIndexer()
+    escrow_indexer._instance = fake
+    yield fake
+    escrow_indexer._instance = None
+
+
+@pytest.fixture
+def client(arb, lithic, indexer):
+    """The API with fake services. The lifespan doesn't run, so no background workers start."""
+    from src.main import app
+
+    return TestClient(app, headers={"X-API-Key": "test-key"})
@@ -0,0 +1,160 @@
+"""In-memory stand-ins for ArbitrumService, LithicService and EscrowIndexer."""
+from types import SimpleNamespace
+from typing import Any, Dict, List, Optional, Set, Tuple, Union
+
+from src.services.nonce import NonceManager, TxRejectedError
+from src.services.usdc import usdc_to_usd
+
+
+class FakeArb:
+    """
+    The parts of ArbitrumService the refund worker and the confirm routes
+    use. Signing hands out real nonces from a NonceManager; the chain is a
+    few dicts the test fills in.
+
+    - broadcast_errors: raised by the next broadcast() calls, in order
+      (None = success); a TxRejectedError releases the nonce like the real one
+    - receipts: tx hash -> receipt, for get_receipt / find_receipt
+    - mine_status: if set, every successful broadcast is mined with this
+      receipt status
+    - mined_nonces: the platform wallet's "latest" tx count
+    - payments: tx hash -> (session_id, paid_usdc) for verify_payments
+    """
+
+    def __init__(self) -> None:
+        self.nonces = NonceManager()
+        self.nonces.reset(0)
+        self.platform_account = SimpleNamespace(address="0x" + "11" * 20)
+        self.contract = object()
+        self.signed: List[Dict[str, Any]] = []
+        self.broadcasts: List[str] = []
+        self.broadcast_errors: List[Optional[Exception]] = []
+        self.receipts: Dict[str, dict] = {}
+        self.mine_status: Optional[int] = None
+        self.known: Set[str] = set()
+        self.mined_nonces = 0
+        self.payments: Dict[str, Tuple[str, int]] = {}
+
+    # Refunds
+
+    async def sign_refund(self, recipient: str, usdc_amount: int, session_id: str) -> dict:
+        return self._sign([(recipient, usdc_amount, session_id)])
+
+    async def sign_batch_refund(self, refunds: List[Tuple[str, int, str]]) -> dict:
+        return self._sign(refunds)
+
+    def _sign(self, refunds: List[Tuple[str, int, str]]) -> dict:
+        nonce = self.nonces.allocate()
+        tx_hash = f"0x{len(self.signed):064x}"
+        self.nonces.track(nonce, {"gasPrice": 1}, tx_hash)
+        signed = {"tx_hash": tx_hash, "raw_transaction": f"raw:{tx_hash}", "nonce": nonce, "refunds": refunds}
+        self.signed.append(signed)
+        return signed
+
+    async def broadcast(self, raw_transaction: str, nonce: Optional[int] = None) -> str:
+        error = self.broadcast_errors.pop(0) if self.broadcast_errors else None
+        if isinstance(error, TxRejectedError) and nonce is not None:
+            self.nonces.release(nonce)
+        if error is not None:
+            raise error
+        tx_hash = raw_transaction.removeprefix("raw:")
+        self.broadcasts.append(tx_hash)
+        self.known.add(tx_hash)
+        if self.mine_status is not None:
+            self.receipts[tx_hash] = {"status": self.mine_status}
+        return tx_hash
+
+    async def get_receipt(self, tx_hash: str, timeout: float = 0) -> Optional[dict]:
+        return self.receipts.get(tx_hash)
+
+    async def find_receipt(self, tx_hashes: List[str]) -> Tuple[Optional[str], Optional[dict]]:
+        for tx_hash in tx_hashes:
+            if tx_hash in self.receipts:
+                return tx_hash, self.receipts[tx_hash]
+        return None, None
+
+    async def is_known(self, tx_hash: str) -> bool:
+        return tx_hash in self.known
+
+    async def nonce_mined(self, nonce: int) -> bool:
+        return self.mined_nonces > nonce
+
+    async def replace_stuck(self, tx_hash: str) -> Optional[dict]:
+        return None
+
+    async def sync_nonce(self) -> int:
+        return 0
+
+    async def maintain_nonces(self) -> None:
+        pass
+
+    # Confirm
+
+    async def verify_payment(self, tx_hash: str, session_id: str, min_usdc: int = 0) -> dict:
+        [result] = await self.verify_payments([(tx_hash, session_id, min_usdc)])
+        if isinstance(result, ValueError):
+            raise result
+        return result
+
+    async def verify_payments(self, payments: List[Tuple[str, str, int]]) -> List[Union[dict, ValueError]]:
+        results: List[Union[dict, ValueError]] = []
+        for tx_hash, session_id, min_usdc in payments:
+            if tx_hash not in self.payments:
+                results.append(ValueError(f"No PaymentReceived event in {tx_hash}"))
+                continue
+            paid_session, paid_usdc = self.payments[tx_hash]
+            if paid_session != session_id:
+                results.append(ValueError("Session ID mismatch"))
+            elif paid_usdc < min_usdc:
+                results.append(ValueError("Underpayment"))
+            else:
+                results.append({
+                    "payer": "0x" + "22" * 20,
+                    "paid_usdc": paid_usdc,
+                    "paid_usd": usdc_to_usd(paid_usdc),
+                    "session_id": session_id,
+                    "block_number": 1,
+                })
+        return results
+
+
+class FakeLithic:
+    """create_virtual_card() that fails for the memos in `fail_memos`; close_card() records the token."""
+
+    client = None
+
+    def __init__(self) -> None:
+        self.fail_memos: Set[str] = set()
+        self.created: List[str] = []
+        self.closed: List[str] = []
+
+    async def create_virtual_card(self, memo: str, spend_limit_cents: int) -> Dict[str, Any]:
+        if memo in self.fail_memos:
+            raise RuntimeError("card program limit reached")
+        self.created.append(memo)
+        n = len(self.created)
+        return {
+            "token": f"card-{n}",
+            "last_four": f"{n:04d}",
+            "exp_month": 1,
+            "exp_year": 2030,
+            "state": "OPEN",
+            "pan": f"411111111111{n:04d}",
+            "cvv": "123",
+            "spend_limit": spend_limit_cents,
+        }
+
+    async def close_card(self, card_token: str) -> None:
+        self.closed.append(card_token)
+
+
+class FakeIndexer:
+    """An escrow index that hasn't stored anything - every deposit is verified live."""
+
+    @staticmethod
+    def find_payment(db: Any, tx_hash: str) -> None:
+        return None
+
+    @staticmethod
+    def find_payments(db: Any, tx_hashes: List[str]) -> Dict[str, Any]:
+        return {}
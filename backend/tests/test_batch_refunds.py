@@ -0,0 +1,39 @@
+"""Batched refunds: fresh jobs share one batchRefund() tx, retries go alone."""
+from src.config import settings
+from src.services.refunds import RefundWorker
+
+from .test_refunds import _card, _process, _queue, _refund_cents
+
+
+def test_batch_refund_one_tx_for_many_jobs(arb, monkeypatch):
+    monkeypatch.setattr(settings, "refund_batch_max_size", 3)
+    arb.mine_status = 1
+    card_ids = [_queue() for _ in range(3)]
+
+    units = RefundWorker()._claim_due(10)
+    assert [sorted(unit) for unit in units] == [sorted(card_ids)]
+    _process(*units[0])
+
+    assert len(arb.signed) == 1 and len(arb.signed[0]["refunds"]) == 3
+    assert {_card(card_id).refund_tx for card_id in card_ids} == {arb.broadcasts[0]}
+    assert _refund_cents() == 300
+
+
+def test_retried_jobs_are_not_batched(arb, monkeypatch):
+    monkeypatch.setattr(settings, "refund_batch_max_size", 3)
+    retried = [_queue(attempts=1), _queue(attempts=2)]
+
+    units = RefundWorker()._claim_due(10)
+
+    assert sorted(units) == sorted([[card_id] for card_id in retried])
+
+
+def test_partial_batch_waits_for_the_window(arb, monkeypatch):
+    monkeypatch.setattr(settings, "refund_batch_max_size", 3)
+    monkeypatch.setattr(settings, "refund_batch_window_seconds", 3600)
+    _queue()
+
+    assert RefundWorker()._claim_due(10) == []
+
+    monkeypatch.setattr(settings, "refund_batch_window_seconds", 0)
+    assert len(RefundWorker()._claim_due(10)) == 1
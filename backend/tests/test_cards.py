@@ -0,0 +1,105 @@
+"""Keyset cursors for GET /api/v1/cards."""
+from datetime import datetime, timedelta, timezone
+from uuid import uuid4
+
+import pytest
+from fastapi import HTTPException
+from sqlmodel import Session
+
+from src.database import engine
+from src.main import _decode_cursor, _encode_cursor
+from src.models import VirtualCard
+
+START = datetime(2026, 1, 1, tzinfo=timezone.utc)
+
+
+def _cards(count: int, same_second: bool = False) -> list:
+    """`count` cards, a second apart - or all at the same instant, so only the id orders them."""
+    cards = [
+        VirtualCard(
+            tx_hash=f"0x{i:064x}",
+            user_wallet_address="0x" + ("55" if i % 2 else "66") * 20,
+            amount_cents=1000,
+            created_at=START if same_second else START + timedelta(seconds=i),
+        )
+        for i in range(count)
+    ]
+    with Session(engine) as db:
+        db.add_all(cards)
+        db.commit()
+        return sorted((card.created_at, card.id) for card in cards)
+
+
+def _pages(client, **params) -> list:
+    ids, cursor = [], None
+    while True:
+        response = client.get("/api/v1/cards", params={**params, **({"cursor": cursor} if cursor else {})})
+        assert response.status_code == 200
+        ids.append([card["id"] for card in response.json()])
+        cursor = response.headers.get("X-Next-Cursor")
+        if cursor is None:
+            return ids
+
+
+def test_cursor_round_trips():
+    card = VirtualCard(id=str(uuid4()), tx_hash="0x1", amount_cents=1, created_at=START)
+    assert _decode_cursor(_encode_cursor(card)) == (START, card.id)
+
+
+def test_cursor_treats_naive_datetimes_as_utc():
+    # SQLite hands created_at back without a timezone
+    card = VirtualCard(id="abc", tx_hash="0x1", amount_cents=1, created_at=START.replace(tzinfo=None))
+    created_at, _ = _decode_cursor(_encode_cursor(card))
+    assert created_at == START and created_at.tzinfo is not None
+
+
+def test_cursor_is_url_safe():
+    card = VirtualCard(id="?/+=&" * 4, tx_hash="0x1", amount_cents=1, created_at=START)
+    cursor = _encode_cursor(card)
+    assert not set(cursor) & set("+/=&?")
+    assert _decode_cursor(cursor)[1] == card.id
+
+
+@pytest.mark.parametrize("cursor", ["", "not-base64!", "e30", "WzFd", "WyJub3QgYSBkYXRlIiwgIngiXQ"])
+def test_bad_cursor_is_a_400(cursor):
+    with pytest.raises(HTTPException) as exc:
+        _decode_cursor(cursor)
+    assert exc.value.status_code == 400
+
+
+def test_pages_cover_every_card_once(client):
+    expected = [card_id for _, card_id in _cards(7)]
+
+    pages = _pages(client, limit=3)
+
+    assert [len(page) for page in pages] == [3, 3, 1]
+    assert [card_id for page in pages for card_id in page] == expected
+
+
+def test_pages_break_created_at_ties_by_id(client):
+    expected = [card_id for _, card_id in _cards(5, same_second=True)]
+
+    pages = _pages(client, limit=2)
+
+    assert [card_id for page in pages for card_id in page] == expected
+
+
+def test_pages_keep_the_filter(client):
+    _cards(6)
+    wallet = "0x" + "55" * 20
+
+    pages = _pages(client, limit=2, wallet=wallet)
+
+    assert [len(page) for page in pages] == [2, 1]
+
+
+def test_exact_last_page_has_no_cursor(client):
+    _cards(4)
+    response = client.get("/api/v1/cards", params={"limit": 4})
+    assert len(response.json()) == 4
+    assert "X-Next-Cursor" not in response.headers
+
+
+def test_bad_cursor_via_the_api(client):
+    response = client.get("/api/v1/cards", params={"cursor": "garbage"})
+    assert response.status_code == 400
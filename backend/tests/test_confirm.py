@@ -0,0 +1,129 @@
+"""POST /api/v1/payment/confirm on the async chain and Lithic clients."""
+import asyncio
+from datetime import timedelta
+from uuid import uuid4
+
+from sqlmodel import Session, select
+
+from src.database import engine
+from src.models import CardSecret, PaymentSession, SessionStatus, VirtualCard, utc_now
+from src.services.sessions import session_store
+
+WALLET = "0x" + "aa" * 20
+USDC = 10_500_000
+
+
+def _session() -> str:
+    session_id = str(uuid4())
+    with Session(engine) as db:
+        asyncio.run(session_store.create(db, session_id, WALLET, usdc_amount=USDC, amount_usd=10.0))
+    return session_id
+
+
+def _confirm(client, session_id: str, tx_hash: str):
+    return client.post(
+        "/api/v1/payment/confirm",
+        json={"session_id": session_id, "tx_hash": tx_hash, "user_wallet_address": WALLET},
+    )
+
+
+def _status(session_id: str) -> str:
+    with Session(engine) as db:
+        return db.get(PaymentSession, session_id).status
+
+
+def test_confirm_issues_a_card(client, arb, lithic):
+    session_id = _session()
+    arb.payments["0xdeposit"] = (session_id, USDC)
+
+    response = _confirm(client, session_id, "0xdeposit")
+
+    assert response.status_code == 200
+    body = response.json()
+    assert body["success"] is True and body["amount_usd"] == 10.5
+    assert body["card"]["token"] == "card-1" and body["card"]["exp_month"] == "01"
+    assert lithic.created == [f"ClawPay {session_id[:8]}"]
+    assert _status(session_id) == SessionStatus.CONSUMED
+    with Session(engine) as db:
+        card = db.exec(select(VirtualCard).where(VirtualCard.tx_hash == "0xdeposit")).one()
+        assert (card.amount_cents, card.spend_limit_cents) == (1050, 1102)
+        assert db.get(CardSecret, card.id).pan == body["card"]["pan"]
+
+
+def test_replayed_tx_is_rejected(client, arb):
+    session_id = _session()
+    arb.payments["0xdeposit"] = (session_id, USDC)
+    assert _confirm(client, session_id, "0xdeposit").status_code == 200
+
+    response = _confirm(client, _session(), "0xdeposit")
+
+    assert response.status_code == 409
+    assert response.json()["detail"] == "Transaction already used"
+
+
+def test_unverified_deposit_is_a_400(client, arb):
+    session_id = _session()
+    arb.payments["0xdeposit"] = (session_id, USDC - 1)
+
+    response = _confirm(client, session_id, "0xdeposit")
+
+    assert response.status_code == 400
+    assert _status(session_id) == SessionStatus.OPEN
+
+
+def test_unknown_session_is_rejected_before_any_rpc(client, arb):
+    arb.payments["0xdeposit"] = ("nope", USDC)
+    assert _confirm(client, "nope", "0xdeposit").status_code == 404
+
+
+def test_card_failure_releases_the_session(client, arb, lithic):
+    session_id = _session()
+    arb.payments["0xdeposit"] = (session_id, USDC)
+    lithic.fail_memos.add(f"ClawPay {session_id[:8]}")
+
+    response = _confirm(client, session_id, "0xdeposit")
+
+    assert response.status_code == 500
+    assert _status(session_id) == SessionStatus.OPEN
+    lithic.fail_memos.clear()
+    assert _confirm(client, session_id, "0xdeposit").status_code == 200
+
+
+def test_session_expiring_before_the_claim_is_a_410(client, arb):
+    session_id = _session()
+    arb.payments["0xdeposit"] = (session_id, USDC)
+    verify = arb.verify_payments
+
+    async def slow_verify(payments):
+        # The session runs out while the deposit is being verified
+        with Session(engine) as db:
+            db.get(PaymentSession, session_id).expires_at = utc_now() - timedelta(seconds=1)
+            db.commit()
+        return await verify(payments)
+
+    arb.verify_payments = slow_verify
+
+    response = _confirm(client, session_id, "0xdeposit")
+
+    assert response.status_code == 410
+    assert _status(session_id) == SessionStatus.OPEN
+    assert _confirm(client, session_id, "0xdeposit").status_code == 410
+
+
+def test_save_failure_releases_the_session_and_closes_the_card(client, arb, lithic, monkeypatch):
+    from src import main
+
+    def fail(db, cards):
+        raise RuntimeError("database is locked")
+
+    session_id = _session()
+    arb.payments["0xdeposit"] = (session_id, USDC)
+    monkeypatch.setattr(main, "_save_cards", fail)
+
+    response = _confirm(client, session_id, "0xdeposit")
+
+    assert response.status_code == 500
+    assert lithic.closed == ["card-1"]
+    assert _status(session_id) == SessionStatus.OPEN
+    monkeypatch.undo()
+    assert _confirm(client, session_id, "0xdeposit").json()["card"]["token"] == "card-2"
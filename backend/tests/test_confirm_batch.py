@@ -0,0 +1,130 @@
+"""POST /api/v1/payment/confirm/batch - items succeed or fail independently."""
+import asyncio
+from uuid import uuid4
+
+from sqlmodel import Session, select
+
+from src.database import engine
+from src.models import CardSecret, PaymentSession, SessionStatus, VirtualCard
+from src.services.sessions import session_store
+
+WALLET = "0x" + "88" * 20
+USDC = 10_500_000
+
+
+def _session() -> str:
+    session_id = str(uuid4())
+    with Session(engine) as db:
+        asyncio.run(session_store.create(db, session_id, WALLET, usdc_amount=USDC, amount_usd=10.0))
+    return session_id
+
+
+def _item(session_id: str, tx_hash: str) -> dict:
+    return {"session_id": session_id, "tx_hash": tx_hash, "user_wallet_address": WALLET}
+
+
+def _paid(arb, session_id: str) -> str:
+    tx_hash = "0x" + uuid4().hex * 2
+    arb.payments[tx_hash] = (session_id, USDC)
+    return tx_hash
+
+
+def _status(session_id: str) -> str:
+    with Session(engine) as db:
+        return db.get(PaymentSession, session_id).status
+
+
+def test_batch_partial_failure(client, arb, lithic):
+    ok = _session()
+    card_fails = _session()
+    unpaid = _session()
+    replayed = _session()
+    with Session(engine) as db:
+        db.add(VirtualCard(tx_hash="0xused", amount_cents=1))
+        db.commit()
+    lithic.fail_memos.add(f"ClawPay {card_fails[:8]}")
+    ok_tx = _paid(arb, ok)
+    items = [
+        _item(ok, ok_tx),
+        _item(str(uuid4()), "0xunknown"),
+        _item(card_fails, _paid(arb, card_fails)),
+        _item(unpaid, "0xnot-paid"),
+        _item(ok, ok_tx),
+        _item(replayed, "0xused"),
+    ]
+
+    response = client.post("/api/v1/payment/confirm/batch", json={"items": items})
+
+    assert response.status_code == 200
+    body = response.json()
+    assert (body["succeeded"], body["failed"]) == (1, 5)
+    results = body["results"]
+    assert results[0]["success"] is True and results[0]["tx_hash"] == ok_tx
+    assert results[0]["card"]["token"] == "card-1"
+    assert [r.get("status_code") for r in results[1:]] == [404, 500, 400, 409, 409]
+    assert results[4]["error"] == "Duplicate item in batch"
+    assert results[5]["error"] == "Transaction already used"
+
+    # Only the successful item consumed its session; the failed card creation released its claim
+    assert _status(ok) == SessionStatus.CONSUMED
+    assert _status(card_fails) == SessionStatus.OPEN
+    assert _status(unpaid) == SessionStatus.OPEN
+    with Session(engine) as db:
+        card = db.exec(select(VirtualCard).where(VirtualCard.tx_hash == ok_tx)).one()
+        assert card.session_id == ok and card.amount_cents == 1050
+        assert db.get(CardSecret, card.id).pan == results[0]["card"]["pan"]
+        assert len(db.exec(select(VirtualCard)).all()) == 2
+
+
+def test_batch_failed_item_can_be_retried(client, arb, lithic):
+    session_id = _session()
+    tx_hash = _paid(arb, session_id)
+    lithic.fail_memos.add(f"ClawPay {session_id[:8]}")
+
+    first = client.post("/api/v1/payment/confirm/batch", json={"items": [_item(session_id, tx_hash)]}).json()
+    lithic.fail_memos.clear()
+    second = client.post("/api/v1/payment/confirm/batch", json={"items": [_item(session_id, tx_hash)]}).json()
+    third = client.post("/api/v1/payment/confirm/batch", json={"items": [_item(session_id, tx_hash)]}).json()
+
+    assert first["succeeded"] == 0
+    assert second["succeeded"] == 1
+    assert third["results"][0]["status_code"] == 409
+
+
+def test_batch_wallet_mismatch(client, arb):
+    session_id = _session()
+    item = dict(_item(session_id, _paid(arb, session_id)), user_wallet_address="0x" + "99" * 20)
+
+    body = client.post("/api/v1/payment/confirm/batch", json={"items": [item]}).json()
+
+    assert body["results"][0]["status_code"] == 400
+    assert _status(session_id) == SessionStatus.OPEN
+
+
+def test_batch_requires_the_api_key(client):
+    response = client.post(
+        "/api/v1/payment/confirm/batch",
+        json={"items": [_item("s", "0x1")]},
+        headers={"X-API-Key": "wrong"},
+    )
+    assert response.status_code == 401
+
+
+def test_batch_save_failure_releases_every_claim(client, arb, lithic, monkeypatch):
+    from src import main
+
+    def fail(db, cards):
+        raise RuntimeError("database is locked")
+
+    first, second = _session(), _session()
+    items = [_item(first, _paid(arb, first)), _item(second, _paid(arb, second))]
+    monkeypatch.setattr(main, "_save_cards", fail)
+
+    body = client.post("/api/v1/payment/confirm/batch", json={"items": items}).json()
+
+    assert body["succeeded"] == 0
+    assert [r["status_code"] for r in body["results"]] == [500, 500]
+    assert sorted(lithic.closed) == ["card-1", "card-2"]
+    assert _status(first) == _status(second) == SessionStatus.OPEN
+    with Session(engine) as db:
+        assert db.exec(select(VirtualCard)).all() == []
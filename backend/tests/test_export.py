@@ -0,0 +1,94 @@
+"""GET /api/v1/cards/export - streamed NDJSON / CSV card ledger."""
+import csv
+import io
+import json
+from datetime import datetime, timedelta, timezone
+
+import pytest
+from sqlmodel import Session
+
+from src.config import settings
+from src.database import engine
+from src.export import EXPORT_COLUMNS
+from src.models import CardLifecycle, CardSecret, RefundJob, RefundStatus, VirtualCard
+
+START = datetime(2026, 2, 1, 12, tzinfo=timezone.utc)
+
+
+@pytest.fixture
+def ledger():
+    """Three cards a minute apart: issued, cleared, and settled with a queued refund."""
+    cards = [
+        VirtualCard(tx_hash=f"0x{i}", user_wallet_address="0x" + "77" * 20, amount_cents=1000 * (i + 1),
+                    created_at=START + timedelta(minutes=i))
+        for i in range(3)
+    ]
+    with Session(engine) as db:
+        db.add_all(cards)
+        db.flush()
+        db.add_all(CardSecret(card_id=card.id, pan="4111111111111111", cvv="123") for card in cards)
+        lifecycle = CardLifecycle(card_id=cards[1].id)
+        lifecycle.mark_cleared(1900)
+        db.add(lifecycle)
+        cards[2].actual_charged_cents = 2900
+        cards[2].refund_amount_cents = 250
+        db.add(RefundJob(card_id=cards[2].id, status=RefundStatus.PENDING))
+        db.commit()
+        return [card.id for card in cards]
+
+
+def _export(client, **params):
+    response = client.get("/api/v1/cards/export", params=params)
+    assert response.status_code == 200, response.text
+    return response
+
+
+def test_ndjson_has_every_column_and_no_secrets(client, ledger):
+    response = _export(client)
+
+    assert response.headers["content-type"].startswith("application/x-ndjson")
+    assert response.headers["content-disposition"].endswith('.ndjson"')
+    rows = [json.loads(line) for line in response.text.splitlines()]
+    assert [row["id"] for row in rows] == ledger
+    assert all(list(row) == list(EXPORT_COLUMNS) for row in rows)
+    assert rows[0]["created_at"] == "2026-02-01T12:00:00Z"
+    assert (rows[0]["cleared"], rows[1]["cleared"], rows[1]["cleared_amount_cents"]) == (None, True, 1900)
+    assert (rows[2]["refund_status"], rows[2]["refund_amount_cents"]) == (RefundStatus.PENDING, 250)
+    assert "4111111111111111" not in response.text
+
+
+def test_csv_with_chosen_columns(client, ledger):
+    response = _export(client, format="csv", columns="id, amount_cents,created_at")
+
+    assert response.headers["content-type"].startswith("text/csv")
+    rows = list(csv.reader(io.StringIO(response.text)))
+    assert rows[0] == ["id", "amount_cents", "created_at"]
+    assert rows[1:] == [
+        [card_id, str(1000 * (i + 1)), f"2026-02-01T12:0{i}:00Z"] for i, card_id in enumerate(ledger)
+    ]
+
+
+def test_created_window_filters(client, ledger):
+    response = _export(
+        client,
+        columns="id",
+        created_after=(START + timedelta(minutes=1)).isoformat(),
+        created_before=(START + timedelta(minutes=2)).isoformat(),
+    )
+
+    assert [json.loads(line)["id"] for line in response.text.splitlines()] == [ledger[1]]
+
+
+def test_small_batches_stream_every_row(client, ledger, monkeypatch):
+    monkeypatch.setattr(settings, "export_batch_rows", 1)
+
+    response = _export(client, format="csv", columns="id")
+
+    assert response.text.splitlines() == ["id", *ledger]
+
+
+def test_unknown_column_is_a_400(client):
+    response = client.get("/api/v1/cards/export", params={"columns": "id,pan"})
+
+    assert response.status_code == 400
+    assert "Unknown columns: pan" in response.json()["detail"]
@@ -0,0 +1,111 @@
+"""HealthProber.status() states and GET /readyz."""
+import asyncio
+from types import SimpleNamespace
+from typing import Optional
+
+import pytest
+
+from src.config import settings
+from src.services import health
+from src.services.health import HealthProber
+
+
+class FakeEth:
+    def __init__(self) -> None:
+        self.error: Optional[Exception] = None
+        self.hang = False
+
+    @property
+    async def block_number(self) -> int:
+        if self.hang:
+            await asyncio.sleep(10)
+        if self.error is not None:
+            raise self.error
+        return 1234
+
+
+@pytest.fixture
+def eth(arb, lithic):
+    """Both services built; the chain answers block_number with 1234."""
+    eth = FakeEth()
+    arb.w3 = SimpleNamespace(eth=eth)
+    return eth
+
+
+def _probed() -> HealthProber:
+    prober = HealthProber()
+    asyncio.run(prober.probe())
+    return prober
+
+
+def test_starting_before_the_first_probe():
+    status = HealthProber().status()
+
+    assert (status["ready"], status["status"], status["checks"]) == (False, "starting", {})
+
+
+def test_starting_until_the_services_are_built():
+    status = _probed().status()
+
+    assert (status["ready"], status["status"]) == (False, "starting")
+    assert status["checks"]["database"]["ok"] is True
+    assert status["checks"]["rpc"] == {"ok": None, "error": "starting"}
+
+
+def test_ok_when_every_check_passes(eth):
+    status = _probed().status()
+
+    assert (status["ready"], status["status"]) == (True, "ok")
+    rpc = status["checks"]["rpc"]
+    assert rpc["ok"] is True and rpc["block_number"] == 1234 and rpc["latency_ms"] >= 0
+    assert status["checks"]["lithic"] == {"ok": None, "error": "not configured"}
+    assert status["checked_at"].endswith("Z")
+
+
+def test_rpc_failure_is_degraded_but_ready(eth):
+    eth.error = ConnectionError("all endpoints failed")
+
+    status = _probed().status()
+
+    assert (status["ready"], status["status"]) == (True, "degraded")
+    assert status["checks"]["rpc"]["error"] == "ConnectionError: all endpoints failed"
+
+
+def test_hung_check_times_out(eth, monkeypatch):
+    monkeypatch.setattr(settings, "health_probe_timeout_seconds", 0.01)
+    eth.hang = True
+
+    status = _probed().status()
+
+    assert status["status"] == "degraded"
+    assert status["checks"]["rpc"]["error"] == "timed out after 0.01s"
+
+
+def test_database_failure_is_unavailable(eth, monkeypatch):
+    def down(bind):
+        raise OSError("connection refused")
+
+    monkeypatch.setattr(health, "_ping_database", down)
+
+    status = _probed().status()
+
+    assert (status["ready"], status["status"]) == (False, "unavailable")
+
+
+def test_old_result_is_stale(eth, monkeypatch):
+    prober = _probed()
+    monkeypatch.setattr(settings, "health_stale_after_seconds", -1)
+
+    assert (prober.status()["ready"], prober.status()["status"]) == (False, "stale")
+
+
+def test_readyz_follows_the_status(client, eth, monkeypatch):
+    from src import main
+
+    monkeypatch.setattr(main, "health_prober", HealthProber())
+    assert client.get("/readyz").status_code == 503
+
+    monkeypatch.setattr(main, "health_prober", _probed())
+    response = client.get("/readyz")
+    assert response.status_code == 200
+    assert response.json()["status"] == "ok"
@@ -0,0 +1,163 @@
+"""EscrowIndexer: range indexing, reorg rewinds and the indexed confirm path."""
+import asyncio
+from types import SimpleNamespace
+from typing import Dict, List
+
+import pytest
+from sqlmodel import Session, select
+
+from src.config import settings
+from src.database import engine
+from src.models import IndexerCursor, PaymentEvent
+from src.services.events import PAYMENT_RECEIVED_TOPIC
+from src.services.indexer import CURSOR_NAME, EscrowIndexer
+
+ESCROW = "0x" + "ee" * 20
+PAYER = "0x" + "22" * 20
+
+
+def _word(value: int) -> bytes:
+    return value.to_bytes(32, "big")
+
+
+class FakeChain:
+    """
+    Blocks 0..head on a named fork, with escrow logs per block. fork() swaps
+    in a new fork from a block onwards, so every hash from there changes.
+    Stands in for both arb.w3 and arb.rpc.
+    """
+
+    def __init__(self, head: int) -> None:
+        self.forks: List[str] = ["a"] * (head + 1)
+        self.logs: Dict[int, List[dict]] = {}
+        self.tx_to: Dict[str, str] = {}
+        self.eth = self
+
+    @property
+    async def block_number(self) -> int:
+        return len(self.forks) - 1
+
+    def _hash(self, n: int) -> bytes:
+        return self.forks[n].encode().rjust(4, b"\0") + n.to_bytes(28, "big")
+
+    async def get_block(self, n: int) -> dict:
+        return {"number": n, "hash": self._hash(n), "parentHash": self._hash(n - 1) if n else b"\0" * 32}
+
+    async def get_logs(self, params: dict) -> List[dict]:
+        return [
+            dict(log, blockHash=self._hash(n))
+            for n in range(params["fromBlock"], params["toBlock"] + 1)
+            for log in self.logs.get(n, [])
+        ]
+
+    async def make_batch_request(self, requests: list) -> List[dict]:
+        return [{"result": {"to": self.tx_to[params[0]]}} for _, params in requests]
+
+    def fork(self, from_block: int, name: str, head: int) -> None:
+        self.forks = self.forks[:from_block] + [name] * (head + 1 - from_block)
+        self.logs = {n: logs for n, logs in self.logs.items() if n < from_block}
+
+    def pay(self, block: int, session_id: str, amount: int, to: str = ESCROW, address: str = ESCROW) -> str:
+        tx_hash = "0x" + f"{block:02d}{len(self.tx_to):02d}".rjust(64, "f")
+        session = session_id.encode()
+        data = _word(amount) + _word(96) + _word(1_700_000_000) + _word(len(session)) + session.ljust(32, b"\0")
+        self.logs.setdefault(block, []).append({
+            "address": address,
+            "topics": [bytes.fromhex(PAYMENT_RECEIVED_TOPIC[2:]), bytes(12) + bytes.fromhex(PAYER[2:])],
+            "data": data,
+            "transactionHash": bytes.fromhex(tx_hash[2:]),
+            "logIndex": 0,
+            "blockNumber": block,
+        })
+        self.tx_to[tx_hash] = to
+        return tx_hash
+
+
+@pytest.fixture
+def chain(arb, monkeypatch):
+    monkeypatch.setattr(settings, "arb_escrow_contract", ESCROW)
+    monkeypatch.setattr(settings, "indexer_reorg_depth", 2)
+    chain = FakeChain(head=3)
+    arb.w3 = arb.rpc = chain
+    arb.contract = SimpleNamespace(address=ESCROW)
+    return chain
+
+
+def _poll() -> int:
+    return asyncio.run(EscrowIndexer().poll_once())
+
+
+def _find(tx_hash: str) -> PaymentEvent:
+    with Session(engine) as db:
+        return EscrowIndexer.find_payment(db, tx_hash)
+
+
+def _cursor() -> IndexerCursor:
+    with Session(engine) as db:
+        return db.get(IndexerCursor, CURSOR_NAME)
+
+
+def test_indexed_payment_verifies_like_a_receipt(chain):
+    tx_hash = chain.pay(2, "session-1", 10_500_000)
+
+    assert _poll() == 4
+    assert _poll() == 0
+
+    event = _find(tx_hash)
+    assert (event.block_number, event.contract, event.tx_to) == (2, ESCROW, ESCROW)
+    payment = EscrowIndexer.verify_indexed(event, "session-1", min_usdc=10_000_000)
+    assert payment["paid_usdc"] == 10_500_000 and payment["block_number"] == 2
+    with pytest.raises(ValueError, match="Underpayment"):
+        EscrowIndexer.verify_indexed(event, "session-1", min_usdc=11_000_000)
+    with pytest.raises(ValueError, match="Session ID mismatch"):
+        EscrowIndexer.verify_indexed(event, "session-2")
+
+
+def test_deposit_routed_through_another_contract_is_rejected(chain):
+    tx_hash = chain.pay(2, "session-1", 10_500_000, to="0x" + "99" * 20)
+    _poll()
+
+    with pytest.raises(ValueError, match="expected escrow"):
+        EscrowIndexer.verify_indexed(_find(tx_hash), "session-1")
+
+
+def test_event_from_another_escrow_is_rejected(chain, monkeypatch):
+    tx_hash = chain.pay(2, "session-1", 10_500_000)
+    _poll()
+    monkeypatch.setattr(settings, "arb_escrow_contract", "0x" + "dd" * 20)
+
+    with pytest.raises(ValueError, match="No PaymentReceived event"):
+        EscrowIndexer.verify_indexed(_find(tx_hash), "session-1")
+
+
+def test_unconfirmed_deposit_is_left_to_the_live_path(chain, monkeypatch):
+    monkeypatch.setattr(settings, "deposit_min_confirmations", 3)
+    tx_hash = chain.pay(2, "session-1", 10_500_000)
+    _poll()
+
+    assert _find(tx_hash) is None  # 2 confirmations as of block 3
+    chain.fork(4, "a", head=4)
+    _poll()
+    assert _find(tx_hash).block_number == 2
+
+
+def test_reorg_rewinds_and_reindexes(chain):
+    dropped = chain.pay(3, "session-1", 10_500_000)
+    _poll()
+    assert _find(dropped) is not None
+
+    # Block 3 is replaced and the deposit lands in block 4 under a new hash
+    chain.fork(3, "b", head=4)
+    moved = chain.pay(4, "session-1", 10_500_000)
+
+    assert _poll() == 1
+    assert _cursor().block_number == 1
+    assert _find(dropped) is None
+
+    _poll()
+    assert _find(dropped) is None
+    assert _find(moved).block_number == 4
+    cursor = _cursor()
+    assert (cursor.block_number, cursor.block_hash) == (4, "0x" + chain._hash(4).hex())
+    with Session(engine) as db:
+        assert len(db.exec(select(PaymentEvent)).all()) == 1
@@ -0,0 +1,169 @@
+"""LithicService retries and the PriorityTokenBucket in front of it."""
+import asyncio
+from typing import Any, List, Union
+
+import httpx
+import pytest
+from lithic import APITimeoutError, AsyncLithic, InternalServerError
+
+from src.config import settings
+from src.ratelimit import PriorityTokenBucket
+from src.services.lithic import LithicService
+
+CARD = {"token": "card-1", "last_four": "0001", "exp_month": "01", "exp_year": "2030", "state": "OPEN"}
+
+
+class FakeLithicAPI:
+    """Replays `script` - an HTTP status, or an exception to raise - then answers 200 with CARD."""
+
+    def __init__(self, *script: Union[int, Exception]) -> None:
+        self.script = list(script)
+        self.requests: List[str] = []
+
+    def __call__(self, request: httpx.Request) -> httpx.Response:
+        self.requests.append(f"{request.method} {request.url.path}")
+        step = self.script.pop(0) if self.script else 200
+        if isinstance(step, Exception):
+            raise step
+        if step == 429:
+            return httpx.Response(429, headers={"Retry-After": "0"}, json={"message": "slow down"})
+        if step != 200:
+            return httpx.Response(step, json={"message": "upstream error"})
+        return httpx.Response(200, json=CARD)
+
+
+@pytest.fixture
+def service(monkeypatch):
+    monkeypatch.setattr(settings, "lithic_backoff_base_seconds", 0.0)
+    monkeypatch.setattr(settings, "lithic_rate_limit_per_second", 0.0)
+    return LithicService(api_key="test-key")
+
+
+def _run(service: LithicService, api: FakeLithicAPI, call: Any) -> Any:
+    async def main():
+        service.client = AsyncLithic(
+            api_key="test-key",
+            environment="sandbox",
+            max_retries=0,
+            http_client=httpx.AsyncClient(transport=httpx.MockTransport(api)),
+        )
+        try:
+            return await call(service)
+        finally:
+            await service.client.close()
+
+    return asyncio.run(main())
+
+
+def _create(service: LithicService) -> Any:
+    return service.create_virtual_card(memo="ClawPay test", spend_limit_cents=1050)
+
+
+def _activate(service: LithicService) -> Any:
+    return service.activate_card("card-1", spend_limit_cents=1050)
+
+
+# ─────────────────────────────────────────────
+# Retries
+# ─────────────────────────────────────────────
+
+
+def test_idempotent_call_retries_a_5xx(service):
+    api = FakeLithicAPI(500, 503)
+
+    card = _run(service, api, _activate)
+
+    assert card["token"] == "card-1"
+    assert api.requests == ["PATCH /v1/cards/card-1"] * 3
+    assert service.retries == 2
+
+
+def test_card_creation_is_not_retried_after_a_5xx(service):
+    api = FakeLithicAPI(500)
+
+    with pytest.raises(InternalServerError):
+        _run(service, api, _create)
+    assert api.requests == ["POST /v1/cards"]
+
+
+def test_card_creation_is_not_retried_after_a_read_timeout(service):
+    api = FakeLithicAPI(httpx.ReadTimeout("read timed out"))
+
+    with pytest.raises(APITimeoutError):
+        _run(service, api, _create)
+    assert len(api.requests) == 1
+
+
+def test_card_creation_retries_when_the_request_never_went_out(service):
+    api = FakeLithicAPI(httpx.ConnectError("connection refused"), 429)
+
+    card = _run(service, api, _create)
+
+    assert card["token"] == "card-1"
+    assert len(api.requests) == 3
+    assert service.retries == 2
+
+
+def test_retries_give_up_after_max_retries(service, monkeypatch):
+    monkeypatch.setattr(settings, "lithic_max_retries", 2)
+    api = FakeLithicAPI(500, 500, 500, 500)
+
+    with pytest.raises(InternalServerError):
+        _run(service, api, _activate)
+    assert len(api.requests) == 3
+
+
+# ─────────────────────────────────────────────
+# Token bucket
+# ─────────────────────────────────────────────
+
+
+def test_bucket_allows_a_burst_then_queues():
+    async def main():
+        bucket = PriorityTokenBucket(rate=100.0, burst=3)
+        for _ in range(3):
+            await bucket.acquire()
+        assert bucket.waited == 0
+        await bucket.acquire()
+        return bucket.waited
+
+    assert asyncio.run(main()) == 1
+
+
+def test_bucket_serves_the_lowest_priority_number_first():
+    async def main():
+        bucket = PriorityTokenBucket(rate=50.0, burst=1)
+        await bucket.acquire()
+        order: List[str] = []
+
+        async def call(name: str, priority: int) -> None:
+            await bucket.acquire(priority)
+            order.append(name)
+
+        await asyncio.gather(call("probe", 10), call("simulate", 9), call("issue", 0), call("issue-2", 0))
+        return order
+
+    assert asyncio.run(main()) == ["issue", "issue-2", "simulate", "probe"]
+
+
+def test_cancelled_waiter_is_skipped():
+    async def main():
+        bucket = PriorityTokenBucket(rate=20.0, burst=1)
+        await bucket.acquire()
+        cancelled = asyncio.ensure_future(bucket.acquire(0))
+        await asyncio.sleep(0)
+        cancelled.cancel()
+        await asyncio.wait_for(bucket.acquire(5), timeout=1)
+        return bucket.queued, bucket.waited
+
+    assert asyncio.run(main()) == (0, 2)
+
+
+def test_zero_rate_disables_the_bucket():
+    async def main():
+        bucket = PriorityTokenBucket(rate=0, burst=1)
+        for _ in range(100):
+            await bucket.acquire()
+        return bucket.waited
+
+    assert asyncio.run(main()) == 0
@@ -0,0 +1,85 @@
+"""GET /metrics and the Prometheus text format the metrics render to."""
+import re
+
+import pytest
+
+from src import metrics
+from src.metrics import Counter, Gauge, Histogram
+
+# name{label="value",...} number - label values may contain escaped quotes
+SAMPLE = re.compile(r'^[a-zA-Z_:][a-zA-Z0-9_:]*(\{([a-zA-Z_]+="(\\.|[^"\\])*",?)*\})? -?[0-9.e+Inf-]+$')
+
+
+@pytest.fixture
+def registry():
+    """Metrics created in a test are unregistered afterwards."""
+    before = list(metrics._registry)
+    yield
+    metrics._registry[:] = before
+
+
+def test_counter_and_gauge_samples(registry):
+    counter = Counter("test_events_total", "Events.", ("kind",))
+    gauge = Gauge("test_depth", "Depth.")
+    counter.inc(kind="a")
+    counter.inc(2, kind="a")
+    counter.inc(0.5, kind='quote"d\nnew')
+    gauge.set(7)
+
+    assert counter.render() == [
+        "# HELP test_events_total Events.",
+        "# TYPE test_events_total counter",
+        'test_events_total{kind="a"} 3',
+        'test_events_total{kind="quote\\"d\\nnew"} 0.5',
+    ]
+    assert gauge.render()[1:] == ["# TYPE test_depth gauge", "test_depth 7"]
+
+
+def test_missing_label_is_an_error(registry):
+    counter = Counter("test_labelled_total", "Labelled.", ("kind",))
+
+    with pytest.raises(ValueError, match="missing label 'kind'"):
+        counter.inc()
+
+
+def test_histogram_buckets_are_cumulative(registry):
+    histogram = Histogram("test_seconds", "Latency.", ("op",), buckets=(0.1, 1.0))
+    for value in (0.05, 0.1, 0.5, 3.0):
+        histogram.observe(value, op="read")
+
+    assert histogram.render()[2:] == [
+        'test_seconds_bucket{op="read",le="0.1"} 2',
+        'test_seconds_bucket{op="read",le="1"} 3',
+        'test_seconds_bucket{op="read",le="+Inf"} 4',
+        'test_seconds_sum{op="read"} 3.65',
+        'test_seconds_count{op="read"} 4',
+    ]
+
+
+def test_histogram_timer_records_the_outcome(registry):
+    histogram = Histogram("test_timed_seconds", "Timed.", ("op", "outcome"))
+    with histogram.time(op="ok-op"):
+        pass
+    with pytest.raises(RuntimeError), histogram.time(op="bad-op"):
+        raise RuntimeError("boom")
+
+    counts = [line for line in histogram.render() if "_count" in line]
+    assert counts == [
+        'test_timed_seconds_count{op="ok-op",outcome="ok"} 1',
+        'test_timed_seconds_count{op="bad-op",outcome="error"} 1',
+    ]
+
+
+def test_metrics_endpoint_serves_the_text_format(client):
+    metrics.STAGE_SECONDS.observe(0.02, flow="confirm", stage="card", outcome="ok")
+
+    response = client.get("/metrics")
+
+    assert response.status_code == 200
+    assert response.headers["content-type"] == metrics.CONTENT_TYPE
+    lines = response.text.rstrip("\n").split("\n")
+    assert "# TYPE clawpay_stage_duration_seconds histogram" in lines
+    for line in lines:
+        assert line.startswith("# HELP ") or line.startswith("# TYPE ") or SAMPLE.match(line), line
+    names = [line.split()[2] for line in lines if line.startswith("# TYPE ")]
+    assert len(names) == len(set(names))
@@ -0,0 +1,252 @@
+"""NonceManager bookkeeping, and how ArbitrumService broadcasts and fills gaps with it."""
+import asyncio
+from typing import List, Optional
+
+import pytest
+from eth_account import Account
+
+from src.config import settings
+from src.services.bnb import ArbitrumService
+from src.services.nonce import NonceConsumedError, NonceManager, TxRejectedError
+
+
+def _manager(next_nonce: int = 0) -> NonceManager:
+    nonces = NonceManager()
+    nonces.reset(next_nonce)
+    return nonces
+
+
+# ─────────────────────────────────────────────
+# NonceManager
+# ─────────────────────────────────────────────
+
+
+def test_allocate_before_reset_raises():
+    with pytest.raises(RuntimeError):
+        NonceManager().allocate()
+
+
+def test_allocate_counts_up_from_reset():
+    nonces = _manager(7)
+    assert [nonces.allocate() for _ in range(3)] == [7, 8, 9]
+
+
+def test_released_nonces_are_reused_lowest_first():
+    nonces = _manager()
+    for _ in range(5):
+        nonces.allocate()
+    nonces.release(3)
+    nonces.release(1)
+    nonces.release(3)  # releasing twice hands it out once
+
+    assert [nonces.allocate() for _ in range(4)] == [1, 3, 5, 6]
+
+
+def test_release_forgets_the_in_flight_tx():
+    nonces = _manager()
+    nonce = nonces.allocate()
+    nonces.track(nonce, {"gasPrice": 1}, "0xa")
+
+    nonces.release(nonce)
+
+    assert nonces.in_flight == 0
+    assert nonces.lookup("0xa") is None
+
+
+def test_track_keeps_every_hash_for_a_nonce():
+    nonces = _manager()
+    nonce = nonces.allocate()
+    nonces.track(nonce, {"gasPrice": 1}, "0xa")
+    nonces.track(nonce, {"gasPrice": 2}, "0xb")
+
+    entry = nonces.lookup("0xa")
+    assert entry is nonces.lookup("0xb")
+    assert entry.hashes == ["0xa", "0xb"] and entry.gas_price == 2
+
+
+def test_confirm_below_drops_mined_nonces():
+    nonces = _manager()
+    for nonce in range(4):
+        nonces.allocate()
+        nonces.track(nonce, {"gasPrice": 1}, f"0x{nonce}")
+    nonces.release(1)
+
+    nonces.confirm_below(3)
+
+    assert nonces.in_flight == 1 and nonces.lookup("0x3") is not None
+    assert nonces.stale_gaps(older_than=0) == []
+    assert nonces.allocate() == 4
+
+
+def test_stale_gaps_are_released_nonces_below_an_in_flight_tx():
+    nonces = _manager()
+    for nonce in range(4):
+        nonces.allocate()
+    nonces.track(2, {"gasPrice": 1}, "0x2")
+    nonces.release(1)
+    nonces.release(3)  # above every in-flight tx - not a gap
+
+    assert nonces.stale_gaps(older_than=0) == [1]
+    assert nonces.stale_gaps(older_than=3600) == []
+
+
+def test_claim_takes_a_released_nonce_once():
+    nonces = _manager()
+    for _ in range(3):
+        nonces.allocate()
+    nonces.release(0)
+    nonces.release(1)
+
+    assert nonces.claim(1) is True
+    assert nonces.claim(1) is False
+    assert nonces.claim(2) is False  # never released
+    assert nonces.allocate() == 0
+    assert nonces.allocate() == 3
+
+
+def test_reset_keeps_in_flight_below_the_new_start():
+    nonces = _manager()
+    for nonce in range(3):
+        nonces.allocate()
+        nonces.track(nonce, {"gasPrice": 1}, f"0x{nonce}")
+    nonces.release(2)
+
+    nonces.reset(2)
+
+    assert nonces.in_flight == 2
+    assert nonces.lookup("0x2") is None
+    assert nonces.allocate() == 2
+
+
+# ─────────────────────────────────────────────
+# ArbitrumService
+# ─────────────────────────────────────────────
+
+
+class _FakeEth:
+    def __init__(self) -> None:
+        self.latest = 0
+        self.sent: List[str] = []
+        self.send_error: Optional[Exception] = None
+        self.gas_price_error: Optional[Exception] = None
+
+    async def send_raw_transaction(self, raw: str) -> bytes:
+        if self.send_error is not None:
+            raise self.send_error
+        self.sent.append(raw)
+        return bytes(32)
+
+    async def get_transaction_count(self, address: str, block: str) -> int:
+        return self.latest
+
+    async def estimate_gas(self, tx: dict) -> int:
+        return 21_000
+
+    @property
+    def gas_price(self):
+        async def read() -> int:
+            if self.gas_price_error is not None:
+                raise self.gas_price_error
+            return 10**8
+
+        return read()
+
+
+class _FakeW3:
+    def __init__(self) -> None:
+        self.eth = _FakeEth()
+
+
+@pytest.fixture
+def service():
+    svc = ArbitrumService()
+    svc.w3 = _FakeW3()
+    svc.platform_account = Account.create()
+    svc.nonces.reset(0)
+    yield svc
+    asyncio.run(svc.close())
+
+
+def test_broadcast_returns_the_hash(service):
+    assert asyncio.run(service.broadcast("0x01", nonce=0)) == "0x" + "00" * 32
+
+
+def test_broadcast_already_known_is_success(service):
+    service.w3.eth.send_error = ValueError({"code": -32000, "message": "already known"})
+    assert asyncio.run(service.broadcast("0x01", nonce=0)).startswith("0x")
+
+
+@pytest.mark.parametrize("message", ["nonce too low", "replacement transaction underpriced"])
+def test_broadcast_nonce_clash_keeps_the_nonce(service, message):
+    nonce = service.nonces.allocate()
+    service.w3.eth.send_error = ValueError({"code": -32000, "message": message})
+
+    with pytest.raises(NonceConsumedError):
+        asyncio.run(service.broadcast("0x01", nonce=nonce))
+
+    assert service.nonces.allocate() == 1
+
+
+def test_broadcast_rejection_releases_the_nonce(service):
+    nonce = service.nonces.allocate()
+    service.w3.eth.send_error = ValueError({"code": -32000, "message": "insufficient funds for gas"})
+
+    with pytest.raises(TxRejectedError):
+        asyncio.run(service.broadcast("0x01", nonce=nonce))
+
+    assert service.nonces.allocate() == nonce
+
+
+def test_broadcast_transport_error_keeps_the_nonce(service):
+    nonce = service.nonces.allocate()
+    service.w3.eth.send_error = TimeoutError("read timed out")
+
+    with pytest.raises(TimeoutError):
+        asyncio.run(service.broadcast("0x01", nonce=nonce))
+
+    assert service.nonces.allocate() == 1
+
+
+def _gap(service: ArbitrumService) -> None:
+    """Nonce 1 released while nonce 2 is in flight."""
+    for _ in range(3):
+        service.nonces.allocate()
+    service.nonces.track(2, {"gasPrice": 1}, "0x2")
+    service.nonces.release(1)
+
+
+def test_maintain_nonces_fills_a_stale_gap(service, monkeypatch):
+    monkeypatch.setattr(settings, "nonce_gap_fill_after_seconds", 0)
+    _gap(service)
+
+    asyncio.run(service.maintain_nonces())
+
+    assert len(service.w3.eth.sent) == 1
+    assert service.nonces.in_flight == 2
+    assert service.nonces.stale_gaps(older_than=0) == []
+    assert service.nonces.allocate() == 3
+
+
+@pytest.mark.parametrize("failure", ["gas_price", "broadcast"])
+def test_maintain_nonces_releases_the_gap_on_failure(service, monkeypatch, failure):
+    monkeypatch.setattr(settings, "nonce_gap_fill_after_seconds", 0)
+    _gap(service)
+    if failure == "gas_price":
+        service.w3.eth.gas_price_error = TimeoutError("read timed out")
+    else:
+        service.w3.eth.send_error = ValueError({"code": -32000, "message": "insufficient funds for gas"})
+
+    asyncio.run(service.maintain_nonces())
+
+    assert service.w3.eth.sent == []
+    assert service.nonces.stale_gaps(older_than=0) == [1]
+
+
+def test_maintain_nonces_confirms_mined_txs(service):
+    _gap(service)
+    service.w3.eth.latest = 3
+
+    asyncio.run(service.maintain_nonces())
+
+    assert service.nonces.in_flight == 0
+    assert service.nonces.stale_gaps(older_than=0) == []
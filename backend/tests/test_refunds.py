@@ -0,0 +1,290 @@
+"""RefundWorker: submit, track, retry and re-sign against a fake chain."""
+import asyncio
+from datetime import timedelta
+from uuid import uuid4
+
+import pytest
+from sqlmodel import Session, select
+
+from src.config import settings
+from src.database import engine
+from src.models import RefundJob, RefundStatus, StatsRollup, VirtualCard, as_utc, utc_now
+from src.services import rollups
+from src.services.nonce import NonceConsumedError, TxRejectedError
+from src.services.refunds import RefundWorker
+
+
+def _queue(status: str = RefundStatus.PENDING, **job: object) -> str:
+    """A settled card with a 100-cent refund job in `status`; returns the card id."""
+    card = VirtualCard(
+        tx_hash="0x" + uuid4().hex,
+        session_id=str(uuid4()),
+        user_wallet_address="0x" + "33" * 20,
+        amount_cents=1000,
+        spend_limit_cents=1050,
+        actual_charged_cents=950,
+        refund_amount_cents=100,
+    )
+    with Session(engine) as db:
+        db.add(card)
+        db.add(RefundJob(card_id=card.id, status=status, **job))
+        rollups.record(db, card)
+        db.commit()
+        return card.id
+
+
+def _submitted(**job: object) -> str:
+    """A SUBMITTED job for nonce 5: current tx 0xaa, replaced tx 0xbb."""
+    fields = dict(tx_hash="0xaa", raw_tx="raw:0xaa", nonce=5, replaced_txs="0xbb")
+    fields.update(job)
+    return _queue(RefundStatus.SUBMITTED, **fields)
+
+
+def _job(card_id: str) -> RefundJob:
+    with Session(engine) as db:
+        return db.get(RefundJob, card_id)
+
+
+def _card(card_id: str) -> VirtualCard:
+    with Session(engine) as db:
+        return db.get(VirtualCard, card_id)
+
+
+def _refund_cents() -> int:
+    with Session(engine) as db:
+        row = db.exec(
+            select(StatsRollup).where(StatsRollup.granularity == "day").where(StatsRollup.wallet == "")
+        ).one()
+        return row.refund_cents
+
+
+def _process(*card_ids: str) -> None:
+    asyncio.run(RefundWorker()._process(list(card_ids)))
+
+
+# ─────────────────────────────────────────────
+# Submit
+# ─────────────────────────────────────────────
+
+
+def test_submit_broadcasts_and_confirms(arb):
+    arb.mine_status = 1
+    card_id = _queue()
+
+    _process(card_id)
+
+    job, card = _job(card_id), _card(card_id)
+    assert job.status == RefundStatus.CONFIRMED
+    assert job.raw_tx is None and job.next_attempt_at is None
+    assert card.refund_tx == job.tx_hash == arb.broadcasts[0]
+    assert card.refunded_at is not None
+    assert _refund_cents() == 100
+    assert arb.signed[0]["refunds"] == [(card.user_wallet_address, 1_000_000, card.session_id)]
+
+
+def test_rejected_broadcast_releases_nonce_and_resigns(arb):
+    arb.broadcast_errors = [TxRejectedError("intrinsic gas too low")]
+    card_id = _queue()
+
+    _process(card_id)
+
+    job = _job(card_id)
+    assert job.status == RefundStatus.PENDING
+    assert job.attempts == 1
+    assert job.raw_tx is None
+    assert as_utc(job.next_attempt_at) > utc_now()
+    assert arb.nonces.allocate() == 0  # the rejected tx's nonce is handed out again
+
+
+def test_broadcast_timeout_keeps_tx_and_nonce(arb):
+    arb.broadcast_errors = [TimeoutError("read timed out")]
+    card_id = _queue()
+
+    _process(card_id)
+
+    job = _job(card_id)
+    assert job.status == RefundStatus.SUBMITTED
+    assert job.attempts == 0
+    assert job.raw_tx == f"raw:{job.tx_hash}" and job.nonce == 0
+    assert arb.nonces.in_flight == 1
+    assert arb.nonces.allocate() == 1
+
+
+def test_receipt_error_after_broadcast_keeps_job_submitted(arb):
+    async def unreachable(tx_hash, timeout=0):
+        raise TimeoutError("read timed out")
+
+    arb.get_receipt = unreachable
+    card_id = _queue()
+
+    _process(card_id)
+
+    job = _job(card_id)
+    assert arb.broadcasts == [job.tx_hash]
+    assert job.status == RefundStatus.SUBMITTED
+    assert job.attempts == 0
+    assert job.raw_tx == f"raw:{job.tx_hash}"
+    assert as_utc(job.next_attempt_at) > utc_now()
+
+
+def test_persist_failure_releases_nonce(arb, monkeypatch):
+    card_id = _queue()
+    worker = RefundWorker()
+
+    def fail(*args, **kwargs):
+        raise RuntimeError("database is locked")
+
+    monkeypatch.setattr(worker, "_update", fail)
+    asyncio.run(worker._process([card_id]))
+
+    job = _job(card_id)
+    assert job.status == RefundStatus.PENDING and job.attempts == 1
+    assert arb.broadcasts == []
+    assert arb.nonces.allocate() == 0
+
+
+# ─────────────────────────────────────────────
+# Track
+# ─────────────────────────────────────────────
+
+
+def test_track_confirms_a_replaced_tx(arb):
+    arb.receipts["0xbb"] = {"status": 1}
+    card_id = _submitted()
+
+    _process(card_id)
+
+    assert _job(card_id).status == RefundStatus.CONFIRMED
+    assert _card(card_id).refund_tx == "0xbb"
+    assert arb.broadcasts == []
+
+
+def test_track_rebroadcasts_a_dropped_tx(arb):
+    card_id = _submitted()
+
+    _process(card_id)
+
+    assert arb.broadcasts == ["0xaa"]
+    job = _job(card_id)
+    assert job.status == RefundStatus.SUBMITTED and job.attempts == 0
+
+
+def test_track_leaves_a_known_tx_alone(arb):
+    arb.known.add("0xbb")
+    card_id = _submitted()
+
+    _process(card_id)
+
+    assert arb.broadcasts == []
+    assert _job(card_id).status == RefundStatus.SUBMITTED
+
+
+@pytest.mark.parametrize("error", [ValueError("429 Too Many Requests"), TimeoutError("timed out")])
+def test_track_rpc_error_keeps_job_submitted(arb, error):
+    arb.broadcast_errors = [error]
+    card_id = _submitted()
+
+    _process(card_id)
+
+    job = _job(card_id)
+    assert job.status == RefundStatus.SUBMITTED
+    assert job.attempts == 0
+    assert job.raw_tx == "raw:0xaa"
+
+
+def test_nonce_used_but_not_mined_keeps_job_submitted(arb):
+    arb.broadcast_errors = [NonceConsumedError("replacement transaction underpriced")]
+    arb.mined_nonces = 5  # nonce 5 is still pending
+    card_id = _submitted()
+
+    _process(card_id)
+
+    job = _job(card_id)
+    assert job.status == RefundStatus.SUBMITTED
+    assert job.attempts == 0
+
+
+def test_nonce_mined_by_another_tx_resigns(arb):
+    arb.broadcast_errors = [NonceConsumedError("nonce too low")]
+    arb.mined_nonces = 6
+    card_id = _submitted()
+
+    _process(card_id)
+
+    job = _job(card_id)
+    assert job.status == RefundStatus.PENDING
+    assert job.attempts == 1
+    assert job.raw_tx is None and job.replaced_txs is None
+
+
+def test_nonce_mined_by_our_tx_confirms(arb):
+    arb.broadcast_errors = [NonceConsumedError("nonce too low")]
+    arb.mined_nonces = 6
+
+    async def mined_meanwhile(nonce):
+        arb.receipts["0xbb"] = {"status": 1}  # lands between the two receipt lookups
+        return True
+
+    arb.nonce_mined = mined_meanwhile
+    card_id = _submitted()
+
+    _process(card_id)
+
+    assert _job(card_id).status == RefundStatus.CONFIRMED
+    assert _card(card_id).refund_tx == "0xbb"
+
+
+def test_reverted_refund_is_resigned(arb):
+    arb.receipts["0xaa"] = {"status": 0}
+    card_id = _submitted()
+
+    _process(card_id)
+
+    job = _job(card_id)
+    assert job.status == RefundStatus.PENDING and job.attempts == 1
+    assert "reverted" in job.last_error
+
+
+# ─────────────────────────────────────────────
+# Retry / claim
+# ─────────────────────────────────────────────
+
+
+def test_retry_gives_up_after_max_attempts(arb, monkeypatch):
+    monkeypatch.setattr(settings, "refund_max_attempts", 2)
+    card_id = _queue()
+    worker = RefundWorker()
+
+    worker._retry([card_id], "boom")
+    assert _job(card_id).status == RefundStatus.PENDING
+    worker._retry([card_id], "boom")
+
+    job = _job(card_id)
+    assert job.status == RefundStatus.FAILED
+    assert job.attempts == 2 and job.next_attempt_at is None
+    assert _refund_cents() == 0  # never confirmed, never counted
+
+
+def test_backoff_grows_with_attempts(monkeypatch):
+    from src.services.refunds import _backoff
+
+    monkeypatch.setattr(settings, "refund_backoff_base_seconds", 4.0)
+    monkeypatch.setattr(settings, "refund_backoff_max_seconds", 32.0)
+    assert all(2.0 <= _backoff(1) <= 4.0 for _ in range(50))
+    assert all(2.0 <= _backoff(10) <= 32.0 for _ in range(50))
+
+
+def test_claim_leases_a_job_once(arb):
+    card_id = _queue()
+
+    assert RefundWorker()._claim_due(4) == [[card_id]]
+    assert RefundWorker()._claim_due(4) == []
+    assert as_utc(_job(card_id).next_attempt_at) > utc_now() + timedelta(seconds=60)
+
+
+def test_claim_skips_jobs_not_yet_due(arb):
+    _queue(next_attempt_at=utc_now() + timedelta(minutes=5))
+    _queue(RefundStatus.FAILED)
+    _queue(RefundStatus.CONFIRMED)
+
+    assert RefundWorker()._claim_due(4) == []
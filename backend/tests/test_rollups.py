@@ -0,0 +1,107 @@
+"""Rollups: incremental record() and rebuild() must produce the same buckets."""
+from datetime import datetime, timedelta, timezone
+from typing import Dict, Tuple
+
+from sqlmodel import Session, select
+
+from src.database import engine
+from src.models import CardLifecycle, StatsRollup, VirtualCard, utc_now
+from src.services import rollups
+
+ALICE = "0x" + "AA" * 20
+BOB = "0x" + "bb" * 20
+T0 = datetime(2026, 3, 1, 23, 30, tzinfo=timezone.utc)
+
+
+def _issue(db: Session, wallet: str, created_at: datetime, amount_cents: int) -> VirtualCard:
+    card = VirtualCard(
+        tx_hash=f"0x{created_at.timestamp():.0f}{wallet[-4:]}",
+        user_wallet_address=wallet,
+        amount_cents=amount_cents,
+        spend_limit_cents=int(amount_cents * 1.05),
+        created_at=created_at,
+    )
+    db.add(card)
+    rollups.record(db, card)
+    db.commit()
+    return card
+
+
+def _clear(db: Session, card: VirtualCard, amount_cents: int) -> CardLifecycle:
+    lifecycle = CardLifecycle(card_id=card.id)
+    before = rollups.contribution(card, lifecycle)
+    lifecycle.mark_authorized("auth-" + card.id, amount_cents)
+    lifecycle.mark_cleared(amount_cents)
+    db.add(lifecycle)
+    rollups.record(db, card, before, lifecycle)
+    db.commit()
+    return lifecycle
+
+
+def _settle(db: Session, card: VirtualCard, charged_cents: int, refund_confirmed: bool) -> None:
+    before = rollups.contribution(card)
+    card.actual_charged_cents = charged_cents
+    card.refund_amount_cents = card.spend_limit_cents - charged_cents
+    rollups.record(db, card, before)
+    db.commit()
+    if refund_confirmed:
+        before = rollups.contribution(card)
+        card.refund_tx = "0xrefund" + card.id[:8]
+        card.refunded_at = utc_now()
+        rollups.record(db, card, before)
+        db.commit()
+
+
+def _buckets() -> Dict[Tuple[str, datetime, str], Dict[str, int]]:
+    with Session(engine) as db:
+        return {
+            (row.granularity, row.bucket_start.replace(tzinfo=None), row.wallet): {
+                name: getattr(row, name) for name in rollups.METRICS
+            }
+            for row in db.exec(select(StatsRollup)).all()
+        }
+
+
+def _history() -> None:
+    """Cards for two wallets across an hour and a day boundary, in every lifecycle state."""
+    with Session(engine) as db:
+        issued = _issue(db, ALICE, T0, 1000)
+        _issue(db, BOB, T0 + timedelta(minutes=10), 2000)
+        cleared = _issue(db, ALICE, T0 + timedelta(minutes=45), 3000)
+        settled = _issue(db, BOB, T0 + timedelta(hours=1), 4000)
+        refunded = _issue(db, ALICE, T0 + timedelta(days=1), 5000)
+
+        _clear(db, cleared, 2900)
+        _clear(db, settled, 3900)
+        _settle(db, settled, 3900, refund_confirmed=False)
+        _clear(db, refunded, 4800)
+        _settle(db, refunded, 4800, refund_confirmed=True)
+        assert issued.actual_charged_cents is None
+
+
+def test_rebuild_matches_incremental_rollups():
+    _history()
+    incremental = _buckets()
+
+    written = rollups.rebuild()
+
+    assert written == len(incremental)
+    assert _buckets() == incremental
+
+
+def test_rollup_totals_add_up():
+    _history()
+
+    with Session(engine) as db:
+        days = rollups.query(db, "day", T0 - timedelta(days=1), T0 + timedelta(days=2))
+        hours = rollups.query(db, "hour", T0 - timedelta(days=1), T0 + timedelta(days=2), wallet=ALICE)
+
+    totals = days["totals"]
+    assert [b["bucket_start"].day for b in days["buckets"]] == [1, 2]
+    assert totals["cards_issued"] == 5 and totals["volume_cents"] == 15_000
+    assert (totals["cleared_count"], totals["cleared_cents"]) == (3, 11_600)
+    assert (totals["settled_count"], totals["charged_cents"]) == (2, 8_700)
+    assert (totals["refunds_queued"], totals["refund_cents"]) == (2, 450)
+    assert totals["buffer_retained_cents"] == 300  # the unconfirmed refund's buffer
+    assert hours["totals"]["cards_issued"] == 3  # wallet matched case-insensitively
+    assert [b["bucket_start"].hour for b in hours["buckets"]] == [23, 0, 23]
@@ -0,0 +1,158 @@
+"""RPCPool: failover, cooldown, hedged reads, sticky nonce reads and batch ordering."""
+import asyncio
+import json
+from typing import Any, Callable, List
+
+import httpx
+import pytest
+from web3.types import RPCEndpoint
+
+from src.services.rpc import RPCPool
+
+ADDRESS = "0x" + "11" * 20
+
+
+class FakeNode:
+    """One RPC URL: answers with `result`, after `delay`, or fails with `status`."""
+
+    def __init__(self, name: str) -> None:
+        self.name = name
+        self.result: Any = name
+        self.delay = 0.0
+        self.status = 200
+        self.error: Any = None
+        self.calls: List[str] = []
+
+    async def __call__(self, request: httpx.Request) -> httpx.Response:
+        body = json.loads(request.content)
+        self.calls.append("batch" if isinstance(body, list) else body["method"])
+        if self.delay:
+            await asyncio.sleep(self.delay)
+        if self.status != 200:
+            return httpx.Response(self.status)
+        if isinstance(body, list):
+            # Nodes may answer a batch in any order
+            return httpx.Response(200, json=[{"jsonrpc": "2.0", "id": r["id"], "result": r["id"]} for r in reversed(body)])
+        if self.error is not None:
+            return httpx.Response(200, json={"jsonrpc": "2.0", "id": body["id"], "error": self.error})
+        return httpx.Response(200, json={"jsonrpc": "2.0", "id": body["id"], "result": self.result})
+
+
+def _pool(*nodes: FakeNode, **kwargs: Any) -> RPCPool:
+    pool = RPCPool([f"https://{node.name}.example" for node in nodes], **kwargs)
+    for endpoint, node in zip(pool.endpoints, nodes):
+        endpoint.client = httpx.AsyncClient(transport=httpx.MockTransport(node))
+    return pool
+
+
+def _run(pool: RPCPool, calls: Callable[[RPCPool], Any]) -> Any:
+    async def main():
+        try:
+            return await calls(pool)
+        finally:
+            await pool.disconnect()
+
+    return asyncio.run(main())
+
+
+@pytest.fixture
+def nodes():
+    return FakeNode("a"), FakeNode("b")
+
+
+def test_fails_over_and_cools_the_endpoint_down(nodes):
+    a, b = nodes
+    a.status = 503
+    pool = _pool(a, b, hedge=False)
+
+    async def calls(pool):
+        return [
+            await pool.make_request(RPCEndpoint("eth_chainId"), []),
+            await pool.make_request(RPCEndpoint("eth_chainId"), []),
+        ]
+
+    responses = _run(pool, calls)
+
+    assert [r["result"] for r in responses] == ["b", "b"]
+    assert a.calls == ["eth_chainId"]  # cooling down - not tried again
+    assert pool.stats()["endpoints"][0]["cooling_down"] is True
+    assert pool.endpoints[0].failures == 1
+
+
+def test_throttling_fails_over_but_a_real_error_is_returned(nodes):
+    a, b = nodes
+    a.error = {"code": -32005, "message": "rate limit exceeded"}
+    pool = _pool(a, b, hedge=False)
+    assert _run(pool, lambda p: p.make_request(RPCEndpoint("eth_chainId"), []))["result"] == "b"
+
+    a.error = b.error = {"code": -32000, "message": "nonce too low"}
+    a.calls.clear()
+    pool = _pool(b, a, hedge=False)
+    response = _run(pool, lambda p: p.make_request(RPCEndpoint("eth_sendRawTransaction"), ["0x00"]))
+    assert response["error"]["message"] == "nonce too low"
+    assert a.calls == []
+
+
+def test_slow_read_is_hedged_to_the_runner_up(nodes):
+    a, b = nodes
+    a.delay = 1.0
+    pool = _pool(a, b, hedge_min_delay=0.01)
+
+    response = _run(pool, lambda p: p.make_request(RPCEndpoint("eth_blockNumber"), []))
+
+    assert response["result"] == "b"
+    assert (pool.hedged, pool.hedge_wins) == (1, 1)
+
+
+def test_writes_are_never_hedged(nodes):
+    a, b = nodes
+    a.delay = 0.1
+    pool = _pool(a, b, hedge_min_delay=0.01)
+
+    response = _run(pool, lambda p: p.make_request(RPCEndpoint("eth_sendRawTransaction"), ["0x00"]))
+
+    assert response["result"] == "a"
+    assert pool.hedged == 0 and b.calls == []
+
+
+def test_pending_nonce_reads_stick_to_one_endpoint(nodes):
+    a, b = nodes
+    a.status = 503
+    pool = _pool(a, b, hedge_min_delay=0.01)
+
+    async def calls(pool):
+        first = await pool.make_request(RPCEndpoint("eth_getTransactionCount"), [ADDRESS, "pending"])
+        # a recovers and looks faster, but the nonce stays on b
+        a.status = 200
+        pool.endpoints[0].cooldown_until = 0
+        pool.endpoints[1].latency = 1.0
+        return [first, await pool.make_request(RPCEndpoint("eth_getTransactionCount"), [ADDRESS, "pending"])]
+
+    responses = _run(pool, calls)
+
+    assert [r["result"] for r in responses] == ["b", "b"]
+    assert a.calls == ["eth_getTransactionCount"]
+    assert pool.hedged == 0
+
+
+def test_pending_block_reads_are_not_hedged(nodes):
+    a, b = nodes
+    a.delay = 0.1
+    pool = _pool(a, b, hedge_min_delay=0.01)
+
+    response = _run(pool, lambda p: p.make_request(RPCEndpoint("eth_getBlockByNumber"), ["pending", False]))
+
+    assert response["result"] == "a"
+    assert pool.hedged == 0 and b.calls == []
+
+
+def test_batch_responses_come_back_in_request_order(nodes):
+    a, _ = nodes
+    pool = _pool(a)
+    requests = [(RPCEndpoint("eth_getTransactionReceipt"), [f"0x{i:064x}"]) for i in range(5)]
+
+    responses = _run(pool, lambda p: p.make_batch_request(requests))
+
+    ids = [r["id"] for r in responses]
+    assert ids == sorted(ids) and len(ids) == 5
+    assert a.calls == ["batch"]
@@ -0,0 +1,117 @@
+"""SessionStore: the conditional claim that lets only one confirm use a session."""
+import asyncio
+from datetime import timedelta
+from uuid import uuid4
+
+from sqlmodel import Session
+
+from src.database import engine
+from src.models import PaymentSession, SessionStatus, utc_now
+from src.services.sessions import SessionStore
+
+
+def _create(store: SessionStore) -> str:
+    session_id = str(uuid4())
+    with Session(engine) as db:
+        asyncio.run(store.create(db, session_id, "0x" + "44" * 20, usdc_amount=10_500_000, amount_usd=10.0))
+    return session_id
+
+
+def _claim(store: SessionStore, session_id: str) -> bool:
+    with Session(engine) as db:
+        return asyncio.run(store.claim(db, session_id))
+
+
+def _status(session_id: str) -> str:
+    with Session(engine) as db:
+        return db.get(PaymentSession, session_id).status
+
+
+def test_claim_succeeds_once():
+    store = SessionStore()
+    session_id = _create(store)
+
+    assert _claim(store, session_id) is True
+    assert _claim(store, session_id) is False
+    assert _status(session_id) == SessionStatus.CONSUMED
+
+
+def test_claim_is_decided_by_the_database_not_the_cache():
+    # Two processes, each with its own cache, racing on one session
+    first, second = SessionStore(), SessionStore()
+    session_id = _create(first)
+    with Session(engine) as db:
+        assert asyncio.run(second.get(db, session_id)).status == SessionStatus.OPEN
+
+    assert _claim(first, session_id) is True
+    assert _claim(second, session_id) is False
+
+
+def test_concurrent_claims_have_one_winner():
+    store = SessionStore()
+    session_id = _create(store)
+
+    async def race():
+        async def claim():
+            with Session(engine) as db:
+                return await store.claim(db, session_id)
+
+        return await asyncio.gather(*(claim() for _ in range(8)))
+
+    assert sorted(asyncio.run(race())) == [False] * 7 + [True]
+
+
+def test_expired_session_cannot_be_claimed():
+    store = SessionStore()
+    session_id = _create(store)
+    with Session(engine) as db:
+        db.get(PaymentSession, session_id).expires_at = utc_now() - timedelta(seconds=1)
+        db.commit()
+
+    assert _claim(store, session_id) is False
+    assert _status(session_id) == SessionStatus.OPEN
+
+
+def test_unknown_session_cannot_be_claimed():
+    assert _claim(SessionStore(), "no-such-session") is False
+
+
+def test_release_reopens_a_claimed_session():
+    store = SessionStore()
+    session_id = _create(store)
+    assert _claim(store, session_id)
+
+    with Session(engine) as db:
+        asyncio.run(store.release(db, session_id))
+        assert asyncio.run(store.get(db, session_id)).status == SessionStatus.OPEN
+
+    assert _claim(store, session_id) is True
+
+
+def test_failed_claim_on_an_expired_session_keeps_it_expired_not_consumed():
+    store = SessionStore()
+    session_id = _create(store)
+    with Session(engine) as db:
+        db.get(PaymentSession, session_id).expires_at = utc_now() - timedelta(seconds=1)
+        db.commit()
+
+    assert _claim(store, session_id) is False
+
+    with Session(engine) as db:
+        session = asyncio.run(store.get(db, session_id))
+    assert session.status == SessionStatus.OPEN
+    assert session.is_expired()
+
+
+def test_lost_race_evicts_the_cached_session():
+    first, second = SessionStore(), SessionStore()
+    session_id = _create(first)
+    with Session(engine) as db:
+        asyncio.run(second.get(db, session_id))
+
+    assert _claim(first, session_id) is True
+    assert _claim(second, session_id) is False
+
+    assert second._cache.get(session_id) is None
+    with Session(engine) as db:
+        assert asyncio.run(second.get(db, session_id)).status == SessionStatus.CONSUMED
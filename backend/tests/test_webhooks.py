@@ -0,0 +1,162 @@
+"""Webhook inbox: redelivery dedupe, per-card claiming and the settlement handler."""
+import asyncio
+import json
+from datetime import timedelta
+
+from sqlmodel import Session, func, select
+
+from src.database import engine
+from src.models import RefundJob, RefundStatus, VirtualCard, WebhookEvent, WebhookStatus, utc_now
+from src.services.webhooks import WebhookInbox, event_token_for, handle_settled
+
+
+def _accept(inbox: WebhookInbox, payload: dict, headers: dict = None) -> tuple:
+    body = json.dumps(payload).encode()
+    with Session(engine) as db:
+        return inbox.accept(db, body, payload, headers or {})
+
+
+def _events() -> int:
+    with Session(engine) as db:
+        return db.exec(select(func.count()).select_from(WebhookEvent)).one()
+
+
+# ─────────────────────────────────────────────
+# Dedupe
+# ─────────────────────────────────────────────
+
+
+def test_event_token_prefers_the_webhook_id_header():
+    payload = {"event_type": "transaction.settled", "token": "txn-1"}
+    assert event_token_for(payload, {"webhook-id": "msg_1"}, b"{}") == "msg_1"
+    assert event_token_for(payload, {}, b"{}") == "transaction.settled:txn-1"
+    assert event_token_for({}, {}, b"{}").startswith("sha256:")
+    assert event_token_for({}, {}, b"{}") != event_token_for({}, {}, b"{ }")
+
+
+def test_redelivery_is_stored_once():
+    inbox = WebhookInbox()
+    payload = {"event_type": "transaction.settled", "card_token": "card-1", "amount": 900}
+
+    assert _accept(inbox, payload, {"webhook-id": "msg_1"}) == (True, "msg_1")
+    assert _accept(inbox, payload, {"webhook-id": "msg_1"}) == (False, "msg_1")
+
+    assert _events() == 1
+    assert (inbox.accepted, inbox.duplicates) == (1, 1)
+
+
+def test_redelivery_without_webhook_id_is_deduped_by_token():
+    inbox = WebhookInbox()
+    payload = {"event_type": "transaction.settled", "token": "txn-1", "card_token": "card-1"}
+
+    assert _accept(inbox, payload)[0] is True
+    assert _accept(inbox, payload)[0] is False
+    assert _events() == 1
+
+
+def test_duplicate_is_not_processed_again():
+    inbox = WebhookInbox()
+    payload = {"event_type": "card.state_changed", "card_token": "card-1"}
+    _accept(inbox, payload, {"webhook-id": "msg_1"})
+    [(event_id, _)] = inbox._claim_due(set())
+    assert inbox._process_sync(event_id) is False
+
+    _accept(inbox, payload, {"webhook-id": "msg_1"})
+
+    assert inbox._claim_due(set()) == []
+    assert inbox.processed == 1
+
+
+# ─────────────────────────────────────────────
+# Claiming
+# ─────────────────────────────────────────────
+
+
+def test_claim_skips_busy_and_backing_off_cards():
+    inbox = WebhookInbox()
+    for i in range(3):
+        _accept(inbox, {"event_type": "x", "card_token": "busy"}, {"webhook-id": f"busy-{i}"})
+    _accept(inbox, {"event_type": "x", "card_token": "retrying"}, {"webhook-id": "retrying-0"})
+    _accept(inbox, {"event_type": "x", "card_token": "retrying"}, {"webhook-id": "retrying-1"})
+    _accept(inbox, {"event_type": "x", "card_token": "idle"}, {"webhook-id": "idle-0"})
+    _accept(inbox, {"event_type": "x"}, {"webhook-id": "no-card"})
+    with Session(engine) as db:
+        event = db.exec(select(WebhookEvent).where(WebhookEvent.event_token == "retrying-0")).one()
+        event.next_attempt_at = utc_now() + timedelta(minutes=1)
+        db.commit()
+
+    assert [key for _, key in inbox._claim_due(set())] == ["busy", "busy", "busy", "idle", "no-card"]
+    assert [key for _, key in inbox._claim_due({"busy", "no-card"})] == ["idle"]
+
+
+def test_stats_never_query_the_table():
+    inbox = WebhookInbox()
+    _accept(inbox, {"event_type": "x", "card_token": "card-1"}, {"webhook-id": "msg_1"})
+    assert inbox.stats()["depth"] == 0  # not counted yet
+
+    asyncio.run(inbox._count_backlog())
+
+    stats = inbox.stats()
+    assert stats["depth"] == 1 and stats["accepted"] == 1
+
+
+# ─────────────────────────────────────────────
+# Settlement
+# ─────────────────────────────────────────────
+
+
+def _card(wallet: str = "0x" + "77" * 20) -> str:
+    with Session(engine) as db:
+        card = VirtualCard(
+            tx_hash="0x1",
+            user_wallet_address=wallet,
+            amount_cents=1000,
+            spend_limit_cents=1050,
+            lithic_card_token="card-1",
+        )
+        db.add(card)
+        db.commit()
+        return card.id
+
+
+def _settle(amount: int) -> dict:
+    with Session(engine) as db:
+        result = handle_settled(db, {"card_token": "card-1", "amount": amount})
+        db.commit()
+        return result
+
+
+def test_settlement_queues_one_refund_job():
+    card_id = _card()
+
+    first = _settle(900)
+    second = _settle(900)
+
+    assert first == {"status": "refund_queued", "refund_amount_cents": 150, "refund_status": RefundStatus.PENDING}
+    assert second == {"status": "already_queued", "refund_status": RefundStatus.PENDING}
+    with Session(engine) as db:
+        assert db.exec(select(func.count()).select_from(RefundJob)).one() == 1
+        assert db.get(VirtualCard, card_id).refund_amount_cents == 150
+
+
+def test_settlement_without_unused_buffer_queues_nothing():
+    _card()
+    assert _settle(1050) == {"status": "no_refund_needed"}
+    with Session(engine) as db:
+        assert db.exec(select(func.count()).select_from(RefundJob)).one() == 0
+
+
+def test_inbox_processes_a_settlement_once():
+    _card()
+    inbox = WebhookInbox()
+    payload = {"event_type": "transaction.settled", "token": "txn-1", "card_token": "card-1", "amount": 900}
+    _accept(inbox, payload, {"webhook-id": "msg_1"})
+    _accept(inbox, payload, {"webhook-id": "msg_2"})  # same settlement, different delivery id
+
+    queued = [inbox._process_sync(event_id) for event_id, _ in inbox._claim_due(set())]
+
+    assert queued == [True, False]
+    with Session(engine) as db:
+        statuses = db.exec(select(WebhookEvent.status)).all()
+        assert statuses == [WebhookStatus.PROCESSED, WebhookStatus.PROCESSED]
+        assert db.exec(select(func.count()).select_from(RefundJob)).one() == 1
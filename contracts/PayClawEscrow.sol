@@ -122,6 +122,35 @@ contract ClawPayEscrow {
         emit Refunded(recipient, amount, sessionId);
     }
 
+    /**
+     * @notice Refund several users in one transaction.
+     *         Same effect as calling refund() once per entry - one Refunded
+     *         event each - but the base transaction cost is paid only once.
+     *         Reverts as a whole if any single transfer fails.
+     * @param recipients User wallet addresses
+     * @param amounts    USDC amounts in units, one per recipient
+     * @param sessionIds Original session IDs, one per recipient
+     */
+    function batchRefund(
+        address[] calldata recipients,
+        uint256[] calldata amounts,
+        string[]  calldata sessionIds
+    ) external onlyOwner {
+        uint256 count = recipients.length;
+        require(
+            amounts.length == count && sessionIds.length == count,
+            "ClawPayEscrow: length mismatch"
+        );
+        for (uint256 i = 0; i < count; ) {
+            require(
+                usdc.transfer(recipients[i], amounts[i]),
+                "ClawPayEscrow: USDC refund failed"
+            );
+            emit Refunded(recipients[i], amounts[i], sessionIds[i]);
+            unchecked { ++i; }
+        }
+    }
+
     /**
      * @notice Withdraw USDC to the owner wallet.
      * @param amount USDC amount in units to withdraw
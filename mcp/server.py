@@ -35,11 +35,14 @@ Claude Desktop config (~/.claude/claude_desktop_config.json):
 
 import asyncio
 import os
-from typing import Optional
+from contextlib import contextmanager
+from typing import Iterator, List, Optional
 
 import httpx
+import requests
 from mcp.server.fastmcp import FastMCP
 from web3 import Web3
+from web3.providers import JSONBaseProvider
 
 # ─────────────────────────────────────────────
 # Config (from environment)
@@ -48,9 +51,15 @@ from web3 import Web3
 AGENT_PRIVATE_KEY     = os.environ.get("AGENT_PRIVATE_KEY", "")
 CLAWPAY_API_URL       = os.environ.get("CLAWPAY_API_URL", "https://clawpay-production.up.railway.app")
 CLAWPAY_API_KEY       = os.environ.get("CLAWPAY_API_KEY", "")
+# Comma-separated list - later URLs are fallbacks for the first
 ARB_RPC               = os.environ.get("ARB_RPC", "https://arbitrum-sepolia-testnet.api.pocket.network")
 CHAIN_ID              = int(os.environ.get("CHAIN_ID", "421614"))
 USDC_CONTRACT_ADDRESS = os.environ.get("USDC_CONTRACT_ADDRESS", "")
+# Optional tracing (needs opentelemetry-sdk): "otlp" or "file" - not "console",
+# stdout is the MCP transport
+TRACING_EXPORTER      = os.environ.get("CLAWPAY_TRACING_EXPORTER", "")
+TRACING_OTLP_ENDPOINT = os.environ.get("CLAWPAY_TRACING_OTLP_ENDPOINT", "http://localhost:4318/v1/traces")
+TRACING_FILE_PATH     = os.environ.get("CLAWPAY_TRACING_FILE_PATH", "mcp-traces.jsonl")
 
 # ─────────────────────────────────────────────
 # ABIs
@@ -93,8 +102,38 @@ ERC20_ABI = [
 # Web3 setup
 # ─────────────────────────────────────────────
 
+class FailoverHTTPProvider(JSONBaseProvider):
+    """
+    Sync provider over several RPC URLs: sticks to the last endpoint that
+    worked and moves to the next one on connection errors, timeouts or
+    HTTP 429/5xx. Each URL keeps its own HTTPProvider (and keep-alive session).
+    """
+
+    def __init__(self, urls: List[str]) -> None:
+        super().__init__()
+        self.providers = [Web3.HTTPProvider(url, request_kwargs={"timeout": 15}) for url in urls]
+        self._current = 0
+
+    def make_request(self, method, params):
+        last_error: Optional[Exception] = None
+        for step in range(len(self.providers)):
+            index = (self._current + step) % len(self.providers)
+            try:
+                response = self.providers[index].make_request(method, params)
+            except (requests.ConnectionError, requests.Timeout, requests.HTTPError) as exc:
+                last_error = exc
+                continue
+            self._current = index
+            return response
+        raise ConnectionError(f"All {len(self.providers)} RPC endpoints failed; last: {last_error}")
+
+    def is_connected(self, show_traceback: bool = False) -> bool:
+        return any(provider.is_connected() for provider in self.providers)
+
+
 def _build_w3() -> Web3:
-    w3 = Web3(Web3.HTTPProvider(ARB_RPC))
+    urls = [url.strip() for url in ARB_RPC.split(",") if url.strip()]
+    w3 = Web3(FailoverHTTPProvider(urls))
     try:
         from web3.middleware import ExtraDataToPOAMiddleware
         w3.middleware_onion.inject(ExtraDataToPOAMiddleware, layer=0)
@@ -113,6 +152,58 @@ else:
     agent_account = None
     print("[clawpay-mcp] WARNING: AGENT_PRIVATE_KEY not set - transactions will fail")
 
+# ─────────────────────────────────────────────
+# Tracing
+# ─────────────────────────────────────────────
+
+def _build_tracer():
+    """
+    One trace per buy_virtual_card. The backend continues it from the
+    traceparent header on initiate / confirm and carries it on to the
+    settlement webhook and the refund. None = tracing off.
+    """
+    if not TRACING_EXPORTER:
+        return None
+    try:
+        from opentelemetry.sdk.resources import Resource
+        from opentelemetry.sdk.trace import TracerProvider
+        from opentelemetry.sdk.trace.export import BatchSpanProcessor, ConsoleSpanExporter
+    except ImportError:
+        print("[clawpay-mcp] WARNING: CLAWPAY_TRACING_EXPORTER set but opentelemetry-sdk not installed")
+        return None
+
+    if TRACING_EXPORTER == "otlp":
+        from opentelemetry.exporter.otlp.proto.http.trace_exporter import OTLPSpanExporter
+        exporter = OTLPSpanExporter(endpoint=TRACING_OTLP_ENDPOINT)
+    else:
+        exporter = ConsoleSpanExporter(
+            out=open(TRACING_FILE_PATH, "a", encoding="utf-8"),
+            formatter=lambda span: span.to_json(indent=None) + "\n",
+        )
+    provider = TracerProvider(resource=Resource.create({"service.name": "clawpay-mcp"}))
+    provider.add_span_processor(BatchSpanProcessor(exporter))
+    return provider.get_tracer("clawpay-mcp")
+
+
+tracer = _build_tracer()
+
+
+@contextmanager
+def _span(name: str, **attributes) -> Iterator[None]:
+    if tracer is None:
+        yield
+        return
+    with tracer.start_as_current_span(name, attributes=attributes):
+        yield
+
+
+async def _inject_trace(request: httpx.Request) -> None:
+    """httpx request hook - send the current span's traceparent to the backend."""
+    if tracer is not None:
+        from opentelemetry import propagate
+        propagate.inject(request.headers)
+
+
 # ─────────────────────────────────────────────
 # MCP server
 # ─────────────────────────────────────────────
@@ -161,6 +252,11 @@ async def buy_virtual_card(
           "tx_hash":   "0x...",
         }
     """
+    with _span("buy_virtual_card", amount_usd=amount_usd):
+        return await _buy_virtual_card(amount_usd, merchant_name)
+
+
+async def _buy_virtual_card(amount_usd: float, merchant_name: Optional[str]) -> dict:
     if not agent_account:
         return {"error": "AGENT_PRIVATE_KEY not configured in environment"}
     if not USDC_CONTRACT_ADDRESS:
@@ -173,7 +269,11 @@ async def buy_virtual_card(
         "X-API-Key": CLAWPAY_API_KEY,
     }
 
-    async with httpx.AsyncClient(timeout=30.0, base_url=CLAWPAY_API_URL) as client:
+    async with httpx.AsyncClient(
+        timeout=30.0,
+        base_url=CLAWPAY_API_URL,
+        event_hooks={"request": [_inject_trace]},
+    ) as client:
 
         # ── Step 1: Initiate session ────────────────────────────────────
         init_payload = {
@@ -181,7 +281,8 @@ async def buy_virtual_card(
             "user_wallet_address": agent_account.address,
             "merchant_name": merchant_name or "Agent Purchase",
         }
-        init_resp = await client.post("/api/v1/payment/initiate", json=init_payload, headers=headers)
+        with _span("initiate"):
+            init_resp = await client.post("/api/v1/payment/initiate", json=init_payload, headers=headers)
         if init_resp.status_code != 200:
             return {"error": f"Initiate failed: {init_resp.text}"}
 
@@ -219,11 +320,12 @@ async def buy_virtual_card(
             "nonce":    nonce,
         })
 
-        signed_approve = agent_account.sign_transaction(approve_tx)
-        approve_hash = w3.eth.send_raw_transaction(signed_approve.raw_transaction)
-        print(f"[clawpay-mcp] Approve TX: {approve_hash.hex()}")
+        with _span("approve"):
+            signed_approve = agent_account.sign_transaction(approve_tx)
+            approve_hash = w3.eth.send_raw_transaction(signed_approve.raw_transaction)
+            print(f"[clawpay-mcp] Approve TX: {approve_hash.hex()}")
 
-        approve_receipt = await _wait_for_receipt(approve_hash)
+            approve_receipt = await _wait_for_receipt(approve_hash)
         if approve_receipt["status"] != 1:
             return {"error": f"USDC approval reverted: {approve_hash.hex()}"}
 
@@ -242,12 +344,13 @@ async def buy_virtual_card(
             "nonce":    nonce,
         })
 
-        signed_deposit = agent_account.sign_transaction(deposit_tx)
-        deposit_hash = w3.eth.send_raw_transaction(signed_deposit.raw_transaction)
-        tx_hash = deposit_hash.hex()
-        print(f"[clawpay-mcp] Deposit TX: {tx_hash}")
+        with _span("deposit"):
+            signed_deposit = agent_account.sign_transaction(deposit_tx)
+            deposit_hash = w3.eth.send_raw_transaction(signed_deposit.raw_transaction)
+            tx_hash = deposit_hash.hex()
+            print(f"[clawpay-mcp] Deposit TX: {tx_hash}")
 
-        deposit_receipt = await _wait_for_receipt(deposit_hash)
+            deposit_receipt = await _wait_for_receipt(deposit_hash)
         if deposit_receipt["status"] != 1:
             return {"error": f"Deposit reverted: {tx_hash}"}
 
@@ -259,9 +362,10 @@ async def buy_virtual_card(
             "tx_hash":             tx_hash,
             "user_wallet_address": agent_account.address,
         }
-        confirm_resp = await client.post(
-            "/api/v1/payment/confirm", json=confirm_payload, headers=headers
-        )
+        with _span("confirm", tx_hash=tx_hash):
+            confirm_resp = await client.post(
+                "/api/v1/payment/confirm", json=confirm_payload, headers=headers
+            )
         if confirm_resp.status_code != 200:
             return {"error": f"Confirm failed: {confirm_resp.text}"}
 